@@ -0,0 +1,140 @@
+"""
+Conversation History - Bounded short-term memory with a rolling summary
+The last few turns are kept verbatim; older turns are folded into a running
+summary in the background, so the prompt stays about the same size however
+long the session runs. A turn is only evicted once it is in the summary; if
+summaries fall behind by more than the buffer holds, the oldest turns are
+folded in as truncated plain text instead.
+"""
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Union
+import threading
+
+
+class ConversationHistory:
+    """Buffer of recent turns plus a background-updated summary of everything older"""
+
+    def __init__(
+        self,
+        summarize: Optional[Callable[[List[str]], str]] = None,
+        verbatim_turns: int = 3,
+        capacity: int = 10,
+        fold_batch: int = 3,
+        max_summary_chars: int = 4000
+    ):
+        self.summarize = summarize          # e.g. DungeonMaster.summarize_events
+        self.verbatim_turns = verbatim_turns
+        self.fold_batch = fold_batch        # Older turns to collect before paying for a summary call
+        self.capacity = capacity            # Turns kept in the buffer; only summarized ones are evicted past it
+        self.max_summary_chars = max_summary_chars  # Bound on the summary when turns are folded in as plain text
+        self.turns = deque()
+        self.summary = ""
+        self.summarized_through = 0         # Turn number of the newest turn folded into the summary
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._future: Optional[Future] = None
+        self._closed = False
+        self._plain_folds = 0               # Bumped by _fold_plain so an in-flight summary of the same turns is dropped
+
+    def append(self, turn: Dict):
+        with self._lock:
+            self.turns.append(turn)
+            self._evict()
+            if self.summarize is not None and len(self.turns) > self.capacity:
+                self._fold_plain()
+        self._maybe_fold()
+
+    def recent(self) -> List[Dict]:
+        """The turns that are sent to the model verbatim: every turn not yet folded into the summary"""
+        with self._lock:
+            if self.summarize is None:
+                return list(self.turns)[-self.verbatim_turns:]
+            return [turn for turn in self.turns if turn.get("turn", 0) > self.summarized_through]
+
+    def _evict(self):
+        """Drop the oldest turns past capacity, but never one the summary does not cover yet (call with the lock)"""
+        while len(self.turns) > self.capacity and (
+            self.summarize is None or self.turns[0].get("turn", 0) <= self.summarized_through
+        ):
+            self.turns.popleft()
+
+    def _fold_plain(self):
+        """Summaries are failing or far behind: fold every turn outside the verbatim window as truncated text (call with the lock)"""
+        pending = [turn for turn in list(self.turns)[:-self.verbatim_turns] if turn.get("turn", 0) > self.summarized_through]
+        if not pending:
+            return
+        lines = [f"Player: {turn['player'][:100]} / DM: {turn['dm'][:200]}" for turn in pending]
+        summary = "\n".join([self.summary] + lines) if self.summary else "\n".join(lines)
+        self.summary = summary[-self.max_summary_chars:]
+        self.summarized_through = pending[-1].get("turn", 0)
+        self._plain_folds += 1
+        self._evict()
+        print(f"Warning: history summaries behind; folded {len(pending)} turns as plain text")
+
+    def __len__(self) -> int:
+        return len(self.turns)
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self.turns))
+
+    def __getitem__(self, key: Union[int, slice]):
+        with self._lock:
+            return list(self.turns)[key]
+
+    def _maybe_fold(self):
+        if self.summarize is None or self._closed or (self._future is not None and not self._future.done()):
+            return
+        with self._lock:
+            older = list(self.turns)[:-self.verbatim_turns] if len(self.turns) > self.verbatim_turns else []
+            pending = [turn for turn in older if turn.get("turn", 0) > self.summarized_through]
+        if len(pending) >= self.fold_batch:
+            self._future = self._executor.submit(self._fold, pending, self._plain_folds)
+
+    def _fold(self, pending: List[Dict], plain_folds: int = 0):
+        events = [f"Story so far: {self.summary}"] if self.summary else []
+        events += [f"Player: {turn['player']} / DM: {turn['dm']}" for turn in pending]
+        try:
+            summary = self.summarize(events)
+        except Exception as e:
+            print(f"Warning: history summarization failed: {e}")
+            return
+        with self._lock:
+            if plain_folds != self._plain_folds:
+                return  # A plain-text fold already covered these turns and changed the summary meanwhile
+            self.summary = summary
+            self.summarized_through = pending[-1].get("turn", 0)
+            self._evict()
+
+    def wait(self, timeout: Optional[float] = None):
+        """Block until any in-flight summary update has been applied"""
+        if self._future is not None:
+            self._future.result(timeout=timeout)
+
+    def close(self):
+        """Apply any in-flight summary update and stop the background fold thread"""
+        with self._lock:
+            self._closed = True
+        self._executor.shutdown(wait=True)
+
+    def export_state(self) -> Dict:
+        with self._lock:
+            return {
+                "turns": list(self.turns),
+                "summary": self.summary,
+                "summarized_through": self.summarized_through
+            }
+
+    def load_state(self, state: Union[Dict, List[Dict]]):
+        """Accepts exported state or a plain list of turns (sessions saved before the summary existed)"""
+        if isinstance(state, list):
+            state = {"turns": state}
+        with self._lock:
+            self.turns.clear()
+            self.turns.extend(state.get("turns", []))
+            self.summary = state.get("summary", "")
+            self.summarized_through = state.get("summarized_through", 0)
+            self._evict()
+        self._maybe_fold()
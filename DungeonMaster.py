@@ -1,126 +1,135 @@
-"""
-Dungeon Master Agent - Main narrative generator
-Uses Groq API with llama-3.1-8b-instant
-"""
-
-from groq import Groq
-from typing import List, Dict, Optional
-
-
-class DungeonMaster:
-    """Dungeon Master agent for creative narrative generation"""
-    
-    def __init__(self, api_key: str):
-        self.client = Groq(api_key=api_key)
-        self.model = "llama-3.1-8b-instant"
-        
-        # System prompt for the DM
-        self.system_prompt = """You are an expert Dungeon Master for a fantasy role-playing game. Your role is to:
-
-1. Create engaging, immersive narratives that respond to player actions
-2. Maintain consistency with established lore and past events
-3. Present meaningful choices and consequences
-4. Describe scenes vividly with sensory details
-5. Keep the story moving forward while respecting player agency
-
-Guidelines:
-- Use second-person perspective ("you see...", "you feel...")
-- Be descriptive but concise (2-4 paragraphs)
-- End responses with a question or situation requiring player input
-- Never contradict established facts or memories
-- Adapt tone based on the situation (serious, tense, mysterious, etc.)
-- Remember that player choices matter and have consequences
-
-When relevant memories are provided, integrate them naturally into your response.
-**IMPORTANT: YOUR RESPONSE SHOULD NOT EXCEED 400 WORDS IF THEY DO SUMMARIZE THE TEXT**"""
-        
-        print("✓ Dungeon Master agent initialized")
-    
-    def generate_opening(self, prompt: str, temperature: float = 0.8) -> str:
-        """Generate opening narration for the adventure"""
-        messages = [
-            {"role": "system", "content": self.system_prompt},
-            {"role": "user", "content": prompt}
-        ]
-        
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=messages,
-            temperature=temperature,
-            max_tokens=500
-        )
-        
-        return response.choices[0].message.content.strip()
-    
-    def generate_response(
-        self, 
-        player_input: str,
-        validated_context: List[Dict],
-        conversation_history: List[Dict],
-        temperature: float = 0.7
-    ) -> str:
-        """Generate DM response based on player input and context"""
-        
-        # Build context string from validated memories
-        context_str = ""
-        if validated_context:
-            context_str = "\n\nRelevant memories from previous events:\n"
-            for mem in validated_context:
-                context_str += f"- {mem['text']}\n"
-        
-        # Build conversation history string (short-term memory)
-        history_str = ""
-        if conversation_history:
-            history_str = "\n\nRecent conversation:\n"
-            for turn in conversation_history[-5:]:  # Last 5 turns
-                history_str += f"Player: {turn['player']}\n"
-                history_str += f"DM: {turn['dm']}\n\n"
-        
-        # Construct the prompt
-        user_prompt = f"""{history_str}{context_str}
-
-Current player action: {player_input}
-
-Respond as the Dungeon Master, continuing the story based on this action. Integrate relevant memories naturally and keep the narrative engaging."""
-        
-        messages = [
-            {"role": "system", "content": self.system_prompt},
-            {"role": "user", "content": user_prompt}
-        ]
-        
-        # Call Groq API
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=messages,
-            temperature=temperature,
-            max_tokens=600
-        )
-        
-        return response.choices[0].message.content.strip()
-    
-    def summarize_events(self, events: List[str]) -> str:
-        """Summarize a list of events for context compression"""
-        if not events:
-            return ""
-        
-        events_str = "\n".join([f"- {event}" for event in events])
-        
-        prompt = f"""Summarize the following events into a concise paragraph that captures the key facts:
-
-{events_str}
-
-Summary:"""
-        
-        messages = [
-            {"role": "system", "content": "You are a skilled summarizer. Create concise, factual summaries."},
-            {"role": "user", "content": prompt}
-        ]
-        
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=messages,
-            temperature=0.3,
-            max_tokens=200
-        )
-        
-        return response.choices[0].message.content.strip()
\ No newline at end of file
+"""
+Dungeon Master Agent - Main narrative generator
+Uses Groq API with llama-3.1-8b-instant
+"""
+
+from typing import Iterator, List, Dict, Optional
+
+from LLMGateway import LLMGateway
+from PromptBuilder import PromptBuilder
+
+
+class DungeonMaster:
+    """Dungeon Master agent for creative narrative generation"""
+    
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        gateway: Optional[LLMGateway] = None,
+        prompt_budget_tokens: int = 2000
+    ):
+        self.gateway = gateway or LLMGateway(api_key, base_url=base_url)
+        # No turn cap: the history is every turn the rolling summary does not cover yet
+        self.prompt_builder = PromptBuilder(budget_tokens=prompt_budget_tokens, max_history_turns=None)
+        self.last_prompt_report: Optional[Dict] = None
+        self.model = "llama-3.1-8b-instant"
+        
+        # System prompt for the DM
+        self.system_prompt = """You are an expert Dungeon Master for a fantasy role-playing game. Your role is to:
+
+1. Create engaging, immersive narratives that respond to player actions
+2. Maintain consistency with established lore and past events
+3. Present meaningful choices and consequences
+4. Describe scenes vividly with sensory details
+5. Keep the story moving forward while respecting player agency
+
+Guidelines:
+- Use second-person perspective ("you see...", "you feel...")
+- Be descriptive but concise (2-4 paragraphs)
+- End responses with a question or situation requiring player input
+- Never contradict established facts or memories
+- Adapt tone based on the situation (serious, tense, mysterious, etc.)
+- Remember that player choices matter and have consequences
+
+When relevant memories are provided, integrate them naturally into your response.
+**IMPORTANT: YOUR RESPONSE SHOULD NOT EXCEED 400 WORDS IF THEY DO SUMMARIZE THE TEXT**"""
+        
+        print("✓ Dungeon Master agent initialized")
+    
+    def generate_opening(self, prompt: str, temperature: float = 0.8) -> str:
+        """Generate opening narration for the adventure"""
+        return self._complete(self._build_opening_messages(prompt), temperature, max_tokens=500, cacheable=False)
+    
+    def stream_opening(self, prompt: str, temperature: float = 0.8) -> Iterator[str]:
+        """Stream opening narration token by token"""
+        return self._stream(self._build_opening_messages(prompt), temperature, max_tokens=500)
+    
+    def generate_response(
+        self, 
+        player_input: str,
+        validated_context: List[Dict],
+        conversation_history: List[Dict],
+        temperature: float = 0.7,
+        history_summary: str = ""
+    ) -> str:
+        """Generate DM response based on player input and context"""
+        messages = self._build_response_messages(player_input, validated_context, conversation_history, history_summary)
+        
+        # Call Groq API (never cached, even at the low lore temperature)
+        return self._complete(messages, temperature, max_tokens=600, cacheable=False)
+    
+    def stream_response(
+        self,
+        player_input: str,
+        validated_context: List[Dict],
+        conversation_history: List[Dict],
+        temperature: float = 0.7,
+        history_summary: str = ""
+    ) -> Iterator[str]:
+        """Stream the DM response as text deltas while it is being generated"""
+        messages = self._build_response_messages(player_input, validated_context, conversation_history, history_summary)
+        return self._stream(messages, temperature, max_tokens=600)
+    
+    def _stream(self, messages: List[Dict], temperature: float, max_tokens: int) -> Iterator[str]:
+        return self.gateway.stream(self.model, messages, temperature, max_tokens)
+    
+    def _build_opening_messages(self, prompt: str) -> List[Dict]:
+        return [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": prompt}
+        ]
+    
+    def _build_response_messages(
+        self,
+        player_input: str,
+        validated_context: List[Dict],
+        conversation_history: List[Dict],
+        history_summary: str = ""
+    ) -> List[Dict]:
+        # Fit short-term history and validated memories into the token budget
+        messages, report = self.prompt_builder.build(
+            self.system_prompt,
+            player_input,
+            validated_context,
+            conversation_history,
+            summary=history_summary
+        )
+        self.last_prompt_report = report
+        print(f"[Prompt] {report['tokens']}/{report['budget']} tokens ({report['tokenizer']}): "
+              f"{report['history_kept']}/{report['history_total']} turns, "
+              f"{report['memories_kept']}/{report['memories_total']} memories, {report['compressed']} compressed")
+        return messages
+    
+    def summarize_events(self, events: List[str]) -> str:
+        """Summarize a list of events for context compression"""
+        if not events:
+            return ""
+        
+        events_str = "\n".join([f"- {event}" for event in events])
+        
+        prompt = f"""Summarize the following events into a concise paragraph that captures the key facts:
+
+{events_str}
+
+Summary:"""
+        
+        messages = [
+            {"role": "system", "content": "You are a skilled summarizer. Create concise, factual summaries."},
+            {"role": "user", "content": prompt}
+        ]
+        
+        return self._complete(messages, temperature=0.3, max_tokens=200)
+    
+    def _complete(self, messages: List[Dict], temperature: float, max_tokens: int, cacheable: bool = True) -> str:
+        return self.gateway.complete(self.model, messages, temperature, max_tokens, cacheable=cacheable)
\ No newline at end of file
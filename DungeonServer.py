@@ -0,0 +1,276 @@
+"""
+Dungeon Server - Multi-session server mode
+Hosts many concurrent DungeonMasterOrchestrator sessions in one process behind a
+local JSON-over-HTTP API. Models, the Chroma client and the LLM client are loaded
+once and shared; each session's memories are isolated by collection prefix.
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+import json
+import os
+import re
+import threading
+import uuid
+
+import chromadb
+from chromadb.config import Settings
+from EmbeddingEngine import get_embedding_engine
+from LLMCache import CompletionCache
+from LLMGateway import LLMGateway
+from MainSystem import DungeonMasterOrchestrator
+from TurnAnalysis import TurnAnalyzer
+
+
+OPENING_PROMPT = "Start an exciting fantasy adventure. Introduce the setting and present the player with an initial situation."
+
+
+class SharedResources:
+    """Models and clients loaded once per process and shared by every session"""
+
+    def __init__(self, groq_api_key: str, llm_base_url: Optional[str] = None, persist_directory: Optional[str] = None):
+        self.embedding_engine = get_embedding_engine()
+        self.analyzer = TurnAnalyzer()
+        settings = Settings(anonymized_telemetry=False, allow_reset=True)
+        if persist_directory:
+            self.chroma_client = chromadb.PersistentClient(path=persist_directory, settings=settings)
+        else:
+            self.chroma_client = chromadb.Client(settings)
+        # One gateway means one HTTP connection pool, one rate limit and one cache for all sessions
+        disk_path = os.path.join(persist_directory, "llm_cache.sqlite3") if persist_directory else None
+        self.llm_gateway = LLMGateway(groq_api_key, base_url=llm_base_url, cache=CompletionCache(disk_path=disk_path))
+        print("✓ Shared resources loaded (embeddings, spaCy, ChromaDB, LLM gateway)")
+
+
+class SessionManager:
+    """Creates, looks up and serializes turns for player sessions"""
+
+    def __init__(
+        self,
+        groq_api_key: str,
+        llm_base_url: Optional[str] = None,
+        persist_directory: Optional[str] = None,
+        enable_bonus_features: bool = True
+    ):
+        self.groq_api_key = groq_api_key
+        self.llm_base_url = llm_base_url
+        self.persist_directory = persist_directory
+        self.enable_bonus_features = enable_bonus_features
+        self.shared = SharedResources(groq_api_key, llm_base_url, persist_directory)
+        self.sessions: Dict[str, DungeonMasterOrchestrator] = {}
+        self._session_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def create_session(self, session_id: Optional[str] = None, opening: bool = True) -> Dict:
+        session_id = session_id or uuid.uuid4().hex[:12]
+        # Collection names are lowercased and '-' becomes '_', so only allow ids that survive that unchanged
+        if not re.fullmatch(r'[a-z0-9_]{1,48}', session_id):
+            raise ValueError("session_id may only contain lowercase letters, digits and '_'")
+
+        with self._lock:
+            if session_id in self._session_locks:
+                raise ValueError(f"Session '{session_id}' already exists")
+            self._session_locks[session_id] = threading.Lock()
+
+        try:
+            orchestrator = DungeonMasterOrchestrator(
+                self.groq_api_key,
+                enable_bonus_features=self.enable_bonus_features,
+                llm_base_url=self.llm_base_url,
+                persist_directory=self.persist_directory,
+                session_id=session_id
+            )
+            orchestrator.debug_mode = False
+            orchestrator.initialize_agents(shared=self.shared)
+
+            opening_text = None
+            if orchestrator.resumed_session:
+                if orchestrator.conversation_history:
+                    opening_text = orchestrator.conversation_history[-1]["dm"]
+            elif opening:
+                opening_text = orchestrator.dungeon_master.generate_opening(OPENING_PROMPT)
+                orchestrator.memory_manager.extract_and_store("", opening_text, turn_number=0)
+                orchestrator.save_session()
+        except Exception:
+            with self._lock:
+                self._session_locks.pop(session_id, None)
+            raise
+
+        with self._lock:
+            self.sessions[session_id] = orchestrator
+        return {"session_id": session_id, "turn": orchestrator.turn_count, "opening": opening_text}
+
+    def get(self, session_id: str) -> DungeonMasterOrchestrator:
+        orchestrator = self.sessions.get(session_id)
+        if orchestrator is None:
+            raise KeyError(session_id)
+        return orchestrator
+
+    def _lookup(self, session_id: str):
+        with self._lock:
+            orchestrator = self.sessions.get(session_id)
+            session_lock = self._session_locks.get(session_id)
+        if orchestrator is None or session_lock is None:
+            raise KeyError(session_id)
+        return orchestrator, session_lock
+
+    def _is_open(self, session_id: str, orchestrator: DungeonMasterOrchestrator) -> bool:
+        with self._lock:
+            return self.sessions.get(session_id) is orchestrator
+
+    def take_turn(self, session_id: str, player_input: str) -> Dict:
+        orchestrator, session_lock = self._lookup(session_id)
+        # Turns within one session are strictly ordered; different sessions run in parallel
+        with session_lock:
+            if not self._is_open(session_id, orchestrator):
+                raise KeyError(session_id)  # Closed while this turn waited for the lock
+            response = orchestrator.process_turn(player_input)
+            return {"session_id": session_id, "turn": orchestrator.turn_count, "response": response}
+
+    def describe(self, session_id: str) -> Dict:
+        orchestrator = self.get(session_id)
+        info = {
+            "session_id": session_id,
+            "turn": orchestrator.turn_count,
+            "memory": orchestrator.memory_manager.get_stats()
+        }
+        if orchestrator.npc_manager is not None:
+            info["npcs"] = orchestrator.npc_manager.get_all_npcs()
+        if orchestrator.quest_log is not None:
+            info["quests"] = orchestrator.quest_log.get_quest_summary()
+        return info
+
+    def close_session(self, session_id: str):
+        """Wait for the session's running turn, then save it and stop its background threads"""
+        orchestrator, session_lock = self._lookup(session_id)
+        with session_lock:
+            with self._lock:
+                if self.sessions.get(session_id) is not orchestrator:
+                    raise KeyError(session_id)  # Another close got here first
+                del self.sessions[session_id]
+                del self._session_locks[session_id]
+            orchestrator.close()
+
+
+class DungeonServer:
+    """Local JSON API in front of a SessionManager
+
+    POST   /sessions                 {"session_id"?: str, "opening"?: bool}
+    GET    /sessions                 list active session ids
+    GET    /sessions/<id>            turn count, memory stats, NPCs and quests
+    POST   /sessions/<id>/turns      {"input": str}
+    DELETE /sessions/<id>            save and close the session
+    """
+
+    def __init__(self, session_manager: SessionManager, host: str = "127.0.0.1", port: int = 8080):
+        self.session_manager = session_manager
+        self.host = host
+        self.port = port
+        self._httpd = None
+
+    def _make_handler(self):
+        sessions = self.session_manager
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: Dict):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _read_json(self) -> Dict:
+                length = int(self.headers.get("Content-Length", 0))
+                return json.loads(self.rfile.read(length) or b"{}")
+
+            def _route(self, method: str):
+                parts = [p for p in self.path.split("?")[0].split("/") if p]
+                try:
+                    if parts == ["sessions"] and method == "POST":
+                        body = self._read_json()
+                        return self._send(201, sessions.create_session(body.get("session_id"), body.get("opening", True)))
+                    if parts == ["sessions"] and method == "GET":
+                        return self._send(200, {"sessions": sorted(sessions.sessions)})
+                    if len(parts) == 2 and parts[0] == "sessions" and method == "GET":
+                        return self._send(200, sessions.describe(parts[1]))
+                    if len(parts) == 2 and parts[0] == "sessions" and method == "DELETE":
+                        sessions.close_session(parts[1])
+                        return self._send(200, {"session_id": parts[1], "closed": True})
+                    if len(parts) == 3 and parts[0] == "sessions" and parts[2] == "turns" and method == "POST":
+                        player_input = str(self._read_json().get("input", "")).strip()
+                        if not player_input:
+                            return self._send(400, {"error": "input is required"})
+                        return self._send(200, sessions.take_turn(parts[1], player_input))
+                    return self._send(404, {"error": "not found"})
+                except KeyError as e:
+                    return self._send(404, {"error": f"unknown session {e}"})
+                except ValueError as e:
+                    return self._send(400, {"error": str(e)})
+                except Exception as e:
+                    return self._send(500, {"error": str(e)})
+
+            def do_GET(self):
+                self._route("GET")
+
+            def do_POST(self):
+                self._route("POST")
+
+            def do_DELETE(self):
+                self._route("DELETE")
+
+        return Handler
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def _bind(self):
+        self._httpd = ThreadingHTTPServer((self.host, self.port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+
+    def start(self) -> str:
+        """Serve in a background thread; returns the base URL"""
+        self._bind()
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self.base_url
+
+    def serve_forever(self):
+        self._bind()
+        print(f"✓ Dungeon server listening on {self.base_url}")
+        self._httpd.serve_forever()
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+
+def main():
+    """Server entry point"""
+    groq_api_key = os.getenv("GROQ_API_KEY")
+
+    if not groq_api_key:
+        print("Please enter your Groq API key:")
+        groq_api_key = input().strip()
+
+    session_manager = SessionManager(
+        groq_api_key,
+        llm_base_url=os.getenv("GROQ_BASE_URL"),
+        persist_directory=os.getenv("DM_PERSIST_DIR")
+    )
+    server = DungeonServer(
+        session_manager,
+        host=os.getenv("DM_HOST", "127.0.0.1"),
+        port=int(os.getenv("DM_PORT", "8080"))
+    )
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,262 +1,448 @@
-"""
-Dynamic Quest Log - Bonus Feature
-Automatically tracks and updates quests based on game events
-"""
-
-from typing import Dict, List, Optional
-from enum import Enum
-from datetime import datetime
-
-
-class QuestStatus(Enum):
-    ACTIVE = "active"
-    COMPLETED = "completed"
-    FAILED = "failed"
-    AVAILABLE = "available"
-
-
-class Quest:
-    """Represents a single quest"""
-    
-    def __init__(self, quest_id: str, title: str, description: str):
-        self.quest_id = quest_id
-        self.title = title
-        self.description = description
-        self.status = QuestStatus.AVAILABLE
-        self.objectives = []
-        self.rewards = []
-        self.started_turn = None
-        self.completed_turn = None
-        self.notes = []
-    
-    def add_objective(self, objective: str, completed: bool = False):
-        """Add an objective to the quest"""
-        self.objectives.append({
-            "description": objective,
-            "completed": completed
-        })
-    
-    def complete_objective(self, objective_index: int):
-        """Mark an objective as completed"""
-        if 0 <= objective_index < len(self.objectives):
-            self.objectives[objective_index]["completed"] = True
-    
-    def add_note(self, note: str, turn: int):
-        """Add a note to the quest"""
-        self.notes.append({
-            "text": note,
-            "turn": turn,
-            "timestamp": datetime.now().isoformat()
-        })
-    
-    def to_dict(self) -> Dict:
-        """Convert quest to dictionary"""
-        return {
-            "quest_id": self.quest_id,
-            "title": self.title,
-            "description": self.description,
-            "status": self.status.value,
-            "objectives": self.objectives,
-            "rewards": self.rewards,
-            "started_turn": self.started_turn,
-            "completed_turn": self.completed_turn,
-            "notes": self.notes
-        }
-
-
-class DynamicQuestLog:
-    """Manages dynamic quest tracking"""
-    
-    def __init__(self):
-        self.quests = {}  # quest_id -> Quest
-        self.quest_counter = 0
-        
-        # Keywords for auto-detection
-        self.quest_keywords = [
-            "quest", "mission", "task", "find", "retrieve", "rescue",
-            "defeat", "protect", "deliver", "investigate", "discover"
-        ]
-        
-        self.completion_keywords = [
-            "completed", "finished", "done", "succeeded", "accomplished",
-            "delivered", "defeated", "rescued", "found"
-        ]
-        
-        print("✓ Dynamic Quest Log initialized")
-    
-    def auto_detect_quest(self, text: str, turn: int) -> Optional[str]:
-        """Automatically detect new quests from narrative text"""
-        text_lower = text.lower()
-        
-        # Check for quest keywords
-        has_quest_keyword = any(keyword in text_lower for keyword in self.quest_keywords)
-        
-        if not has_quest_keyword:
-            return None
-        
-        # Try to extract quest information
-        # Simple heuristic: look for sentences with quest keywords
-        sentences = text.split('.')
-        
-        for sentence in sentences:
-            sentence_lower = sentence.lower().strip()
-            
-            # Check if this sentence describes a task
-            if any(keyword in sentence_lower for keyword in self.quest_keywords):
-                # Create a new quest
-                quest_id = self._generate_quest_id()
-                
-                # Extract title (first few words)
-                words = sentence.strip().split()
-                title = " ".join(words[:6]) + "..."
-                
-                quest = Quest(
-                    quest_id=quest_id,
-                    title=title,
-                    description=sentence.strip()
-                )
-                
-                quest.status = QuestStatus.ACTIVE
-                quest.started_turn = turn
-                
-                self.quests[quest_id] = quest
-                
-                return quest_id
-        
-        return None
-    
-    def auto_detect_progress(self, text: str, turn: int):
-        """Automatically detect quest progress from narrative text"""
-        text_lower = text.lower()
-        
-        # Check each active quest for progress
-        for quest_id, quest in self.quests.items():
-            if quest.status != QuestStatus.ACTIVE:
-                continue
-            
-            # Check for completion keywords
-            has_completion = any(
-                keyword in text_lower 
-                for keyword in self.completion_keywords
-            )
-            
-            if has_completion:
-                # Check if this text relates to this quest
-                quest_words = quest.description.lower().split()
-                common_words = set(quest_words) & set(text_lower.split())
-                
-                if len(common_words) > 3:  # Significant overlap
-                    # Mark quest as potentially completed
-                    quest.add_note(f"Progress detected: {text[:100]}...", turn)
-                    
-                    # If explicit completion, mark as complete
-                    if "quest complete" in text_lower or "mission accomplished" in text_lower:
-                        self.complete_quest(quest_id, turn)
-    
-    def _generate_quest_id(self) -> str:
-        """Generate unique quest ID"""
-        self.quest_counter += 1
-        return f"quest_{self.quest_counter}"
-    
-    def add_quest(
-        self, 
-        title: str, 
-        description: str, 
-        turn: int,
-        objectives: List[str] = None
-    ) -> str:
-        """Manually add a quest"""
-        quest_id = self._generate_quest_id()
-        
-        quest = Quest(
-            quest_id=quest_id,
-            title=title,
-            description=description
-        )
-        
-        quest.status = QuestStatus.ACTIVE
-        quest.started_turn = turn
-        
-        if objectives:
-            for obj in objectives:
-                quest.add_objective(obj)
-        
-        self.quests[quest_id] = quest
-        
-        return quest_id
-    
-    def complete_quest(self, quest_id: str, turn: int):
-        """Mark a quest as completed"""
-        if quest_id in self.quests:
-            quest = self.quests[quest_id]
-            quest.status = QuestStatus.COMPLETED
-            quest.completed_turn = turn
-            
-            # Mark all objectives as completed
-            for obj in quest.objectives:
-                obj["completed"] = True
-    
-    def fail_quest(self, quest_id: str, turn: int):
-        """Mark a quest as failed"""
-        if quest_id in self.quests:
-            self.quests[quest_id].status = QuestStatus.FAILED
-            self.quests[quest_id].completed_turn = turn
-    
-    def get_active_quests(self) -> List[Quest]:
-        """Get all active quests"""
-        return [
-            quest for quest in self.quests.values()
-            if quest.status == QuestStatus.ACTIVE
-        ]
-    
-    def get_completed_quests(self) -> List[Quest]:
-        """Get all completed quests"""
-        return [
-            quest for quest in self.quests.values()
-            if quest.status == QuestStatus.COMPLETED
-        ]
-    
-    def get_quest_summary(self) -> str:
-        """Get formatted summary of all quests"""
-        summary = "\n" + "="*50 + "\n"
-        summary += "📜 QUEST LOG\n"
-        summary += "="*50 + "\n"
-        
-        active = self.get_active_quests()
-        completed = self.get_completed_quests()
-        
-        if active:
-            summary += "\n🔥 Active Quests:\n"
-            for quest in active:
-                summary += f"\n  • {quest.title}\n"
-                summary += f"    {quest.description}\n"
-                
-                if quest.objectives:
-                    summary += "    Objectives:\n"
-                    for i, obj in enumerate(quest.objectives):
-                        status = "✓" if obj["completed"] else "○"
-                        summary += f"      {status} {obj['description']}\n"
-        else:
-            summary += "\n  No active quests.\n"
-        
-        if completed:
-            summary += f"\n✅ Completed Quests ({len(completed)}):\n"
-            for quest in completed[:5]:  # Show last 5 completed
-                summary += f"  • {quest.title}\n"
-        
-        summary += "\n" + "="*50 + "\n"
-        
-        return summary
-    
-    def process_turn(self, player_input: str, dm_response: str, turn: int):
-        """Process a turn for quest updates"""
-        combined_text = f"{player_input} {dm_response}"
-        
-        # Try to detect new quests
-        new_quest_id = self.auto_detect_quest(dm_response, turn)
-        
-        if new_quest_id:
-            print(f"  [Quest Log] New quest detected: {self.quests[new_quest_id].title}")
-        
-        # Check for progress on existing quests
-        self.auto_detect_progress(combined_text, turn)
\ No newline at end of file
+"""
+Dynamic Quest Log - Bonus Feature
+Automatically tracks and updates quests based on game events
+"""
+
+from collections import deque
+from itertools import islice
+from typing import Callable, Dict, FrozenSet, List, Optional, Set
+from enum import Enum
+from datetime import datetime
+
+from KeywordMatcher import KEYWORD_TABLES, KeywordHits, content_words, keyword_matcher
+
+
+TASK_NOUNS = {"quest", "mission", "task"}  # Quest keywords that name a quest rather than a task
+
+
+class QuestStatus(Enum):
+    ACTIVE = "active"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    AVAILABLE = "available"
+
+
+class Quest:
+    """Represents a single quest"""
+    
+    def __init__(self, quest_id: str, title: str, description: str):
+        self.quest_id = quest_id
+        self.title = title
+        self.description = description
+        self.status = QuestStatus.AVAILABLE
+        self.objectives = []
+        self.rewards = []
+        self.started_turn = None
+        self.completed_turn = None
+        self.notes = []
+        self.on_change: Optional[Callable[[], None]] = None  # Set by the owning quest log
+    
+    def _changed(self):
+        if self.on_change is not None:
+            self.on_change()
+    
+    def add_objective(self, objective: str, completed: bool = False):
+        """Add an objective to the quest"""
+        self.objectives.append({
+            "description": objective,
+            "completed": completed
+        })
+        self._changed()
+    
+    def complete_objective(self, objective_index: int):
+        """Mark an objective as completed"""
+        if 0 <= objective_index < len(self.objectives):
+            self.objectives[objective_index]["completed"] = True
+            self._changed()
+    
+    def add_note(self, note: str, turn: int):
+        """Add a note to the quest"""
+        self.notes.append({
+            "text": note,
+            "turn": turn,
+            "timestamp": datetime.now().isoformat()
+        })
+    
+    def to_dict(self) -> Dict:
+        """Convert quest to dictionary"""
+        return {
+            "quest_id": self.quest_id,
+            "title": self.title,
+            "description": self.description,
+            "status": self.status.value,
+            "objectives": self.objectives,
+            "rewards": self.rewards,
+            "started_turn": self.started_turn,
+            "completed_turn": self.completed_turn,
+            "notes": self.notes
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Quest":
+        """Rebuild a quest saved with to_dict"""
+        quest = cls(data["quest_id"], data["title"], data["description"])
+        quest.status = QuestStatus(data["status"])
+        quest.objectives = data.get("objectives", [])
+        quest.rewards = data.get("rewards", [])
+        quest.started_turn = data.get("started_turn")
+        quest.completed_turn = data.get("completed_turn")
+        quest.notes = data.get("notes", [])
+        return quest
+
+
+class DynamicQuestLog:
+    """Manages dynamic quest tracking"""
+    
+    def __init__(self):
+        self.quests = {}  # quest_id -> Quest (active quests plus the most recently finished)
+        self.archived_quests = {}  # quest_id -> Quest, finished quests moved out of the hot dict
+        # status -> quest_id -> Quest, archived quests included; finished buckets are in completion order
+        self.buckets: Dict[QuestStatus, Dict[str, Quest]] = {status: {} for status in QuestStatus}
+        self._summary: Optional[str] = None  # Rendered get_quest_summary, dropped whenever a quest changes
+        self.quest_counter = 0
+        self.max_finished_quests = 20  # Completed/failed quests kept in self.quests before archiving
+        self._finished_ids = deque()   # Finished quest ids still in self.quests, oldest first
+        
+        # Inverted index over active quests: content word -> ids of quests whose text uses it
+        self.token_index: Dict[str, Set[str]] = {}
+        self.quest_tokens: Dict[str, FrozenSet[str]] = {}  # quest_id -> its description's content words
+        self.min_progress_overlap = 2  # Shared content words before a turn counts as progress
+        self.duplicate_similarity = 0.6  # Share of the smaller word set two quest texts must have in common
+        self.last_merged: List[str] = []  # Quests the last auto_detect_quest call merged sentences into
+        
+        # Keywords for auto-detection (matched through the shared keyword_matcher)
+        self.quest_keywords = KEYWORD_TABLES["quest_start"]
+        self.completion_keywords = KEYWORD_TABLES["quest_progress"]
+        
+        print("✓ Dynamic Quest Log initialized")
+    
+    def auto_detect_quest(
+        self,
+        text: str,
+        turn: int,
+        hits: Optional[KeywordHits] = None,
+        offset: int = 0
+    ) -> Optional[str]:
+        """Automatically detect new quests from narrative text (hits: a scan in which text starts at offset)
+
+        Sentences that restate an active quest are merged into it (as a new
+        objective when they name a new task, otherwise as a note); at most
+        one new quest is created per call.
+        """
+        if hits is None:
+            hits, offset = keyword_matcher.scan(text), 0
+        self.last_merged = []
+        
+        # Check for quest keywords
+        if not hits.has("quest_start", offset, offset + len(text)):
+            return None
+        
+        # Try to extract quest information
+        # Simple heuristic: look for sentences with quest keywords
+        new_quest_id = None
+        sentence_start = offset
+        for sentence in text.split('.'):
+            sentence_end = sentence_start + len(sentence)
+            
+            # Check if this sentence describes a task
+            if hits.has("quest_start", sentence_start, sentence_end):
+                description = sentence.strip()
+                duplicate_id = self._find_duplicate(description)
+                if duplicate_id is not None:
+                    self._merge_into(duplicate_id, description, hits.found("quest_start", sentence_start, sentence_end), turn)
+                    self.last_merged.append(duplicate_id)
+                elif new_quest_id is None:
+                    new_quest_id = self._create_detected_quest(description, turn)
+            
+            sentence_start = sentence_end + 1
+        
+        return new_quest_id
+    
+    def _create_detected_quest(self, description: str, turn: int) -> str:
+        quest_id = self._generate_quest_id()
+        
+        # Extract title (first few words)
+        words = description.split()
+        title = " ".join(words[:6]) + "..."
+        
+        quest = Quest(
+            quest_id=quest_id,
+            title=title,
+            description=description
+        )
+        
+        quest.started_turn = turn
+        self._register(quest, QuestStatus.ACTIVE)
+        
+        return quest_id
+    
+    def _find_duplicate(self, description: str) -> Optional[str]:
+        """Active quest whose cached word set best overlaps the description, if it is similar enough"""
+        tokens = content_words(description)
+        shared: Dict[str, int] = {}
+        for token in tokens:
+            for quest_id in self.token_index.get(token, ()):
+                shared[quest_id] = shared.get(quest_id, 0) + 1
+        
+        best_id, best_score = None, 0.0
+        for quest_id, count in shared.items():
+            if count < 2:
+                continue
+            score = count / min(len(tokens), len(self.quest_tokens[quest_id]))
+            if score >= self.duplicate_similarity and score > best_score:
+                best_id, best_score = quest_id, score
+        return best_id
+    
+    def _merge_into(self, quest_id: str, description: str, task_keywords: Set[str], turn: int):
+        quest = self.quests[quest_id]
+        known_words = self.quest_tokens[quest_id] | content_words(" ".join(obj["description"] for obj in quest.objectives))
+        new_tasks = {keyword for keyword in task_keywords if keyword not in TASK_NOUNS and keyword not in known_words}
+        if new_tasks:
+            quest.add_objective(description)
+        else:
+            quest.add_note(f"Mentioned again: {description}", turn)
+    
+    def auto_detect_progress(
+        self,
+        text: str,
+        turn: int,
+        text_lower: Optional[str] = None,
+        hits: Optional[KeywordHits] = None
+    ):
+        """Automatically detect quest progress from narrative text (hits: a keyword scan of text)
+
+        Candidate quests come from the inverted index, so the cost follows the
+        text's length rather than the number of quests.
+        """
+        if text_lower is None:
+            text_lower = text.lower()
+        if hits is None:
+            hits = keyword_matcher.scan(text)
+        
+        # Check for completion keywords
+        if not hits.has("quest_progress"):
+            return
+        explicit_completion = hits.has("quest_complete")
+        
+        # Count shared content words per active quest
+        overlap: Dict[str, int] = {}
+        for token in content_words(text_lower):
+            for quest_id in self.token_index.get(token, ()):
+                overlap[quest_id] = overlap.get(quest_id, 0) + 1
+        
+        for quest_id, shared in overlap.items():
+            if shared >= self.min_progress_overlap:  # Significant overlap
+                # Mark quest as potentially completed
+                self.quests[quest_id].add_note(f"Progress detected: {text[:100]}...", turn)
+                
+                # If explicit completion, mark as complete
+                if explicit_completion:
+                    self.complete_quest(quest_id, turn)
+    
+    def _index_quest(self, quest: Quest):
+        """Add an active quest to the inverted index"""
+        tokens = frozenset(content_words(quest.description))
+        self.quest_tokens[quest.quest_id] = tokens
+        for token in tokens:
+            self.token_index.setdefault(token, set()).add(quest.quest_id)
+    
+    def _unindex_quest(self, quest_id: str):
+        """Remove a quest that is no longer active from the inverted index"""
+        for token in self.quest_tokens.pop(quest_id, ()):
+            quest_ids = self.token_index.get(token)
+            if quest_ids is not None:
+                quest_ids.discard(quest_id)
+                if not quest_ids:
+                    del self.token_index[token]
+    
+    def _register(self, quest: Quest, status: QuestStatus):
+        """Make a new quest part of the log with the given status"""
+        quest.status = status
+        quest.on_change = self._invalidate_summary
+        self.quests[quest.quest_id] = quest
+        self.buckets[status][quest.quest_id] = quest
+        if status == QuestStatus.ACTIVE:
+            self._index_quest(quest)
+        self._invalidate_summary()
+    
+    def _set_status(self, quest: Quest, status: QuestStatus):
+        """Status transition: moves the quest to the end of its new bucket"""
+        self.buckets[quest.status].pop(quest.quest_id, None)
+        quest.status = status
+        self.buckets[status][quest.quest_id] = quest
+        self._invalidate_summary()
+    
+    def _invalidate_summary(self):
+        self._summary = None
+    
+    def _finish(self, quest_id: str):
+        """Bookkeeping for a quest that just completed or failed; archives the oldest finished quests"""
+        self._unindex_quest(quest_id)
+        self._finished_ids.append(quest_id)
+        while len(self._finished_ids) > self.max_finished_quests:
+            old_id = self._finished_ids.popleft()
+            self.archived_quests[old_id] = self.quests.pop(old_id)
+    
+    def _generate_quest_id(self) -> str:
+        """Generate unique quest ID"""
+        self.quest_counter += 1
+        return f"quest_{self.quest_counter}"
+    
+    def add_quest(
+        self, 
+        title: str, 
+        description: str, 
+        turn: int,
+        objectives: List[str] = None
+    ) -> str:
+        """Manually add a quest"""
+        quest_id = self._generate_quest_id()
+        
+        quest = Quest(
+            quest_id=quest_id,
+            title=title,
+            description=description
+        )
+        
+        quest.started_turn = turn
+        
+        if objectives:
+            for obj in objectives:
+                quest.add_objective(obj)
+        
+        self._register(quest, QuestStatus.ACTIVE)
+        
+        return quest_id
+    
+    def complete_quest(self, quest_id: str, turn: int):
+        """Mark a quest as completed"""
+        if quest_id in self.quests:
+            quest = self.quests[quest_id]
+            already_finished = quest.status in (QuestStatus.COMPLETED, QuestStatus.FAILED)
+            quest.completed_turn = turn
+            self._set_status(quest, QuestStatus.COMPLETED)
+            
+            # Mark all objectives as completed
+            for obj in quest.objectives:
+                obj["completed"] = True
+            
+            if not already_finished:
+                self._finish(quest_id)
+    
+    def fail_quest(self, quest_id: str, turn: int):
+        """Mark a quest as failed"""
+        if quest_id in self.quests:
+            quest = self.quests[quest_id]
+            already_finished = quest.status in (QuestStatus.COMPLETED, QuestStatus.FAILED)
+            quest.completed_turn = turn
+            self._set_status(quest, QuestStatus.FAILED)
+            if not already_finished:
+                self._finish(quest_id)
+    
+    def get_active_quests(self) -> List[Quest]:
+        """Get all active quests"""
+        return list(self.buckets[QuestStatus.ACTIVE].values())
+    
+    def get_completed_quests(self) -> List[Quest]:
+        """Get all completed quests, archived ones included, in completion order"""
+        return list(self.buckets[QuestStatus.COMPLETED].values())
+    
+    def get_quest_summary(self) -> str:
+        """Get formatted summary of all quests (cached until a quest changes)"""
+        if self._summary is None:
+            self._summary = self._render_summary()
+        return self._summary
+    
+    def _render_summary(self) -> str:
+        summary = "\n" + "="*50 + "\n"
+        summary += "📜 QUEST LOG\n"
+        summary += "="*50 + "\n"
+        
+        active = self.buckets[QuestStatus.ACTIVE].values()
+        completed = self.buckets[QuestStatus.COMPLETED]
+        
+        if active:
+            summary += "\n🔥 Active Quests:\n"
+            for quest in active:
+                summary += f"\n  • {quest.title}\n"
+                summary += f"    {quest.description}\n"
+                
+                if quest.objectives:
+                    summary += "    Objectives:\n"
+                    for i, obj in enumerate(quest.objectives):
+                        status = "✓" if obj["completed"] else "○"
+                        summary += f"      {status} {obj['description']}\n"
+        else:
+            summary += "\n  No active quests.\n"
+        
+        if completed:
+            summary += f"\n✅ Completed Quests ({len(completed)}):\n"
+            for quest in islice(reversed(completed.values()), 5):  # Show last 5 completed, newest first
+                summary += f"  • {quest.title}\n"
+        
+        summary += "\n" + "="*50 + "\n"
+        
+        return summary
+    
+    def export_state(self) -> Dict:
+        """JSON-serializable snapshot for session persistence"""
+        return {
+            "quest_counter": self.quest_counter,
+            "quests": [quest.to_dict() for quest in self.quests.values()],
+            "archived_quests": [quest.to_dict() for quest in self.archived_quests.values()]
+        }
+    
+    def load_state(self, state: Dict):
+        self.quest_counter = state.get("quest_counter", 0)
+        self.quests = {}
+        self.archived_quests = {}
+        self.buckets = {status: {} for status in QuestStatus}
+        self._finished_ids = deque()
+        self.token_index = {}
+        self.quest_tokens = {}
+        archived = [Quest.from_dict(data) for data in state.get("archived_quests", [])]
+        hot = [Quest.from_dict(data) for data in state.get("quests", [])]
+        
+        for quest in archived:
+            self.archived_quests[quest.quest_id] = quest
+        for quest in hot:
+            self.quests[quest.quest_id] = quest
+            if quest.status == QuestStatus.ACTIVE:
+                self._index_quest(quest)
+        for quest in archived + hot:
+            quest.on_change = self._invalidate_summary
+        
+        # Open quests keep their saved order; finished ones are ordered by completion turn
+        finished_statuses = (QuestStatus.COMPLETED, QuestStatus.FAILED)
+        finished = sorted(
+            (quest for quest in archived + hot if quest.status in finished_statuses),
+            key=lambda quest: quest.completed_turn or 0
+        )
+        for quest in [quest for quest in hot if quest.status not in finished_statuses] + finished:
+            self.buckets[quest.status][quest.quest_id] = quest
+        
+        # Saves from before archiving may hold every finished quest; trim them oldest first
+        for quest in finished:
+            if quest.quest_id in self.quests:
+                self._finish(quest.quest_id)
+        self._invalidate_summary()
+    
+    def process_turn(self, player_input: str, dm_response: str, turn: int, analysis=None):
+        """Process a turn for quest updates (analysis is the shared TurnAnalysis, if already computed)"""
+        if analysis is not None:
+            combined_text, combined_lower = analysis.combined_text, analysis.combined_lower
+            hits = analysis.keyword_hits
+        else:
+            combined_text = f"{player_input} {dm_response}"
+            combined_lower, hits = combined_text.lower(), keyword_matcher.scan(combined_text)
+        
+        # Try to detect new quests
+        new_quest_id = self.auto_detect_quest(dm_response, turn, hits=hits, offset=len(player_input) + 1)
+        
+        if new_quest_id:
+            print(f"  [Quest Log] New quest detected: {self.quests[new_quest_id].title}")
+        for quest_id in dict.fromkeys(self.last_merged):
+            print(f"  [Quest Log] Merged into existing quest: {self.quests[quest_id].title}")
+        
+        # Check for progress on existing quests
+        self.auto_detect_progress(combined_text, turn, text_lower=combined_lower, hits=hits)
\ No newline at end of file
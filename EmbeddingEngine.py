@@ -0,0 +1,58 @@
+"""
+Embedding Engine - Shared sentence embedding backend
+Wraps a single SentenceTransformer so every ChromaDB collection embeds with the same loaded model
+"""
+
+from typing import Dict, List, Optional
+import threading
+
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+from sentence_transformers import SentenceTransformer
+
+from PerfTracer import tracer
+
+
+DEFAULT_MODEL_NAME = "all-MiniLM-L6-v2"
+
+_engines: Dict[str, "EmbeddingEngine"] = {}
+_engines_lock = threading.Lock()
+
+
+class EmbeddingEngine(EmbeddingFunction):
+    """ChromaDB embedding function backed by one in-process SentenceTransformer"""
+
+    def __init__(self, model_name: str = DEFAULT_MODEL_NAME, batch_size: int = 64, model: Optional[SentenceTransformer] = None):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.model = model if model is not None else SentenceTransformer(model_name)
+        self.dimension = self.model.get_sentence_embedding_dimension()
+
+    def __call__(self, input: Documents) -> Embeddings:
+        return self.encode(list(input))
+
+    def encode(self, texts: List[str]) -> List[List[float]]:
+        """Encode a batch of texts into normalized embedding vectors"""
+        if not texts:
+            return []
+        with tracer.span("embed.encode", texts=len(texts)):
+            vectors = self.model.encode(
+                texts,
+                batch_size=self.batch_size,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False
+            )
+            return vectors.tolist()
+
+    def encode_one(self, text: str) -> List[float]:
+        return self.encode([text])[0]
+
+
+def get_embedding_engine(model_name: str = DEFAULT_MODEL_NAME) -> EmbeddingEngine:
+    """Return the process-wide engine for a model, loading it on first use"""
+    with _engines_lock:
+        engine = _engines.get(model_name)
+        if engine is None:
+            engine = EmbeddingEngine(model_name)
+            _engines[model_name] = engine
+        return engine
@@ -0,0 +1,240 @@
+"""
+Fake LLM Server - Local OpenAI-compatible stand-in for the Groq API
+Returns deterministic, length-controlled completions with a configurable delay,
+so benchmarks can drive the agents without a network or an API key. Error
+responses (e.g. 429s) and slow responses can be queued to exercise retry logic.
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+import hashlib
+import json
+import re
+import threading
+import time
+
+
+CANNED_SENTENCES = [
+    "You step into a torchlit hall where the air smells of old parchment and iron.",
+    "A hooded figure named Aldric watches you from beside the cold hearth.",
+    "Faded banners of the kingdom of Emberfall hang above a cracked stone dais.",
+    "Somewhere below, water drips steadily into a hidden cistern.",
+    "The wizard tells you the Heart of Emberfall was stolen three winters ago.",
+    "Aldric asks you to find the Heart of Emberfall and return it to the temple.",
+    "Your lantern flickers as a draft curls in from the northern corridor.",
+    "Scratches on the floor suggest something heavy was dragged toward the stairs.",
+    "A silver key glints among the rubble near your boots.",
+    "Distant chanting echoes from the catacombs beneath the Whispering Woods.",
+    "The merchant lowers his voice and warns you about the curse on the forest."
+]
+
+
+def canned_text(seed_text: str, words: int) -> str:
+    """Deterministic narrative of roughly `words` words, chosen by hashing the prompt"""
+    offset = int(hashlib.sha256(seed_text.encode()).hexdigest(), 16) % len(CANNED_SENTENCES)
+    sentences = []
+    count = 0
+    i = offset
+    while count < words:
+        sentence = CANNED_SENTENCES[i % len(CANNED_SENTENCES)]
+        sentences.append(sentence)
+        count += len(sentence.split())
+        i += 1
+    sentences.append("What do you do next?")
+    return " ".join(sentences)
+
+
+def lore_keeper_verdict(prompt: str) -> str:
+    """Compact JSON verdict for a Lore Keeper validation prompt; drops roughly one memory in four"""
+    if "Retrieved memories:" not in prompt:
+        return "CONSISTENT"
+    memories = prompt.split("Retrieved memories:", 1)[1].strip().split("\n\n", 1)[0]
+    keep = [
+        int(number)
+        for number, text in re.findall(r'^(\d+)\. (.*)$', memories, re.MULTILINE)
+        if int(hashlib.sha256(text.encode()).hexdigest(), 16) % 4
+    ]
+    return json.dumps({"keep": keep})
+
+
+class FakeLLMServer:
+    """Threaded HTTP server answering /chat/completions like an OpenAI-compatible provider"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.2, response_words: int = 120):
+        self.host = host
+        self.port = port
+        self.latency = latency                # Seconds of simulated generation per request
+        self.response_words = response_words  # Approximate length of every completion
+        self.request_count = 0
+        self.active_requests = 0
+        self.peak_concurrency = 0
+        self._faults: List[Dict] = []  # Consumed in order, one per incoming request
+        self._lock = threading.Lock()
+        self._httpd = None
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self) -> str:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                if not self.path.endswith("/chat/completions"):
+                    self.send_error(404)
+                    return
+                server._enter()
+                try:
+                    self._answer()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # The client gave up (timeout) before we answered
+                finally:
+                    server._leave()
+
+            def _answer(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                fault = server._next_fault()
+                if fault and fault.get("delay"):
+                    time.sleep(fault["delay"])
+                if fault and fault.get("status"):
+                    data = json.dumps({"error": {"message": "injected failure", "type": "injected"}}).encode()
+                    self.send_response(fault["status"])
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    if fault.get("retry_after") is not None:
+                        self.send_header("Retry-After", str(fault["retry_after"]))
+                    self.end_headers()
+                    self.wfile.write(data)
+                    return
+                if payload.get("stream"):
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/event-stream")
+                    self.end_headers()
+                    for event in server.stream(payload, stall=fault if fault and fault.get("stall_after") is not None else None):
+                        self.wfile.write(f"data: {event}\n\n".encode())
+                        self.wfile.flush()
+                    return
+                body = server.complete(payload)
+                data = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self._httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def inject_errors(self, count: int, status: int = 429, retry_after: Optional[float] = None):
+        """Answer the next `count` requests with an error status (and optional Retry-After header)"""
+        with self._lock:
+            self._faults.extend({"status": status, "retry_after": retry_after} for _ in range(count))
+
+    def inject_delay(self, count: int, seconds: float):
+        """Stall the next `count` requests for `seconds` before answering normally"""
+        with self._lock:
+            self._faults.extend({"delay": seconds} for _ in range(count))
+
+    def inject_stream_stall(self, count: int, after_words: int, seconds: float):
+        """Stall the next `count` streamed responses for `seconds` once `after_words` words were sent"""
+        with self._lock:
+            self._faults.extend({"stall_after": after_words, "stall_seconds": seconds} for _ in range(count))
+
+    def _next_fault(self) -> Optional[Dict]:
+        with self._lock:
+            return self._faults.pop(0) if self._faults else None
+
+    def _enter(self):
+        with self._lock:
+            self.active_requests += 1
+            self.peak_concurrency = max(self.peak_concurrency, self.active_requests)
+
+    def _leave(self):
+        with self._lock:
+            self.active_requests -= 1
+
+    def _next_request_id(self) -> int:
+        with self._lock:
+            self.request_count += 1
+            return self.request_count
+
+    def _completion_text(self, payload: Dict) -> str:
+        messages: List[Dict] = payload.get("messages", [])
+        prompt = messages[-1]["content"] if messages else ""
+        if messages and "Lore Keeper" in messages[0]["content"]:
+            return lore_keeper_verdict(prompt)
+        max_tokens = payload.get("max_tokens") or 600
+        return canned_text(prompt, min(self.response_words, max_tokens))
+
+    def stream(self, payload: Dict, stall: Optional[Dict] = None):
+        """Yield SSE data payloads, one word per chunk, spreading the latency over the words"""
+        request_id = self._next_request_id()
+        words = self._completion_text(payload).split(" ")
+        delay = self.latency / max(len(words), 1)
+
+        def chunk(delta: Dict, finish_reason=None) -> str:
+            return json.dumps({
+                "id": f"chatcmpl-fake-{request_id}",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": payload.get("model", "fake"),
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+            })
+
+        for i, word in enumerate(words):
+            time.sleep(delay)
+            if stall and i == stall["stall_after"]:
+                time.sleep(stall["stall_seconds"])
+            yield chunk({"role": "assistant", "content": word if i == 0 else " " + word})
+        yield chunk({}, finish_reason="stop")
+        yield "[DONE]"
+
+    def complete(self, payload: Dict) -> Dict:
+        """Build a chat completion response for one request payload"""
+        request_id = self._next_request_id()
+        messages: List[Dict] = payload.get("messages", [])
+        text = self._completion_text(payload)
+
+        time.sleep(self.latency)
+
+        prompt_tokens = sum(len(m.get("content", "").split()) for m in messages)
+        completion_tokens = len(text.split())
+        return {
+            "id": f"chatcmpl-fake-{request_id}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        }
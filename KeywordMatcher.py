@@ -0,0 +1,148 @@
+"""
+Keyword Matcher - One pass over a turn's text for every keyword table
+Sentiment, importance, context-type and quest detection all look for short
+keyword lists in the same text. The tables are compiled into one regex; a scan
+records every hit with its position, and consumers query the result by
+category and character span instead of rescanning the text. Also home to the
+content-word tokenizer shared by the Lore Talker and the quest log.
+"""
+
+from bisect import bisect_left
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+import re
+
+
+KEYWORD_TABLES = {
+    "sentiment_positive": ["thank", "help", "gift", "friend", "save", "protect"],
+    "sentiment_negative": ["attack", "steal", "threaten", "betray", "lie", "harm"],
+    "importance_high": ["quest", "key", "artifact", "defeat", "victory", "death", "betray", "oath", "curse", "prophecy"],
+    "importance_medium": ["meet", "find", "give", "take", "learn", "discover", "receive"],
+    "context_lore": ["remember", "who was", "when", "recall", "what happened"],
+    "context_action": ["attack", "run", "danger", "fight", "escape", "hide"],
+    "quest_start": [
+        "quest", "mission", "task", "find", "retrieve", "rescue",
+        "defeat", "protect", "deliver", "investigate", "discover"
+    ],
+    "quest_progress": [
+        "completed", "finished", "done", "succeeded", "accomplished",
+        "delivered", "defeated", "rescued", "found"
+    ],
+    "quest_complete": ["quest complete", "mission accomplished"]
+}
+
+
+def trie_pattern(keywords: Iterable[str]) -> str:
+    """Regex alternation factored on shared prefixes, so each position is rejected after a character or two.
+
+    Optional tails are greedy, so the longest keyword at a position wins.
+    """
+    trie: Dict[str, Dict] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}  # End of a keyword
+
+    def render(node: Dict) -> str:
+        branches = [re.escape(char) + render(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return render(trie)
+
+
+WORD_PATTERN = re.compile(r"[a-z']+")
+STOPWORDS = {
+    "the", "and", "that", "this", "with", "from", "your", "you", "into", "onto", "there", "their",
+    "they", "them", "then", "than", "what", "when", "where", "which", "while", "about", "have",
+    "has", "had", "was", "were", "are", "for", "his", "her", "its", "our", "will", "would", "can",
+    "could", "some", "any", "all", "one", "out", "over", "under", "toward", "towards", "just"
+}
+
+
+def content_words(text: str) -> Set[str]:
+    """Lowercased words that carry meaning (no stopwords or very short words)"""
+    return {w for w in WORD_PATTERN.findall(text.lower()) if len(w) > 2 and w not in STOPWORDS}
+
+
+class KeywordHits:
+    """Keyword hits from one scan, ordered by start position"""
+
+    __slots__ = ("positions", "keywords", "categories")
+
+    def __init__(self, positions: List[int], keywords: List[str], categories: Dict[str, FrozenSet[str]]):
+        self.positions = positions
+        self.keywords = keywords
+        self.categories = categories  # keyword -> categories it belongs to
+
+    def _bounds(self, start: int, end: Optional[int]):
+        low = bisect_left(self.positions, start) if start else 0
+        high = len(self.positions) if end is None else bisect_left(self.positions, end)
+        return low, high
+
+    def found(self, category: str, start: int = 0, end: Optional[int] = None) -> Set[str]:
+        """Distinct keywords of category whose match starts in [start, end)"""
+        low, high = self._bounds(start, end)
+        return {keyword for keyword in self.keywords[low:high] if category in self.categories[keyword]}
+
+    def found_in_spans(self, category: str, spans: List[Tuple[int, int]]) -> List[Set[str]]:
+        """found() for every (start, end) of sorted, non-overlapping spans in one walk over the hits"""
+        results = [set() for _ in spans]
+        index = 0
+        for position, keyword in zip(self.positions, self.keywords):
+            while index < len(spans) and position >= spans[index][1]:
+                index += 1
+            if index == len(spans):
+                break
+            if position >= spans[index][0] and category in self.categories[keyword]:
+                results[index].add(keyword)
+        return results
+
+    def has(self, category: str, start: int = 0, end: Optional[int] = None) -> bool:
+        low, high = self._bounds(start, end)
+        return any(category in self.categories[keyword] for keyword in self.keywords[low:high])
+
+
+class KeywordMatcher:
+    """Compiled matcher over several keyword tables.
+
+    A keyword matches at the start of a word and may run on into it ("find"
+    matches "finding" but not "pathfinder"). The longest keyword at each word
+    start is matched inside a zero-width lookahead, so overlapping hits are
+    all found, and a hit also counts every shorter keyword it starts with
+    ("quest complete" counts "quest" too).
+    """
+
+    def __init__(self, tables: Dict[str, Iterable[str]]):
+        categories: Dict[str, Set[str]] = {}
+        for category, keywords in tables.items():
+            for keyword in keywords:
+                categories.setdefault(keyword.lower(), set()).add(category)
+        self.categories = {keyword: frozenset(names) for keyword, names in categories.items()}
+
+        source = r"\b(?=(" + trie_pattern(self.categories) + "))"
+        self.pattern = re.compile(source)
+        self.pattern_ignorecase = re.compile(source, re.IGNORECASE)
+        self.prefixes = {
+            keyword: [other for other in self.categories if keyword.startswith(other)]
+            for keyword in self.categories
+        }
+
+    def scan(self, text: str) -> KeywordHits:
+        lowered = text.lower()
+        if len(lowered) == len(text):
+            matches = self.pattern.finditer(lowered)
+        else:
+            # A few characters change length when lowercased; keep positions aligned with text
+            matches = self.pattern_ignorecase.finditer(text)
+        positions, keywords = [], []
+        for match in matches:
+            for keyword in self.prefixes[match.group(1).lower()]:
+                positions.append(match.start())
+                keywords.append(keyword)
+        return KeywordHits(positions, keywords, self.categories)
+
+
+keyword_matcher = KeywordMatcher(KEYWORD_TABLES)
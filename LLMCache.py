@@ -0,0 +1,108 @@
+"""
+LLM Cache - Content-addressed completion cache
+Identical (model, messages, temperature, max_tokens) requests are answered from an
+in-memory LRU tier, backed by an optional SQLite tier that survives restarts.
+High-temperature (creative) requests bypass the cache entirely.
+"""
+
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+
+class CompletionCache:
+    """Two-tier cache of chat completion texts with hit/miss accounting"""
+
+    def __init__(self, max_entries: int = 512, disk_path: Optional[str] = None, max_cacheable_temperature: float = 0.5):
+        self.max_entries = max_entries
+        self.max_cacheable_temperature = max_cacheable_temperature
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if disk_path:
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS completions (key TEXT PRIMARY KEY, response TEXT, created REAL)")
+            self._db.commit()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict], temperature: float, max_tokens: int) -> str:
+        payload = json.dumps(
+            {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens},
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+            if self._db is not None:
+                row = self._db.execute("SELECT response FROM completions WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self._remember(key, row[0])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return row[0]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, response: str):
+        with self._lock:
+            self._remember(key, response)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO completions (key, response, created) VALUES (?, ?, ?)",
+                    (key, response, time.time())
+                )
+                self._db.commit()
+
+    def _remember(self, key: str, response: str):
+        self._memory[key] = response
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get_or_create(
+        self,
+        model: str,
+        messages: List[Dict],
+        temperature: float,
+        max_tokens: int,
+        create: Callable[[], str]
+    ) -> str:
+        """Return a cached completion, or call create() and cache its result"""
+        if temperature > self.max_cacheable_temperature:
+            with self._lock:
+                self.bypassed += 1
+            return create()
+
+        key = self.make_key(model, messages, temperature, max_tokens)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        response = create()
+        self.put(key, response)
+        return response
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "entries": len(self._memory),
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
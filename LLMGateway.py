@@ -0,0 +1,274 @@
+"""
+LLM Gateway - One pooled, rate-limited, retrying Groq client shared by every agent
+Requests pass through a per-model concurrency semaphore and a token bucket, are
+retried with jittered backoff on 429/5xx/timeouts (honoring Retry-After), and
+never run past the deadline of the turn that issued them
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional
+import random
+import threading
+import time
+
+import groq
+import httpx
+from groq import Groq
+
+from LLMCache import CompletionCache
+from PerfTracer import tracer
+
+
+class LLMError(Exception):
+    """Base class for failures surfaced by the gateway"""
+
+
+class LLMUnavailable(LLMError):
+    """The request failed and retries (if allowed) were exhausted"""
+
+
+class LLMDeadlineExceeded(LLMError):
+    """The turn deadline passed before the request could complete"""
+
+
+RETRYABLE_ERRORS = (groq.RateLimitError, groq.InternalServerError, groq.APIConnectionError)
+
+# Absolute time.monotonic() deadline of the current turn; copied into asyncio.to_thread workers
+_turn_deadline: ContextVar[Optional[float]] = ContextVar("llm_turn_deadline", default=None)
+
+
+@contextmanager
+def turn_deadline(seconds: Optional[float]):
+    """Bound every gateway request made inside this block (and its to_thread workers)"""
+    if seconds is None:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    current = _turn_deadline.get()
+    token = _turn_deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _turn_deadline.reset(token)
+
+
+def remaining_time() -> Optional[float]:
+    deadline = _turn_deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` requests per second with bursts up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        give_up_at = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if give_up_at is not None and now + wait > give_up_at:
+                return False
+            time.sleep(wait)
+
+
+class LLMGateway:
+    """Shared entry point for chat completions (plain and streaming)"""
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        cache: Optional[CompletionCache] = None,
+        max_concurrency_per_model: int = 4,
+        requests_per_second: float = 10.0,
+        burst: int = 10,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        request_timeout: float = 30.0,
+        pool_size: int = 20
+    ):
+        # One keep-alive pool for every agent; retries are ours, so the SDK's are disabled
+        self.http_client = httpx.Client(
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        )
+        self.client = Groq(
+            api_key=api_key,
+            base_url=base_url,
+            max_retries=0,
+            timeout=request_timeout,
+            http_client=self.http_client
+        )
+        self.cache = cache
+        self.max_concurrency_per_model = max_concurrency_per_model
+        self.rate_limiter = TokenBucket(requests_per_second, burst)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.request_timeout = request_timeout
+
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+        self.stats = {
+            "requests": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "timeouts": 0,
+            "deadline_exceeded": 0,
+            "failures": 0
+        }
+        print("✓ LLM gateway initialized")
+
+    def complete(
+        self,
+        model: str,
+        messages: List[Dict],
+        temperature: float,
+        max_tokens: int,
+        on_usage: Optional[Callable] = None,
+        cacheable: bool = True
+    ) -> str:
+        """Completion text, from the cache when possible; on_usage receives the API usage of real calls
+
+        cacheable=False always asks the model and never stores the result (creative generation).
+        """
+        def create() -> str:
+            response = self._request(model, messages=messages, temperature=temperature, max_tokens=max_tokens)
+            if on_usage is not None and getattr(response, "usage", None) is not None:
+                on_usage(response.usage)
+            return response.choices[0].message.content.strip()
+
+        with tracer.span("llm.complete", model=model, max_tokens=max_tokens):
+            if self.cache is None or not cacheable:
+                return create()
+            return self.cache.get_or_create(model, messages, temperature, max_tokens, create)
+
+    def stream(self, model: str, messages: List[Dict], temperature: float, max_tokens: int) -> Iterator[str]:
+        """Yield text deltas; the request is retried only until the stream opens.
+
+        Errors after the stream opened are raised as LLMError. Close the generator
+        (or use contextlib.closing) when abandoning it early so the model slot and
+        connection are released right away rather than at garbage collection.
+        """
+        semaphore = self._semaphore(model)
+        self._acquire_slot(semaphore)
+        stream = None
+        try:
+            stream = self._send(model, dict(messages=messages, temperature=temperature, max_tokens=max_tokens, stream=True))
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except (httpx.HTTPError, groq.APIError) as e:
+            if isinstance(e, (httpx.TimeoutException, groq.APITimeoutError)):
+                self._count("timeouts")
+            remaining = remaining_time()
+            if remaining is not None and remaining <= 0:
+                self._count("deadline_exceeded")
+                raise LLMDeadlineExceeded(f"turn deadline reached mid-stream: {e}") from e
+            self._count("failures")
+            raise LLMUnavailable(f"{model} stream failed: {e}") from e
+        finally:
+            if stream is not None:
+                stream.close()
+            semaphore.release()
+
+    def _request(self, model: str, **kwargs):
+        semaphore = self._semaphore(model)
+        self._acquire_slot(semaphore)
+        try:
+            return self._send(model, kwargs)
+        finally:
+            semaphore.release()
+
+    def _send(self, model: str, kwargs: Dict):
+        attempt = 0
+        while True:
+            self._time_budget()  # Fails fast once the deadline has passed
+            if not self.rate_limiter.acquire(timeout=remaining_time()):
+                self._count("deadline_exceeded")
+                raise LLMDeadlineExceeded("turn deadline reached while waiting for the rate limiter")
+            self._count("requests")
+            try:
+                with tracer.span("llm.request", model=model, attempt=attempt, stream=bool(kwargs.get("stream"))):
+                    return self.client.chat.completions.create(model=model, timeout=self._time_budget(), **kwargs)
+            except RETRYABLE_ERRORS as e:
+                if isinstance(e, groq.RateLimitError):
+                    self._count("rate_limited")
+                if isinstance(e, groq.APITimeoutError):
+                    self._count("timeouts")
+                remaining = remaining_time()
+                if remaining is not None and remaining <= 0:
+                    self._count("deadline_exceeded")
+                    raise LLMDeadlineExceeded(f"turn deadline reached after {attempt + 1} attempts: {e}") from e
+                if attempt >= self.max_retries:
+                    self._count("failures")
+                    raise LLMUnavailable(f"{model} unavailable after {attempt + 1} attempts: {e}") from e
+                delay = self._backoff(attempt, e)
+                if remaining is not None and delay >= remaining:
+                    self._count("deadline_exceeded")
+                    raise LLMDeadlineExceeded(f"turn deadline reached after {attempt + 1} attempts: {e}") from e
+                self._count("retries")
+                attempt += 1
+                time.sleep(delay)
+            except groq.APIError as e:
+                self._count("failures")
+                raise LLMUnavailable(f"{model} request failed: {e}") from e
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        """Full-jitter exponential backoff, never shorter than the server's Retry-After"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        response = getattr(error, "response", None)
+        if response is not None:
+            try:
+                delay = max(delay, float(response.headers.get("retry-after", 0)))
+            except ValueError:
+                pass
+        return delay
+
+    def _time_budget(self) -> float:
+        remaining = remaining_time()
+        if remaining is None:
+            return self.request_timeout
+        if remaining <= 0:
+            self._count("deadline_exceeded")
+            raise LLMDeadlineExceeded("turn deadline already passed")
+        return min(self.request_timeout, remaining)
+
+    def _semaphore(self, model: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if model not in self._semaphores:
+                self._semaphores[model] = threading.BoundedSemaphore(self.max_concurrency_per_model)
+            return self._semaphores[model]
+
+    def _acquire_slot(self, semaphore: threading.BoundedSemaphore):
+        remaining = remaining_time()
+        if (remaining is not None and remaining <= 0) or not semaphore.acquire(timeout=remaining):
+            self._count("deadline_exceeded")
+            raise LLMDeadlineExceeded("turn deadline reached while waiting for a model slot")
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+        if self.cache is not None:
+            stats["cache"] = self.cache.get_stats()
+        return stats
+
+    def close(self):
+        self.http_client.close()
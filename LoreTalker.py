@@ -1,144 +1,274 @@
-"""
-Lore Talker Agent - Consistency verification and context validation
-"""
-
-from groq import Groq
-from typing import List, Dict
-
-
-class LoreTalker:
-    """Lore Talker agent for maintaining narrative consistency"""
-    
-    def __init__(self, api_key: str):
-        self.client = Groq(api_key=api_key)
-        self.model = "llama-3.1-8b-instant"
-        
-        self.system_prompt = """You are the Lore Keeper, responsible for maintaining consistency in the story world. Your tasks:
-
-1. Review retrieved memories and player input
-2. Identify potential contradictions or inconsistencies
-3. Filter out irrelevant or conflicting information
-4. Ensure logical continuity in the narrative
-5. Validate that facts align with established lore
-
-You should:
-- Be strict about factual accuracy
-- Flag any contradictions
-- Only pass through validated, relevant context
-- Add clarifying notes when needed
-- Ensure character and world consistency"""
-        
-        print("✓ Lore Talker agent initialized")
-    
-    def validate_context(
-        self, 
-        player_input: str,
-        retrieved_memories: List[Dict]
-    ) -> List[Dict]:
-        """Validate and filter retrieved memories for consistency"""
-        
-        if not retrieved_memories:
-            return []
-        
-        # Build memory string
-        memories_str = "\n".join([
-            f"{i+1}. {mem['text']} (score: {mem['score']:.2f})"
-            for i, mem in enumerate(retrieved_memories)
-        ])
-        
-        prompt = f"""Player action: {player_input}
-
-Retrieved memories:
-{memories_str}
-
-Task: Review these memories for relevance and consistency. Return only the memories that are:
-1. Relevant to the current player action
-2. Consistent with each other
-3. Important for maintaining narrative continuity
-
-Format your response as a numbered list of the memories to keep (by number), with a brief reason. If all are valid, say "All memories validated." If contradictions exist, explain them.
-
-Response:"""
-        
-        messages = [
-            {"role": "system", "content": self.system_prompt},
-            {"role": "user", "content": prompt}
-        ]
-        
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=0.3,  # Low temperature for consistency checking
-                max_tokens=300
-            )
-            
-            validation_result = response.choices[0].message.content.strip()
-            
-            # Parse response to filter memories
-            # If "All memories validated" or similar, keep all
-            if "all" in validation_result.lower() and "validated" in validation_result.lower():
-                return retrieved_memories
-            
-            # Otherwise, try to extract which memories to keep
-            # Simple heuristic: look for numbers mentioned
-            validated_memories = []
-            for mem in retrieved_memories:
-                # Keep high-scoring memories by default
-                if mem['score'] > 0.7:
-                    validated_memories.append(mem)
-            
-            # If we filtered too aggressively, keep at least top 3
-            if len(validated_memories) < 3 and len(retrieved_memories) >= 3:
-                validated_memories = retrieved_memories[:3]
-            
-            return validated_memories if validated_memories else retrieved_memories[:3]
-            
-        except Exception as e:
-            print(f"Warning: Lore validation error: {e}")
-            # Fallback: return top scoring memories
-            return retrieved_memories[:3]
-    
-    def check_consistency(self, text: str, established_facts: List[str]) -> Dict:
-        """Check if new text is consistent with established facts"""
-        
-        facts_str = "\n".join([f"- {fact}" for fact in established_facts])
-        
-        prompt = f"""Established facts:
-{facts_str}
-
-New narrative:
-{text}
-
-Check if the new narrative contradicts any established facts. Respond with:
-- "CONSISTENT" if no contradictions
-- "INCONSISTENT: [explanation]" if contradictions exist
-
-Response:"""
-        
-        messages = [
-            {"role": "system", "content": self.system_prompt},
-            {"role": "user", "content": prompt}
-        ]
-        
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=0.2,
-                max_tokens=150
-            )
-            
-            result = response.choices[0].message.content.strip()
-            
-            return {
-                "consistent": "consistent" in result.lower(),
-                "explanation": result
-            }
-            
-        except Exception as e:
-            print(f"Warning: Consistency check error: {e}")
-            return {
-                "consistent": True,
-                "explanation": "Unable to verify (defaulting to consistent)"
-            }
\ No newline at end of file
+"""
+Lore Talker Agent - Consistency verification and context validation
+"""
+
+from typing import List, Dict, Optional
+import json
+import re
+
+from KeywordMatcher import WORD_PATTERN, content_words
+from LLMGateway import LLMError, LLMGateway
+
+
+NEGATION_WORDS = {"not", "no", "never", "none", "nobody", "nothing", "nowhere", "cannot", "without"}
+
+
+def is_negated(text: str) -> bool:
+    words = WORD_PATTERN.findall(text.lower())
+    return any(w in NEGATION_WORDS or w.endswith("n't") for w in words)
+
+
+def parse_keep_indices(text: str, count: int) -> Optional[List[int]]:
+    """1-based memory numbers from a {"keep": [...]} verdict; None if the answer can't be read"""
+    indices = None
+    match = re.search(r'\{.*\}', text, re.DOTALL)
+    if match:
+        try:
+            keep = json.loads(match.group(0)).get("keep")
+            if isinstance(keep, list):
+                indices = [int(i) for i in keep if isinstance(i, (int, float, str)) and str(i).strip().isdigit()]
+        except (ValueError, AttributeError):
+            pass
+    if indices is None:
+        # Truncated or chatty output: read the numbers after the first '[' (closing bracket optional)
+        match = re.search(r'\[([\d,\s]*)', text)
+        if match:
+            indices = [int(i) for i in re.findall(r'\d+', match.group(1))]
+    if indices is None:
+        return None
+    return list(dict.fromkeys(i for i in indices if 1 <= i <= count))
+
+
+class LoreTalker:
+    """Lore Talker agent for maintaining narrative consistency"""
+    
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        gateway: Optional[LLMGateway] = None,
+        embedding_engine=None
+    ):
+        self.gateway = gateway or LLMGateway(api_key, base_url=base_url)
+        self.embedding_engine = embedding_engine
+        
+        # Local pass: memories above accept_score are kept, below reject_score dropped;
+        # anything in between needs word overlap with the player input to be kept locally
+        self.fast_path = True
+        self.accept_score = 0.75
+        self.reject_score = 0.45
+        self.contradiction_similarity = 0.8
+        # Share of a memory's content words a draft must echo to count as built on it
+        self.reliance_overlap = 0.5
+        self.stats = {"validations": 0, "local": 0, "llm": 0, "unparsed": 0}
+        
+        # Token usage of the calls that actually reached the model (cache hits cost nothing)
+        self.verdict_max_tokens = 40
+        self.token_usage = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+        self.last_call_usage: Optional[Dict] = None
+        self.model = "llama-3.1-8b-instant"
+        
+        self.system_prompt = """You are the Lore Keeper, responsible for maintaining consistency in the story world. Your tasks:
+
+1. Review retrieved memories and player input
+2. Identify potential contradictions or inconsistencies
+3. Filter out irrelevant or conflicting information
+4. Ensure logical continuity in the narrative
+5. Validate that facts align with established lore
+
+You should:
+- Be strict about factual accuracy
+- Flag any contradictions
+- Only pass through validated, relevant context
+- Add clarifying notes when needed
+- Ensure character and world consistency"""
+        
+        print("✓ Lore Talker agent initialized")
+    
+    def validate_context(
+        self, 
+        player_input: str,
+        retrieved_memories: List[Dict]
+    ) -> List[Dict]:
+        """Validate and filter retrieved memories for consistency"""
+        
+        if not retrieved_memories:
+            return []
+        
+        self.stats["validations"] += 1
+        if self.fast_path:
+            verdict = self.local_validate(player_input, retrieved_memories)
+            if not verdict["ambiguous"]:
+                self.stats["local"] += 1
+                return verdict["keep"]
+        self.stats["llm"] += 1
+        
+        # Build memory string
+        memories_str = "\n".join([
+            f"{i+1}. {mem['text']} (score: {mem['score']:.2f})"
+            for i, mem in enumerate(retrieved_memories)
+        ])
+        count = len(retrieved_memories)
+        
+        prompt = f"""Player action: {player_input}
+
+Retrieved memories:
+{memories_str}
+
+Task: Review these memories for relevance and consistency. Return only the memories that are:
+1. Relevant to the current player action
+2. Consistent with each other
+3. Important for maintaining narrative continuity
+
+Respond with JSON only, no explanation: {{"keep": [numbers of the memories to keep]}}
+Example: {{"keep": [1, 3]}}. Use {{"keep": []}} if none should be kept.
+
+Response:"""
+        
+        messages = [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": prompt}
+        ]
+        
+        try:
+            # Low temperature for consistency checking
+            validation_result = self._complete(messages, temperature=0.3, max_tokens=self.verdict_max_tokens)
+            
+            indices = parse_keep_indices(validation_result, count)
+            if indices is not None:
+                return [retrieved_memories[i - 1] for i in sorted(indices)]
+            
+            # Unreadable verdict: keep high-scoring memories
+            self.stats["unparsed"] += 1
+            validated_memories = []
+            for mem in retrieved_memories:
+                # Keep high-scoring memories by default
+                if mem['score'] > 0.7:
+                    validated_memories.append(mem)
+            
+            # If we filtered too aggressively, keep at least top 3
+            if len(validated_memories) < 3 and len(retrieved_memories) >= 3:
+                validated_memories = retrieved_memories[:3]
+            
+            return validated_memories if validated_memories else retrieved_memories[:3]
+            
+        except LLMError as e:
+            print(f"Warning: Lore validation error: {e}")
+            # Fallback: return top scoring memories
+            return retrieved_memories[:3]
+    
+    def local_validate(self, player_input: str, retrieved_memories: List[Dict]) -> Dict:
+        """Deterministic consistency pass; 'ambiguous' means the LLM has to decide"""
+        input_words = content_words(player_input)
+        keep, reasons = [], []
+        ambiguous = False
+        
+        for mem in retrieved_memories:
+            if mem['score'] >= self.accept_score:
+                keep.append(mem)
+            elif mem['score'] < self.reject_score:
+                continue
+            elif input_words & content_words(mem['text']):
+                keep.append(mem)
+            else:
+                ambiguous = True
+                reasons.append(f"uncertain relevance: {mem['text'][:40]}")
+        
+        # Near-duplicate memories where only one side is negated are likely contradictions
+        for i, j in self._contradicting_pairs(keep):
+            ambiguous = True
+            reasons.append(f"possible contradiction: {keep[i]['text'][:40]} / {keep[j]['text'][:40]}")
+        
+        return {"keep": keep, "ambiguous": ambiguous, "reasons": reasons}
+    
+    def _contradicting_pairs(self, memories: List[Dict]) -> List[tuple]:
+        negated = [is_negated(mem['text']) for mem in memories]
+        if len(set(negated)) < 2:
+            return []
+        
+        texts = [mem['text'] for mem in memories]
+        if self.embedding_engine is not None:
+            vectors = self.embedding_engine.encode(texts)
+            def similarity(i: int, j: int) -> float:
+                return sum(a * b for a, b in zip(vectors[i], vectors[j]))
+        else:
+            words = [content_words(text) - NEGATION_WORDS for text in texts]
+            def similarity(i: int, j: int) -> float:
+                union = words[i] | words[j]
+                return len(words[i] & words[j]) / len(union) if union else 0.0
+        
+        return [
+            (i, j)
+            for i in range(len(memories))
+            for j in range(i + 1, len(memories))
+            if negated[i] != negated[j] and similarity(i, j) >= self.contradiction_similarity
+        ]
+    
+    def draft_relies_on(self, draft: str, memories: List[Dict]) -> bool:
+        """True if the draft echoes enough of any of these memories to have been built on it"""
+        draft_words = content_words(draft)
+        for mem in memories:
+            words = content_words(mem['text']) - NEGATION_WORDS
+            if words and len(words & draft_words) / len(words) >= self.reliance_overlap:
+                return True
+        return False
+    
+    def get_stats(self) -> Dict:
+        validations = self.stats["validations"]
+        calls = self.token_usage["calls"]
+        return {
+            **self.stats,
+            "skip_rate": self.stats["local"] / validations if validations else 0.0,
+            "token_usage": dict(self.token_usage),
+            "avg_completion_tokens": self.token_usage["completion_tokens"] / calls if calls else 0.0,
+            "last_call_usage": self.last_call_usage
+        }
+    
+    def check_consistency(self, text: str, established_facts: List[str]) -> Dict:
+        """Check if new text is consistent with established facts"""
+        
+        facts_str = "\n".join([f"- {fact}" for fact in established_facts])
+        
+        prompt = f"""Established facts:
+{facts_str}
+
+New narrative:
+{text}
+
+Check if the new narrative contradicts any established facts. Respond with:
+- "CONSISTENT" if no contradictions
+- "INCONSISTENT: [explanation]" if contradictions exist
+
+Response:"""
+        
+        messages = [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": prompt}
+        ]
+        
+        try:
+            result = self._complete(messages, temperature=0.2, max_tokens=150)
+            
+            return {
+                "consistent": "consistent" in result.lower(),
+                "explanation": result
+            }
+            
+        except LLMError as e:
+            print(f"Warning: Consistency check error: {e}")
+            return {
+                "consistent": True,
+                "explanation": "Unable to verify (defaulting to consistent)"
+            }
+    
+    def _complete(self, messages: List[Dict], temperature: float, max_tokens: int) -> str:
+        return self.gateway.complete(self.model, messages, temperature, max_tokens, on_usage=self._record_usage)
+    
+    def _record_usage(self, usage):
+        self.last_call_usage = {
+            "prompt_tokens": usage.prompt_tokens or 0,
+            "completion_tokens": usage.completion_tokens or 0
+        }
+        self.token_usage["calls"] += 1
+        self.token_usage["prompt_tokens"] += self.last_call_usage["prompt_tokens"]
+        self.token_usage["completion_tokens"] += self.last_call_usage["completion_tokens"]
\ No newline at end of file
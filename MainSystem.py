@@ -1,245 +1,681 @@
-"""
-AI Dungeon Master - Memory-Driven Multi-Agent Storytelling System
-Main orchestration module
-"""
-
-import os
-from typing import Dict, List, Optional
-from datetime import datetime
-import re # Import the re module
-
-class DungeonMasterOrchestrator:
-    """Main orchestrator for the AI Dungeon Master system"""
-
-    def __init__(self, groq_api_key: str, enable_bonus_features: bool = True):
-        self.groq_api_key = groq_api_key
-        self.memory_manager = None
-        self.dungeon_master = None
-        self.lore_talker = None
-        self.npc_manager = None
-        self.quest_log = None
-        self.enable_bonus_features = enable_bonus_features
-        self.turn_count = 0
-        self.conversation_history = []
-        self.displayed_memories_ids = set()
-        self.debug_mode = True
-        self.is_running = True
-
-    def initialize_agents(self):
-        from MemoryAgent import MemoryManager
-        from DungeonMaster import DungeonMaster
-        from LoreTalker import LoreTalker
-
-        self.memory_manager = MemoryManager()
-        self.dungeon_master = DungeonMaster(self.groq_api_key)
-        self.lore_talker = LoreTalker(self.groq_api_key)
-
-        if self.enable_bonus_features:
-            from NPCPersonalityManager import NPCPersonalityManager
-            from DynamicQuestLog import DynamicQuestLog
-
-            self.npc_manager = NPCPersonalityManager()
-            self.quest_log = DynamicQuestLog()
-            print("✓ Bonus features enabled (NPC Evolution + Quest Log)")
-
-        print("✓ All agents initialized successfully")
-
-    def detect_context_type(self, player_input: str) -> str:
-        """Detect the type of context from player input"""
-        lore_keywords = ["remember", "who was", "when", "recall", "what happened"]
-        action_keywords = ["attack", "run", "danger", "fight", "escape", "hide"]
-
-        input_lower = player_input.lower()
-
-        if any(keyword in input_lower for keyword in lore_keywords):
-            return "lore"
-        elif any(keyword in input_lower for keyword in action_keywords):
-            return "action"
-        else:
-            return "normal"
-
-    def get_temperature(self, context_type: str) -> float:
-        """Dynamic temperature control based on context"""
-        temperature_map = {
-            "lore": 0.3,
-            "normal": 0.7,
-            "action": 1.0
-        }
-        return temperature_map.get(context_type, 0.7)
-
-    def process_turn(self, player_input: str) -> str:
-        """Process a single turn of gameplay"""
-        if not self.is_running:
-            return ""
-        self.turn_count += 1
-        print(f"\n-- Turn {self.turn_count} --")
-        print(f"Player input: {player_input}")
-
-        # Step 1: Memory Manager retrieves relevant context
-        print("[Memory Manager] Retrieving relevant memories...")
-        retrieved_memories = self.memory_manager.retrieve_memories(
-            player_input,
-            top_k=5
-        )
-        print(f"Retrieved {len(retrieved_memories)} memories")
-
-        # Step 2: Lore Talker validates consistency
-        print("[Lore Talker] Validating context consistency...")
-        validated_context = self.lore_talker.validate_context(
-            player_input,
-            retrieved_memories
-        )
-
-        # Step 3: Detect context and set temperature
-        context_type = self.detect_context_type(player_input)
-        temperature = self.get_temperature(context_type)
-        print(f"[Context] Type: {context_type}, Temperature: {temperature}")
-
-        # Step 4: Dungeon Master generates response
-        print("[Dungeon Master] Generating narrative...")
-        dm_response = self.dungeon_master.generate_response(
-            player_input,
-            validated_context,
-            self.conversation_history[-10:],  # Last 10 turns
-            temperature=temperature
-        )
-        print(f"DM response (first 100 chars): {dm_response[:100]}...")
-
-        # Step 5: Extract and store new memories
-        print("[Memory Manager] Extracting and storing new facts...")
-        self.memory_manager.extract_and_store(
-            player_input,
-            dm_response,
-            self.turn_count
-        )
-        if hasattr(self.memory_manager, 'maybe_summarize_memory'):
-          self.memory_manager.maybe_summarize_memory(self.turn_count)
-
-        # Bonus: Update NPC personalities and quest log
-        if self.enable_bonus_features and self.npc_manager and self.quest_log:
-            entities = self.memory_manager._extract_entities(dm_response)
-            for npc in entities["npcs"]:
-                self.npc_manager.update_npc_personality(npc, player_input, dm_response)
-                print(f"[NPC Manager] Updated personality for NPC '{npc}'")
-            self.quest_log.process_turn(player_input, dm_response, self.turn_count)
-            print("[Quest Log] Updated quests")
-
-        # self.memory_manager.maybe_summarize_memory(self.turn_count)
-        # Update conversation history
-        self.conversation_history.append({
-            "turn": self.turn_count,
-            "player": player_input,
-            "dm": dm_response,
-            "timestamp": datetime.now().isoformat()
-        })
-
-
-
-        # Display debug info
-        if self.debug_mode:
-            self.display_debug_info()
-
-        return dm_response
-
-    def display_debug_info(self):
-        print("\n" + "="*60)
-        print("SMART DEBUG CONSOLE")
-        print("="*60)
-
-        stats = self.memory_manager.get_stats()
-        print(f"\n📊 Memory Stats:")
-        print(f"  Total Memories: {stats['total_memories']}")
-        print(f"  NPC Collections: {stats['npc_collections']}")
-        print(f"  Location Collections: {stats['location_collections']}")
-        print(f"  Short-term turns: {min(self.turn_count, 5)}/5")
-
-        recent_memories = self.memory_manager.get_recent_memories(10)
-        # Assuming get_recent_memories provides 'id' or 'text' for tracking
-        new_memories = [mem for mem in recent_memories if mem.get('id', mem.get('text')) not in self.displayed_memories_ids]
-
-        if new_memories:
-            print(f"\n🔍 New memories added:")
-            for mem in new_memories:
-                preview = mem['text'][:60]
-                print(f"  • {preview}... [importance: {mem['importance']:.2f}]")
-                # Track displayed to avoid repeats
-                self.displayed_memories_ids.add(mem.get('id', mem.get('text')))
-        else:
-            print("\n🔍 No new memories since last check.")
-
-        if self.enable_bonus_features and self.npc_manager:
-            npcs = self.npc_manager.get_all_npcs()
-            if npcs:
-                print(f"\n👥 NPC Status:")
-                for npc in npcs[:3]:  # Show top 3 NPCs
-                    desc = self.npc_manager.get_personality_description(npc)
-                    print(f"  • {desc}")
-
-        print("="*60 + "\n")
-
-    def start_game(self):
-        """Start the game loop"""
-        print("\n" + "="*60)
-        print("🎲 AI DUNGEON MASTER - Interactive Storytelling")
-        print("="*60)
-        print("\nCommands:")
-        print("  'quit' - Exit game")
-        print("  'debug' - Toggle debug mode")
-        if self.enable_bonus_features:
-            print("  'quests' - View quest log")
-            print("  'npcs' - View NPC relationships")
-        print("\nThe adventure begins...\n")
-
-        # Initial narration
-        initial_prompt = "Start an exciting fantasy adventure. Introduce the setting and present the player with an initial situation."
-        opening = self.dungeon_master.generate_opening(initial_prompt)
-        print(f"DM: {opening}\n")
-
-        # Store opening in memory
-        self.memory_manager.extract_and_store("", opening, turn_number=0)
-
-        while self.is_running:
-            try:
-                player_input = input("You: ").strip()
-
-                if not player_input:
-                    continue
-
-                if player_input.lower() == 'quit':
-                    print("\nThanks for playing! The adventure continues in your imagination...")
-                    break
-
-                if player_input.lower() == 'debug':
-                    self.display_debug_info()
-                    continue
-
-                # Process the turn
-                response = self.process_turn(player_input)
-                print(f"\nDM: {response}\n")
-
-            except KeyboardInterrupt:
-                print("\n\nGame interrupted. Saving progress...")
-                break
-            except Exception as e:
-                print(f"\nError: {str(e)}")
-                print("The Dungeon Master stumbles momentarily but recovers...\n")
-
-
-def main():
-    """Main entry point"""
-    # Get API key from environment or user input
-    groq_api_key = os.getenv("GROQ_API_KEY")
-
-    if not groq_api_key:
-        print("Please enter your Groq API key:")
-        groq_api_key = input().strip()
-
-    # Initialize and start the game
-    orchestrator = DungeonMasterOrchestrator(groq_api_key)
-    orchestrator.initialize_agents()
-    orchestrator.start_game()
-
-
-
-if __name__ == "__main__":
+"""
+AI Dungeon Master - Memory-Driven Multi-Agent Storytelling System
+Main orchestration module
+"""
+
+import asyncio
+import contextvars
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from typing import Dict, List, Optional
+from datetime import datetime
+import re # Import the re module
+
+from ConversationHistory import ConversationHistory
+from KeywordMatcher import keyword_matcher
+from LLMGateway import turn_deadline
+from PerfTracer import tracer
+
+class DungeonMasterOrchestrator:
+    """Main orchestrator for the AI Dungeon Master system"""
+
+    def __init__(
+        self,
+        groq_api_key: str,
+        enable_bonus_features: bool = True,
+        async_pipeline: bool = False,
+        stream_output: bool = False,
+        llm_base_url: Optional[str] = None,
+        memory_storage_mode: str = "collections",
+        persist_directory: Optional[str] = None,
+        session_id: Optional[str] = None,
+        speculative_validation: bool = False,
+        turn_deadline: Optional[float] = 60.0
+    ):
+        self.groq_api_key = groq_api_key
+        self.llm_base_url = llm_base_url
+        self.memory_storage_mode = memory_storage_mode
+        self.persist_directory = persist_directory
+        self.session_id = session_id or ("default" if persist_directory else None)
+        self.session_store = None
+        self.resumed_session = False
+        self.memory_manager = None
+        self.dungeon_master = None
+        self.lore_talker = None
+        self.llm_gateway = None
+        self.turn_deadline = turn_deadline  # Seconds every LLM call of one turn must finish within
+        self.npc_manager = None
+        self.quest_log = None
+        self.enable_bonus_features = enable_bonus_features
+        self.turn_count = 0
+        # Last turns verbatim plus a rolling summary of older ones (summarizer wired in initialize_agents)
+        self.conversation_history = ConversationHistory()
+        self.displayed_memories_ids = set()
+        self.debug_mode = True
+        self.is_running = True
+        self.async_pipeline = async_pipeline
+        self.stream_output = stream_output
+        self.stream_metrics = {}
+        self._commit_task: Optional[asyncio.Task] = None
+        # Speculative mode drafts the DM response on the raw memories while the Lore Talker validates them
+        self.speculative_validation = speculative_validation
+        self.speculation_stats = {"turns": 0, "accepted": 0, "regenerated": 0, "saved_seconds": 0.0, "last_saved": None}
+        self._speculation_executor = ThreadPoolExecutor(max_workers=1) if speculative_validation else None
+
+    def initialize_agents(self, shared=None):
+        """Create the agents; pass DungeonServer.SharedResources to reuse process-wide models and clients"""
+        from MemoryAgent import MemoryManager
+        from DungeonMaster import DungeonMaster
+        from LoreTalker import LoreTalker
+        from LLMCache import CompletionCache
+        from LLMGateway import LLMGateway
+
+        if shared:
+            self.llm_gateway = shared.llm_gateway
+        else:
+            disk_path = os.path.join(self.persist_directory, "llm_cache.sqlite3") if self.persist_directory else None
+            self.llm_gateway = LLMGateway(self.groq_api_key, base_url=self.llm_base_url, cache=CompletionCache(disk_path=disk_path))
+        self.dungeon_master = DungeonMaster(self.groq_api_key, gateway=self.llm_gateway)
+        self.conversation_history.summarize = self.dungeon_master.summarize_events
+        self.memory_manager = MemoryManager(
+            dungeon_master=self.dungeon_master,
+            storage_mode=self.memory_storage_mode,
+            persist_directory=self.persist_directory,
+            session_id=self.session_id,
+            embedding_engine=shared.embedding_engine if shared else None,
+            analyzer=shared.analyzer if shared else None,
+            client=shared.chroma_client if shared else None
+        )
+        self.lore_talker = LoreTalker(
+            self.groq_api_key,
+            gateway=self.llm_gateway,
+            embedding_engine=self.memory_manager.embedding_engine
+        )
+
+        if self.enable_bonus_features:
+            from NPCPersonalityManager import NPCPersonalityManager
+            from DynamicQuestLog import DynamicQuestLog
+
+            self.npc_manager = NPCPersonalityManager()
+            self.quest_log = DynamicQuestLog()
+            print("✓ Bonus features enabled (NPC Evolution + Quest Log)")
+
+        if self.persist_directory:
+            from SessionStore import SessionStore
+
+            self.session_store = SessionStore(self.persist_directory)
+            self.resumed_session = self.load_session()
+
+        print("✓ All agents initialized successfully")
+
+    def detect_context_type(self, player_input: str) -> str:
+        """Detect the type of context from player input"""
+        hits = keyword_matcher.scan(player_input)
+
+        if hits.has("context_lore"):
+            return "lore"
+        elif hits.has("context_action"):
+            return "action"
+        else:
+            return "normal"
+
+    def get_temperature(self, context_type: str) -> float:
+        """Dynamic temperature control based on context"""
+        temperature_map = {
+            "lore": 0.3,
+            "normal": 0.7,
+            "action": 1.0
+        }
+        return temperature_map.get(context_type, 0.7)
+
+    def process_turn(self, player_input: str) -> str:
+        """Process a single turn of gameplay"""
+        if not self.is_running:
+            return ""
+        turn_number = self._begin_turn(player_input)
+
+        with tracer.span("turn", turn=turn_number):
+            dm_response = self._respond(player_input)
+            self._record_history(player_input, dm_response, turn_number)
+            self._commit_turn(player_input, dm_response, turn_number)
+
+        # Display debug info
+        if self.debug_mode:
+            self.display_debug_info()
+
+        return dm_response
+
+    def process_turn_streaming(self, player_input: str, on_chunk=None) -> str:
+        """Process a turn while streaming the DM response to on_chunk (the console by default).
+
+        Completed sentences go straight into world memory while the tail is
+        still generating; the full turn commit then reuses their vectors.
+        """
+        if not self.is_running:
+            return ""
+        turn_number = self._begin_turn(player_input)
+
+        with tracer.span("turn", turn=turn_number, streaming=True), turn_deadline(self.turn_deadline):
+            validated_context, temperature = self._build_context(player_input)
+            print("[Dungeon Master] Streaming narrative...")
+            if on_chunk is None:
+                print("\nDM: ", end="", flush=True)
+            stream = self.dungeon_master.stream_response(
+                player_input,
+                validated_context,
+                self.conversation_history.recent(),
+                temperature=temperature,
+                history_summary=self.conversation_history.summary
+            )
+            with tracer.span("generate", streaming=True):
+                dm_response = self._consume_stream(stream, turn_number, on_chunk)
+            self._record_history(player_input, dm_response, turn_number)
+            self._commit_turn(player_input, dm_response, turn_number)
+
+        if self.debug_mode:
+            self.display_debug_info()
+
+        return dm_response
+
+    def _consume_stream(self, stream, turn_number: int, on_chunk=None) -> str:
+        """Echo a token stream, store finished sentences as they complete, and record latency metrics"""
+        from TurnAnalysis import SentenceStream
+
+        if on_chunk is None:
+            on_chunk = self._print_chunk
+        start = time.perf_counter()
+        metrics = {"time_to_first_token": None, "time_to_first_stored_memory": None, "total_time": None}
+        splitter = SentenceStream()
+        chunks = []
+
+        # Close the stream even if a consumer fails midway, so its model slot is freed at once
+        with closing(stream):
+            for delta in stream:
+                if metrics["time_to_first_token"] is None:
+                    metrics["time_to_first_token"] = time.perf_counter() - start
+                chunks.append(delta)
+                on_chunk(delta)
+                stored = self.memory_manager.store_streamed_sentences(splitter.feed(delta), turn_number)
+                if stored and metrics["time_to_first_stored_memory"] is None:
+                    metrics["time_to_first_stored_memory"] = time.perf_counter() - start
+
+        stored = self.memory_manager.store_streamed_sentences(splitter.flush(), turn_number)
+        if stored and metrics["time_to_first_stored_memory"] is None:
+            metrics["time_to_first_stored_memory"] = time.perf_counter() - start
+        metrics["total_time"] = time.perf_counter() - start
+        self.stream_metrics = metrics
+
+        print(f"\n[Stream] {self._format_stream_metrics()}")
+        return "".join(chunks).strip()
+
+    def _print_chunk(self, delta: str):
+        print(delta, end="", flush=True)
+
+    def _format_stream_metrics(self) -> str:
+        def seconds(value):
+            return "n/a" if value is None else f"{value:.2f}s"
+        metrics = self.stream_metrics
+        return (f"first token: {seconds(metrics.get('time_to_first_token'))}, "
+                f"first stored memory: {seconds(metrics.get('time_to_first_stored_memory'))}, "
+                f"total: {seconds(metrics.get('total_time'))}")
+
+    async def process_turn_async(self, player_input: str) -> str:
+        """Process a turn, returning as soon as the DM response exists.
+
+        Ingestion, summarization, NPC and quest updates run as a background
+        commit. Commits are chained in turn order and the next turn waits for
+        them before retrieving, so retrieval always sees every earlier turn.
+        """
+        if not self.is_running:
+            return ""
+        await self.wait_for_commits()
+        turn_number = self._begin_turn(player_input)
+
+        dm_response = await asyncio.to_thread(self._respond, player_input)
+        self._record_history(player_input, dm_response, turn_number)
+
+        self._commit_task = asyncio.create_task(
+            self._commit_in_order(self._commit_task, player_input, dm_response, turn_number)
+        )
+        return dm_response
+
+    async def wait_for_commits(self):
+        """Block until every background turn commit has been applied"""
+        if self._commit_task is not None:
+            await self._commit_task
+
+    async def _commit_in_order(self, previous: Optional[asyncio.Task], player_input: str, dm_response: str, turn_number: int):
+        if previous is not None:
+            await previous
+        try:
+            await asyncio.to_thread(self._commit_turn, player_input, dm_response, turn_number)
+        except Exception as e:
+            print(f"\nWarning: background commit for turn {turn_number} failed: {e}")
+            return
+        if self.debug_mode:
+            self.display_debug_info()
+
+    def _begin_turn(self, player_input: str) -> int:
+        self.turn_count += 1
+        print(f"\n-- Turn {self.turn_count} --")
+        print(f"Player input: {player_input}")
+        return self.turn_count
+
+    def _respond(self, player_input: str) -> str:
+        """Build the context and generate the DM response (speculatively if enabled) within the turn deadline"""
+        with turn_deadline(self.turn_deadline):
+            if self.speculative_validation:
+                return self._respond_speculatively(player_input)
+            validated_context, temperature = self._build_context(player_input)
+            return self._generate(player_input, validated_context, temperature)
+
+    def _build_context(self, player_input: str):
+        """Retrieve and validate memories, and pick the generation temperature"""
+        retrieved_memories = self._retrieve(player_input)
+
+        # Step 2: Lore Talker validates consistency
+        print("[Lore Talker] Validating context consistency...")
+        with tracer.span("validate", memories=len(retrieved_memories)):
+            validated_context = self.lore_talker.validate_context(
+                player_input,
+                retrieved_memories
+            )
+
+        return validated_context, self._pick_temperature(player_input)
+
+    def _retrieve(self, player_input: str) -> List[Dict]:
+        # Step 1: Memory Manager retrieves relevant context
+        print("[Memory Manager] Retrieving relevant memories...")
+        with tracer.span("retrieve"):
+            retrieved_memories = self.memory_manager.retrieve_memories(
+                player_input,
+                top_k=5
+            )
+        print(f"Retrieved {len(retrieved_memories)} memories")
+        return retrieved_memories
+
+    def _pick_temperature(self, player_input: str) -> float:
+        # Step 3: Detect context and set temperature
+        context_type = self.detect_context_type(player_input)
+        temperature = self.get_temperature(context_type)
+        print(f"[Context] Type: {context_type}, Temperature: {temperature}")
+        return temperature
+
+    def _respond_speculatively(self, player_input: str) -> str:
+        """Draft on the raw memories while validation runs; regenerate only if a rejected memory shaped the draft"""
+        retrieved_memories = self._retrieve(player_input)
+        temperature = self._pick_temperature(player_input)
+        start = time.perf_counter()
+
+        print("[Lore Talker] Validating context consistency (in parallel with the draft)...")
+        # Run in a copy of this context so the validation call shares the turn deadline
+        validation = self._speculation_executor.submit(
+            contextvars.copy_context().run,
+            self._timed, self.lore_talker.validate_context, player_input, retrieved_memories
+        )
+        draft, generate_time = self._timed(self._generate, player_input, retrieved_memories, temperature)
+        validated_context, validate_time = validation.result()
+
+        kept_ids = {mem.get('memory_id', mem['text']) for mem in validated_context}
+        removed = [mem for mem in retrieved_memories if mem.get('memory_id', mem['text']) not in kept_ids]
+        accepted = not self.lore_talker.draft_relies_on(draft, removed)
+        if accepted:
+            dm_response = draft
+        else:
+            print(f"[Speculation] Draft relied on {len(removed)} rejected memories; regenerating...")
+            dm_response = self._generate(player_input, validated_context, temperature)
+
+        # The serial pipeline would have paid for validation and generation back to back
+        saved = validate_time + generate_time - (time.perf_counter() - start)
+        stats = self.speculation_stats
+        stats["turns"] += 1
+        stats["accepted" if accepted else "regenerated"] += 1
+        stats["saved_seconds"] += saved
+        stats["last_saved"] = saved
+        return dm_response
+
+    @staticmethod
+    def _timed(func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        return result, time.perf_counter() - start
+
+    def _generate(self, player_input: str, validated_context: List[Dict], temperature: float) -> str:
+        # Step 4: Dungeon Master generates response
+        print("[Dungeon Master] Generating narrative...")
+        with tracer.span("generate", memories=len(validated_context)):
+            dm_response = self.dungeon_master.generate_response(
+                player_input,
+                validated_context,
+                self.conversation_history.recent(),
+                temperature=temperature,
+                history_summary=self.conversation_history.summary
+            )
+        print(f"DM response (first 100 chars): {dm_response[:100]}...")
+        return dm_response
+
+    def _record_history(self, player_input: str, dm_response: str, turn_number: int):
+        self.conversation_history.append({
+            "turn": turn_number,
+            "player": player_input,
+            "dm": dm_response,
+            "timestamp": datetime.now().isoformat()
+        })
+
+    def _commit_turn(self, player_input: str, dm_response: str, turn_number: int):
+        """Everything that happens after the player already has the response"""
+        # Step 5: Extract and store new memories (one spaCy pass shared by every subsystem)
+        print("[Memory Manager] Extracting and storing new facts...")
+        with tracer.span("ingest", turn=turn_number):
+            analysis = self.memory_manager.analyze_turn(player_input, dm_response, turn_number)
+            self.memory_manager.extract_and_store(
+                player_input,
+                dm_response,
+                turn_number,
+                analysis=analysis
+            )
+        # Single trigger for compaction; the summary itself is generated in the background
+        self.memory_manager.maybe_summarize_memory(turn_number)
+
+        # Bonus: Update NPC personalities and quest log
+        if self.enable_bonus_features and self.npc_manager is not None and self.quest_log is not None:
+            npcs = analysis.response_entities["npcs"]
+            with tracer.span("npc", npcs=len(npcs)):
+                if npcs:
+                    sentiment = self.npc_manager.analyze_sentiment(player_input, dm_response, hits=analysis.keyword_hits)
+                    self.npc_manager.update_npcs(npcs, player_input, dm_response, sentiment=sentiment)
+                    print(f"[NPC Manager] Updated personalities for {', '.join(npcs)}")
+            with tracer.span("quest"):
+                self.quest_log.process_turn(player_input, dm_response, turn_number, analysis=analysis)
+            print("[Quest Log] Updated quests")
+
+        with tracer.span("save"):
+            self.save_session()
+
+    def save_session(self):
+        """Persist turn counter, history, memory log, NPC and quest state (no-op without a persist directory)"""
+        if not self.session_store:
+            return
+        state = {
+            "turn_count": self.turn_count,
+            "conversation_history": self.conversation_history.export_state(),
+            "memory": self.memory_manager.export_state()
+        }
+        if self.npc_manager is not None:
+            state["npcs"] = self.npc_manager.export_state()
+        if self.quest_log is not None:
+            state["quests"] = self.quest_log.export_state()
+        self.session_store.save(self.session_id, state)
+
+    def close(self):
+        """Finish background work, save the session and release this session's worker threads"""
+        self.conversation_history.close()
+        if self.memory_manager is not None:
+            self.memory_manager.wait_for_summary()
+        if self._speculation_executor is not None:
+            self._speculation_executor.shutdown(wait=True)
+        self.save_session()
+        if self.memory_manager is not None:
+            self.memory_manager.flush()
+
+    def load_session(self) -> bool:
+        """Restore a saved session; memories themselves are already in the persistent Chroma store"""
+        state = self.session_store.load(self.session_id)
+        if state is None:
+            return False
+        self.turn_count = state.get("turn_count", 0)
+        self.conversation_history.load_state(state.get("conversation_history", []))
+        self.memory_manager.load_state(state.get("memory", {}))
+        if self.npc_manager is not None and "npcs" in state:
+            self.npc_manager.load_state(state["npcs"])
+        if self.quest_log is not None and "quests" in state:
+            self.quest_log.load_state(state["quests"])
+        print(f"✓ Restored session '{self.session_id}' at turn {self.turn_count}")
+        return True
+
+    def display_debug_info(self):
+        print("\n" + "="*60)
+        print("SMART DEBUG CONSOLE")
+        print("="*60)
+
+        stats = self.memory_manager.get_stats()
+        print(f"\n📊 Memory Stats:")
+        print(f"  Total Memories: {stats['total_memories']}")
+        if stats['storage_mode'] == 'metadata':
+            print(f"  Tracked NPCs: {stats['tracked_npcs']} (single collection)")
+            print(f"  Tracked Locations: {stats['tracked_locations']} (single collection)")
+        else:
+            print(f"  NPC Collections: {stats['npc_collections']}")
+            print(f"  Location Collections: {stats['location_collections']}")
+        history = self.conversation_history
+        print(f"  Short-term turns: {len(history.recent())} verbatim (window {history.verbatim_turns})")
+        if history.summarized_through:
+            print(f"  Rolling summary: turns 1-{history.summarized_through}")
+        lore_stats = self.lore_talker.get_stats()
+        if lore_stats['validations']:
+            print(f"\n🛡️  Lore Talker: {lore_stats['local']}/{lore_stats['validations']} validations resolved locally "
+                  f"[LLM skipped: {lore_stats['skip_rate']:.0%}]")
+            usage = lore_stats['token_usage']
+            if usage['calls']:
+                print(f"  Lore LLM tokens: {usage['prompt_tokens']} in / {usage['completion_tokens']} out over "
+                      f"{usage['calls']} calls [avg out: {lore_stats['avg_completion_tokens']:.1f}]")
+        gateway_stats = self.llm_gateway.get_stats()
+        print(f"\n🌐 LLM Gateway: {gateway_stats['requests']} requests, {gateway_stats['retries']} retries, "
+              f"{gateway_stats['rate_limited']} rate-limited, {gateway_stats['timeouts']} timeouts, "
+              f"{gateway_stats['deadline_exceeded']} past deadline, {gateway_stats['failures']} failed")
+        if 'cache' in gateway_stats:
+            cache_stats = gateway_stats['cache']
+            print(f"\n🗃️  LLM Cache: {cache_stats['hits']} hits ({cache_stats['disk_hits']} from disk), "
+                  f"{cache_stats['misses']} misses, {cache_stats['bypassed']} bypassed "
+                  f"[hit rate: {cache_stats['hit_rate']:.0%}]")
+        prompt_report = self.dungeon_master.last_prompt_report
+        if prompt_report:
+            print(f"\n📝 Last prompt: {prompt_report['tokens']}/{prompt_report['budget']} tokens "
+                  f"({prompt_report['history_kept']} turns, {prompt_report['memories_kept']} memories, "
+                  f"{prompt_report['compressed']} compressed)")
+        if tracer.enabled:
+            summary = tracer.summary()
+            stages = [name for name in ("retrieve", "validate", "generate", "ingest", "npc", "quest", "save") if name in summary]
+            if stages:
+                print("\n⏱️  Stage timings (p50/p95 ms):")
+                print("  " + ", ".join(f"{name} {summary[name]['p50_ms']:.0f}/{summary[name]['p95_ms']:.0f}" for name in stages))
+        if self.speculation_stats["turns"]:
+            spec = self.speculation_stats
+            print(f"\n🏎️  Speculation: {spec['accepted']}/{spec['turns']} drafts accepted, "
+                  f"saved {spec['last_saved']:.2f}s last turn ({spec['saved_seconds'] / spec['turns']:.2f}s avg)")
+        if self.stream_metrics:
+            print(f"\n⏱️  Last stream: {self._format_stream_metrics()}")
+
+        recent_memories = self.memory_manager.get_recent_memories(10)
+        # Assuming get_recent_memories provides 'id' or 'text' for tracking
+        new_memories = [mem for mem in recent_memories if mem.get('id', mem.get('text')) not in self.displayed_memories_ids]
+
+        if new_memories:
+            print(f"\n🔍 New memories added:")
+            for mem in new_memories:
+                preview = mem['text'][:60]
+                print(f"  • {preview}... [importance: {mem['importance']:.2f}]")
+                # Track displayed to avoid repeats
+                self.displayed_memories_ids.add(mem.get('id', mem.get('text')))
+        else:
+            print("\n🔍 No new memories since last check.")
+
+        if self.enable_bonus_features and self.npc_manager is not None:
+            npcs = self.npc_manager.get_all_npcs()
+            if npcs:
+                print(f"\n👥 NPC Status:")
+                for npc in npcs[:3]:  # Show top 3 NPCs
+                    desc = self.npc_manager.get_personality_description(npc)
+                    print(f"  • {desc}")
+
+        print("="*60 + "\n")
+
+    def start_game(self):
+        """Start the game loop"""
+        print("\n" + "="*60)
+        print("🎲 AI DUNGEON MASTER - Interactive Storytelling")
+        print("="*60)
+        print("\nCommands:")
+        print("  'quit' - Exit game")
+        print("  'debug' - Toggle debug mode")
+        print("  'perf' - Stage timings ('perf on', 'perf export chrome trace.json')")
+        if self.enable_bonus_features:
+            print("  'quests' - View quest log")
+            print("  'npcs' - View NPC relationships")
+        print("\nThe adventure begins...\n")
+
+        if self.resumed_session:
+            print(f"Resuming your adventure at turn {self.turn_count}...\n")
+            if self.conversation_history:
+                print(f"DM: {self.conversation_history[-1]['dm']}\n")
+        else:
+            self._start_new_adventure()
+
+        if self.async_pipeline:
+            asyncio.run(self._game_loop_async())
+        else:
+            self._game_loop()
+
+    def _start_new_adventure(self):
+        # Initial narration
+        initial_prompt = "Start an exciting fantasy adventure. Introduce the setting and present the player with an initial situation."
+        if self.stream_output:
+            print("DM: ", end="", flush=True)
+            opening = self._consume_stream(self.dungeon_master.stream_opening(initial_prompt), turn_number=0)
+            print()
+        else:
+            opening = self.dungeon_master.generate_opening(initial_prompt)
+            print(f"DM: {opening}\n")
+
+        # Store opening in memory
+        self.memory_manager.extract_and_store("", opening, turn_number=0)
+        self.save_session()
+
+    def _handle_command(self, player_input: str) -> bool:
+        """Handle console commands; returns True if the input was a command"""
+        command = player_input.lower()
+
+        if command == 'quit':
+            print("\nThanks for playing! The adventure continues in your imagination...")
+            self.is_running = False
+            return True
+
+        if command == 'debug':
+            self.display_debug_info()
+            return True
+
+        if command == 'perf' or command.startswith('perf '):
+            self._handle_perf_command(player_input.split()[1:])  # Keep the case of export paths
+            return True
+
+        if self.enable_bonus_features and command == 'quests' and self.quest_log is not None:
+            print(self.quest_log.get_quest_summary())
+            return True
+
+        if self.enable_bonus_features and command == 'npcs' and self.npc_manager is not None:
+            npcs = self.npc_manager.get_all_npcs()
+            if not npcs:
+                print("\nNo NPCs met yet.\n")
+            for npc in npcs:
+                print(f"  • {self.npc_manager.get_personality_description(npc)}")
+            return True
+
+        return False
+
+    def _handle_perf_command(self, args: List[str]):
+        """perf | perf on | perf off | perf reset | perf export [chrome|otel] <path>"""
+        action = args[0].lower() if args else None
+        if action is None:
+            print("\n" + tracer.format_summary() + "\n")
+        elif action == 'on':
+            tracer.enable()
+            print("\nTracing enabled\n")
+        elif action == 'off':
+            tracer.disable()
+            print("\nTracing disabled\n")
+        elif action == 'reset':
+            tracer.reset()
+            print("\nTrace data cleared\n")
+        elif action == 'export' and len(args) >= 2 and (len(args) == 2 or args[1].lower() in ('chrome', 'otel')):
+            trace_format = args[1].lower() if len(args) >= 3 else 'chrome'
+            path = args[-1]
+            tracer.export(path, format=trace_format)
+            print(f"\nWrote {trace_format} trace to {path}\n")
+        else:
+            print("\nUsage: perf [on|off|reset|export [chrome|otel] <path>]\n")
+
+    def _game_loop(self):
+        while self.is_running:
+            try:
+                player_input = input("You: ").strip()
+
+                if not player_input:
+                    continue
+
+                if self._handle_command(player_input):
+                    continue
+
+                # Process the turn
+                if self.stream_output:
+                    self.process_turn_streaming(player_input)
+                    print()
+                else:
+                    response = self.process_turn(player_input)
+                    print(f"\nDM: {response}\n")
+
+            except KeyboardInterrupt:
+                print("\n\nGame interrupted. Saving progress...")
+                break
+            except Exception as e:
+                print(f"\nError: {str(e)}")
+                print("The Dungeon Master stumbles momentarily but recovers...\n")
+
+    async def _game_loop_async(self):
+        """Same loop, but background commits keep running while the player types"""
+        while self.is_running:
+            try:
+                player_input = (await asyncio.to_thread(input, "You: ")).strip()
+
+                if not player_input:
+                    continue
+
+                if self._handle_command(player_input):
+                    continue
+
+                response = await self.process_turn_async(player_input)
+                print(f"\nDM: {response}\n")
+
+            except (KeyboardInterrupt, asyncio.CancelledError):
+                print("\n\nGame interrupted. Saving progress...")
+                break
+            except Exception as e:
+                print(f"\nError: {str(e)}")
+                print("The Dungeon Master stumbles momentarily but recovers...\n")
+
+        await self.wait_for_commits()
+
+
+def main():
+    """Main entry point"""
+    # Get API key from environment or user input
+    groq_api_key = os.getenv("GROQ_API_KEY")
+
+    if not groq_api_key:
+        print("Please enter your Groq API key:")
+        groq_api_key = input().strip()
+
+    # Initialize and start the game (set DM_PERSIST_DIR to keep the world across restarts)
+    orchestrator = DungeonMasterOrchestrator(
+        groq_api_key,
+        persist_directory=os.getenv("DM_PERSIST_DIR"),
+        session_id=os.getenv("DM_SESSION_ID")
+    )
+    orchestrator.initialize_agents()
+    orchestrator.start_game()
+
+
+
+if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,250 +1,640 @@
-import chromadb
-from chromadb.config import Settings
-from sentence_transformers import SentenceTransformer
-from typing import List, Dict
-import time
-import re
-import json
-import spacy
-
-class MemoryManager:
-    """Manages hierarchical memory using ChromaDB and semantic embeddings"""
-    
-    def __init__(self, collection_prefix="ai_dm" , dungeon_master = None):
-        self.client = chromadb.Client(Settings(
-            anonymized_telemetry=False,
-            allow_reset=True
-        ))
-
-        self.buffer_flushed = False
-        self.dungeon_master = dungeon_master
-
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-        self.nlp = spacy.load("en_core_web_sm")
-
-        self.collection_prefix = collection_prefix
-        self.world_collection = self._get_or_create_collection("world_memory")
-        self.npc_collections = {}
-        self.location_collections = {}
-
-        self.alpha = 0.6
-        self.beta = 0.3
-        self.gamma = 0.1
-
-        self.memory_log = []
-        self.old_memory_threshold = 50
-        self.last_summary_turn = 0
-        self.summary_interval = 10
-
-        print("✓ Memory Manager initialized with ChromaDB")
-
-    def flush(self):
-        self.buffer_flushed = True
-        print("✓ Memory buffer flushed and closed")
-
-    def _normalize_name(self, name: str) -> str:
-        name = name.lower()
-        name = re.sub(r'[^a-z0-9]+', '_', name)
-        name = name.strip('_')
-        if not name:
-            name = 'unnamed'
-        if len(name) < 3:
-            name = f"{name}_mem"
-        if len(name) > 512:
-            name = name[:512].rstrip('_')
-        return name
-
-    def _get_or_create_collection(self, name: str):
-        sanitized_name = self._normalize_name(name)
-        print(f"DEBUG: Using collection name: {sanitized_name} (from original '{name}')")
-        try:
-            return self.client.get_collection(sanitized_name)
-        except chromadb.errors.NotFoundError:
-            return self.client.create_collection(
-                name=sanitized_name,
-                metadata={"hnsw:space": "cosine"}
-            )
-
-    def _extract_entities(self, text: str) -> Dict[str, List[str]]:
-        entities = {"npcs": [], "locations": []}
-        doc = self.nlp(text)
-        for ent in doc.ents:
-            if ent.label_ == "PERSON":
-                entities["npcs"].append(ent.text)
-            elif ent.label_ in ["GPE", "LOC", "FAC"]:
-                entities["locations"].append(ent.text)
-        entities["npcs"] = list(set(entities["npcs"]))
-        entities["locations"] = list(set(entities["locations"]))
-        return entities
-
-    def _calculate_importance(self, text: str) -> float:
-        importance = 0.5
-        high_keywords = ["quest", "key", "artifact", "defeat", "victory", "death", "betray", "oath", "curse", "prophecy"]
-        medium_keywords = ["meet", "find", "give", "take", "learn", "discover", "receive"]
-        text_lower = text.lower()
-        for kw in high_keywords:
-            if kw in text_lower:
-                importance += 0.1
-        for kw in medium_keywords:
-            if kw in text_lower:
-                importance += 0.05
-        return min(importance, 1.0)
-
-    def summarize_events(self, events: List[str]) -> str:
-        # Replace with your DungeonMaster summarization call
-        return "Summary: " + " ".join(events)[:500]
-
-    def maybe_summarize_memory(self, current_turn: int):
-        if current_turn - self.last_summary_turn >= self.summary_interval and len(self.memory_log) > self.old_memory_threshold:
-            old_memories = self.memory_log[:self.old_memory_threshold]
-            summary_text = self.summarize_events([mem['text'] for mem in old_memories])
-
-            summary_id = f"summary_{current_turn}"
-            self.world_collection.add(
-                documents=[summary_text],
-                ids=[summary_id],
-                metadatas=[{"importance": 0.9, "timestamp": time.time(), "turn": current_turn, "type": "summary"}]
-            )
-
-            old_ids = [mem.get('memory_id') for mem in old_memories if mem.get('memory_id')]
-            if old_ids:
-                self.world_collection.delete(ids=old_ids)
-
-            self.memory_log = self.memory_log[self.old_memory_threshold:]
-            self.memory_log.insert(0, {
-                "turn": current_turn,
-                "memory_id": summary_id,
-                "text": summary_text,
-                "importance": 0.9,
-                "timestamp": time.time(),
-                "npcs": [],
-                "locations": []
-            })
-
-            self.last_summary_turn = current_turn
-            print(f"\n[MemoryManager] Summarized and compressed memory at turn {current_turn}.\nSummary: {summary_text}\n")
-
-    def extract_and_store(self, player_input: str, dm_response: str, turn_number: int):
-        if self.buffer_flushed:
-            print("MemoryManager is closed. Skipping storage.")
-            return
-
-        combined_text = f"{player_input} {dm_response}"
-        entities = self._extract_entities(combined_text)
-
-        sentences = re.split(r'[.!?]+', dm_response)
-        sentences = [s.strip() for s in sentences if len(s.strip()) > 10]
-
-        timestamp = time.time()
-
-        for sentence in sentences:
-            importance = self._calculate_importance(sentence)
-            memory_id = f"mem_{turn_number}_{hash(sentence) % 10000}"
-            metadata = {
-                "importance": importance,
-                "timestamp": timestamp,
-                "turn": turn_number,
-                "type": "interaction"
-            }
-
-            self.world_collection.add(
-                documents=[sentence],
-                metadatas=[metadata],
-                ids=[memory_id]
-            )
-            log_entry = {
-                "turn": turn_number,
-                "memory_id": memory_id,
-                "text": sentence,
-                "importance": importance,
-                "timestamp": timestamp,
-                "npcs": entities["npcs"],
-                "locations": entities["locations"]
-            }
-            self.memory_log.append(log_entry)
-
-            for npc in entities["npcs"]:
-                npc_key = self._normalize_name(npc)
-                if npc_key not in self.npc_collections:
-                    self.npc_collections[npc_key] = self._get_or_create_collection(f"{self.collection_prefix}_npc_{npc_key}")
-                npc_metadata = metadata.copy()
-                npc_metadata["npc"] = npc
-                self.npc_collections[npc_key].add(
-                    documents=[sentence],
-                    metadatas=[npc_metadata],
-                    ids=[f"{memory_id}_npc_{npc_key}"]
-                )
-
-            for location in entities["locations"]:
-                loc_key = self._normalize_name(location)
-                if loc_key not in self.location_collections:
-                    self.location_collections[loc_key] = self._get_or_create_collection(f"{self.collection_prefix}_loc_{loc_key}")
-                loc_metadata = metadata.copy()
-                loc_metadata["location"] = location
-                self.location_collections[loc_key].add(
-                    documents=[sentence],
-                    metadatas=[loc_metadata],
-                    ids=[f"{memory_id}_loc_{loc_key}"]
-                )
-
-        self.maybe_summarize_memory(turn_number)
-
-    def retrieve_memories(self, query: str, top_k: int = 5) -> List[Dict]:
-        current_time = time.time()
-        results = self.world_collection.query(
-            query_texts=[query],
-            n_results=top_k * 2
-        )
-        if not results['documents'][0]:
-            return []
-        memories = []
-        for i, doc in enumerate(results['documents'][0]):
-            metadata = results['metadatas'][0][i]
-            distance = results['distances'][0][i] if 'distances' in results else 0.5
-            semantic_score = 1 - distance
-            time_diff = current_time - metadata['timestamp']
-            recency_score = max(0, 1 - (time_diff / (86400 * 30)))
-            importance_score = metadata.get('importance', 0.5)
-            final_score = (
-                self.alpha * semantic_score +
-                self.beta * recency_score +
-                self.gamma * importance_score
-            )
-            memories.append({
-                'text': doc,
-                'score': final_score,
-                'metadata': metadata
-            })
-        memories.sort(key=lambda x: x['score'], reverse=True)
-        return memories[:top_k]
-
-    def get_stats(self) -> Dict:
-        return {
-            'total_memories': self.world_collection.count(),
-            'npc_collections': len(self.npc_collections),
-            'location_collections': len(self.location_collections)
-        }
-
-    def get_recent_memories(self, n: int = 5) -> List[Dict]:
-        results = self.world_collection.get(
-            limit=n,
-            include=['documents', 'metadatas']
-        )
-        if not results['documents']:
-            return []
-        memories = []
-        for i, doc in enumerate(results['documents']):
-            memories.append({
-                'text': doc,
-                'importance': results['metadatas'][i].get('importance', 0.5)
-            })
-        return memories
-
-    def export_memory_log_json(self, filename: str):
-        with open(filename, 'w') as f:
-            json.dump(self.memory_log, f, indent=2)
-    def summarize_events(self, events: List[str]) -> str:
-        # Use dungeon_master's summarize_events if set, else fallback
-        if self.dungeon_master:
-            return self.dungeon_master.summarize_events(events)
-        return "Summary: " + " ".join(events)[:500]
+import chromadb
+from chromadb.config import Settings
+from typing import List, Dict, Optional
+import time
+import re
+import json
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+
+from EmbeddingEngine import EmbeddingEngine, get_embedding_engine
+from PerfTracer import tracer
+from TurnAnalysis import TurnAnalysis, TurnAnalyzer, calculate_importance
+
+
+def rerank_scores(
+    distances: np.ndarray,
+    turns: np.ndarray,
+    importances: np.ndarray,
+    via_entity: np.ndarray,
+    current_turn: int,
+    alpha: float,
+    beta: float,
+    gamma: float,
+    entity_boost: float,
+    recency_half_life: Optional[float],
+    recency_floor: float = 0.0
+) -> np.ndarray:
+    """alpha*semantic + beta*recency + gamma*importance (+ entity_boost) for every candidate at once.
+
+    Recency decays from 1 toward recency_floor, halving the gap every
+    recency_half_life turns of age; None scores every memory as fresh. The
+    floor bounds what age can cost an old memory at beta*(1 - recency_floor),
+    so recency separates near-duplicates without burying early facts.
+    """
+    if recency_half_life:
+        age = np.maximum(current_turn - turns, 0)
+        recency = recency_floor + (1 - recency_floor) * np.exp2(-age / recency_half_life)
+    else:
+        recency = 1.0
+    return alpha * (1 - distances) + beta * recency + gamma * importances + entity_boost * via_entity
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first, without sorting the whole pool"""
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k < len(scores):
+        best = np.argpartition(-scores, k - 1)[:k]
+    else:
+        best = np.arange(len(scores))
+    return best[np.argsort(-scores[best], kind="stable")]
+
+STORAGE_COLLECTIONS = "collections"  # One Chroma collection (and HNSW index) per NPC / location
+STORAGE_METADATA = "metadata"        # Single world collection, entities stored as npc_<key>/loc_<key> tags
+
+class MemoryManager:
+    """Manages hierarchical memory using ChromaDB and semantic embeddings"""
+    
+    def __init__(
+        self,
+        collection_prefix="ai_dm" ,
+        dungeon_master = None,
+        embedding_engine: Optional[EmbeddingEngine] = None,
+        storage_mode: str = STORAGE_COLLECTIONS,
+        persist_directory: Optional[str] = None,
+        session_id: Optional[str] = None,
+        client=None,
+        analyzer: Optional[TurnAnalyzer] = None
+    ):
+        if storage_mode not in (STORAGE_COLLECTIONS, STORAGE_METADATA):
+            raise ValueError(f"Unknown storage mode: {storage_mode}")
+        self.storage_mode = storage_mode
+
+        settings = Settings(
+            anonymized_telemetry=False,
+            allow_reset=True
+        )
+        if client is not None:
+            self.client = client  # Shared by several sessions, isolated by collection prefix
+        elif persist_directory:
+            # Documents and embeddings survive restarts; nothing is re-embedded on reload
+            self.client = chromadb.PersistentClient(path=persist_directory, settings=settings)
+        else:
+            self.client = chromadb.Client(settings)
+        self.session_id = session_id
+
+        self.buffer_flushed = False
+        self.dungeon_master = dungeon_master
+
+        # One shared model embeds every collection (no ChromaDB default ONNX copy)
+        self.embedding_engine = embedding_engine or get_embedding_engine()
+        self.embedding_model = self.embedding_engine.model
+        self.analyzer = analyzer or TurnAnalyzer()
+        self.nlp = self.analyzer.nlp
+
+        self.collection_prefix = f"{collection_prefix}_{session_id}" if session_id else collection_prefix
+        world_name = f"{self.collection_prefix}_world_memory" if session_id else "world_memory"
+        self.world_collection = self._get_or_create_collection(world_name)
+        self.npc_collections = {}
+        self.location_collections = {}
+        self.known_npcs = {}       # normalized key -> display name, in both storage modes
+        self.known_locations = {}
+
+        self.alpha = 0.6
+        self.beta = 0.3
+        self.gamma = 0.1
+        self.entity_boost = 0.05  # Added for memories found via an NPC/location named in the query
+        self.candidate_pool = 200     # Nearest neighbours fetched per collection before re-ranking
+        self.recency_half_life = 200  # Turns of age that halve a memory's recency bonus (None disables)
+        self.recency_floor = 0.7      # Recency never drops below this, so age costs at most beta*0.3
+        self.current_turn = 0         # Newest turn ingested; recency is measured against it
+
+        self.memory_log = []
+        self._streamed_memories = {}  # turn -> memory_id -> (embedding, metadata, log entry)
+        self.old_memory_threshold = 50
+        self.last_summary_turn = 0
+        self.summary_interval = 10
+
+        # Guards collection writes and memory_log against the background summarizer
+        self._lock = threading.RLock()
+        self._summary_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory-summary")
+        self._summary_future: Optional[Future] = None
+        self._query_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="memory-query")
+
+        print("✓ Memory Manager initialized with ChromaDB")
+
+    def flush(self):
+        self.buffer_flushed = True
+        self._summary_executor.shutdown(wait=True)
+        self._query_executor.shutdown(wait=True)
+        print("✓ Memory buffer flushed and closed")
+
+    def _normalize_name(self, name: str) -> str:
+        name = name.lower()
+        name = re.sub(r'[^a-z0-9]+', '_', name)
+        name = name.strip('_')
+        if not name:
+            name = 'unnamed'
+        if len(name) < 3:
+            name = f"{name}_mem"
+        if len(name) > 512:
+            name = name[:512].rstrip('_')
+        return name
+
+    def _get_or_create_collection(self, name: str):
+        sanitized_name = self._normalize_name(name)
+        print(f"DEBUG: Using collection name: {sanitized_name} (from original '{name}')")
+        try:
+            return self.client.get_collection(
+                sanitized_name,
+                embedding_function=self.embedding_engine
+            )
+        except chromadb.errors.NotFoundError:
+            return self.client.create_collection(
+                name=sanitized_name,
+                metadata={"hnsw:space": "cosine"},
+                embedding_function=self.embedding_engine
+            )
+
+    def analyze_turn(self, player_input: str, dm_response: str, turn_number: int) -> TurnAnalysis:
+        """Parse a turn once; the result is shared with the NPC and quest subsystems"""
+        return self.analyzer.analyze(player_input, dm_response, turn_number)
+
+    def _extract_entities(self, text: str) -> Dict[str, List[str]]:
+        return self.analyzer.extract_entities(self.analyzer.parse(text))
+
+    def _calculate_importance(self, text: str) -> float:
+        return calculate_importance(text)
+
+    def maybe_summarize_memory(self, current_turn: int) -> Optional[Future]:
+        """Schedule background compaction of the oldest memories once the log crosses the threshold.
+
+        The LLM summary runs off the turn; the swap (add summary, delete the
+        summarized ids, rewrite memory_log) happens under the memory lock, so
+        a concurrent retrieval sees either the old memories or the summary,
+        never both or neither.
+        """
+        if self._summary_future is not None and not self._summary_future.done():
+            return None  # One compaction at a time
+        if current_turn - self.last_summary_turn < self.summary_interval or len(self.memory_log) <= self.old_memory_threshold:
+            return None
+
+        with self._lock:
+            old_memories = list(self.memory_log[:self.old_memory_threshold])
+        self.last_summary_turn = current_turn
+        self._summary_future = self._summary_executor.submit(self._compact_memories, old_memories, current_turn)
+        return self._summary_future
+
+    def _compact_memories(self, old_memories: List[Dict], current_turn: int):
+        try:
+            with tracer.span("memory.summarize", memories=len(old_memories)):
+                summary_text = self.summarize_events([mem['text'] for mem in old_memories])
+        except Exception as e:
+            print(f"Warning: memory summarization failed at turn {current_turn}: {e}")
+            self.last_summary_turn = 0  # Let the next scheduled trigger retry
+            return
+        summary_embedding = self.embedding_engine.encode([summary_text])
+        summary_id = f"summary_{current_turn}"
+        timestamp = time.time()
+        old_ids = [mem.get('memory_id') for mem in old_memories if mem.get('memory_id')]
+
+        with self._lock:
+            self.world_collection.add(
+                documents=[summary_text],
+                embeddings=summary_embedding,
+                ids=[summary_id],
+                metadatas=[{"importance": 0.9, "timestamp": timestamp, "turn": current_turn, "type": "summary"}]
+            )
+            if old_ids:
+                self.world_collection.delete(ids=old_ids)
+            for collection, copy_ids in self._hierarchy_copies(old_memories):
+                collection.delete(ids=copy_ids)
+
+            # New memories may have been logged while the summary was generating; keep them
+            summarized = set(old_ids)
+            self.memory_log = [mem for mem in self.memory_log if mem.get('memory_id') not in summarized]
+            self.memory_log.insert(0, {
+                "turn": current_turn,
+                "memory_id": summary_id,
+                "text": summary_text,
+                "importance": 0.9,
+                "timestamp": timestamp,
+                "npcs": [],
+                "locations": []
+            })
+
+        print(f"\n[MemoryManager] Summarized and compressed memory at turn {current_turn}.\nSummary: {summary_text}\n")
+
+    def wait_for_summary(self, timeout: Optional[float] = None):
+        """Block until any in-flight compaction has been applied"""
+        if self._summary_future is not None:
+            self._summary_future.result(timeout=timeout)
+
+    def extract_and_store(self, player_input: str, dm_response: str, turn_number: int, analysis: Optional[TurnAnalysis] = None):
+        if self.buffer_flushed:
+            print("MemoryManager is closed. Skipping storage.")
+            return
+
+        if analysis is None:
+            analysis = self.analyze_turn(player_input, dm_response, turn_number)
+
+        self._ingest_sentences(analysis.sentences, analysis.entities, turn_number, analysis.importances)
+
+    def store_streamed_sentences(self, sentences: List[str], turn_number: int) -> int:
+        """Write completed sentences to world memory while the rest of the response is still streaming.
+
+        Entity tagging and the NPC/location writes happen in the turn's final
+        extract_and_store, which reuses the vectors computed here.
+        """
+        if self.buffer_flushed or not sentences:
+            return 0
+
+        with self._lock:
+            self.current_turn = max(self.current_turn, turn_number)
+            streamed = self._streamed_memories.setdefault(turn_number, {})
+            timestamp = time.time()
+            memory_ids, documents, metadatas = self._prepare_batch(
+                sentences, [self._calculate_importance(s) for s in sentences], turn_number, timestamp, skip_ids=streamed
+            )
+            if not documents:
+                return 0
+
+            embeddings = self.embedding_engine.encode(documents)
+            self.world_collection.add(
+                documents=documents,
+                embeddings=embeddings,
+                metadatas=metadatas,
+                ids=memory_ids
+            )
+            for memory_id, document, embedding, metadata in zip(memory_ids, documents, embeddings, metadatas):
+                log_entry = self._log_entry(memory_id, document, metadata, {"npcs": [], "locations": []})
+                self.memory_log.append(log_entry)
+                streamed[memory_id] = (embedding, metadata, log_entry)
+            return len(documents)
+
+    def _prepare_batch(self, sentences: List[str], importances: List[float], turn_number: int, timestamp: float, skip_ids=()):
+        memory_ids, documents, metadatas = [], [], []
+        for sentence, importance in zip(sentences, importances):
+            memory_id = f"mem_{turn_number}_{hash(sentence) % 10000}"
+            if memory_id in memory_ids or memory_id in skip_ids:
+                continue  # Repeated in this turn (Chroma rejects duplicate ids in one batch) or already streamed
+            memory_ids.append(memory_id)
+            documents.append(sentence)
+            metadatas.append({
+                "importance": importance,
+                "timestamp": timestamp,
+                "turn": turn_number,
+                "type": "interaction"
+            })
+        return memory_ids, documents, metadatas
+
+    def _log_entry(self, memory_id: str, text: str, metadata: Dict, entities: Dict[str, List[str]]) -> Dict:
+        return {
+            "turn": metadata["turn"],
+            "memory_id": memory_id,
+            "text": text,
+            "importance": metadata["importance"],
+            "timestamp": metadata["timestamp"],
+            "npcs": entities["npcs"],
+            "locations": entities["locations"]
+        }
+
+    def _ingest_sentences(
+        self,
+        sentences: List[str],
+        entities: Dict[str, List[str]],
+        turn_number: int,
+        importances: Optional[List[float]] = None
+    ):
+        """Embed each sentence once and write it to the world, NPC and location collections in one batch each"""
+        timestamp = time.time()
+        if importances is None:
+            importances = [self._calculate_importance(sentence) for sentence in sentences]
+
+        npcs = self._group_by_key(entities["npcs"])
+        locations = self._group_by_key(entities["locations"])
+
+        with self._lock:
+            self.current_turn = max(self.current_turn, turn_number)
+            self.known_npcs.update(npcs)
+            self.known_locations.update(locations)
+
+            # Sentences already written while streaming keep their vectors and world entry
+            streamed = self._streamed_memories.pop(turn_number, {})
+            memory_ids, documents, metadatas = self._prepare_batch(sentences, importances, turn_number, timestamp)
+            if not documents:
+                return
+            tags = self._entity_tags(npcs, locations) if self.storage_mode == STORAGE_METADATA else {}
+            for metadata in metadatas:
+                metadata.update(tags)
+
+            fresh = [i for i, memory_id in enumerate(memory_ids) if memory_id not in streamed]
+            embeddings = [None] * len(documents)
+            for i, embedding in zip(fresh, self.embedding_engine.encode([documents[i] for i in fresh])):
+                embeddings[i] = embedding
+            for i, memory_id in enumerate(memory_ids):
+                if memory_id in streamed:
+                    embeddings[i], metadata, log_entry = streamed[memory_id]
+                    metadatas[i] = {**metadata, **tags}
+                    log_entry["npcs"] = entities["npcs"]
+                    log_entry["locations"] = entities["locations"]
+
+            streamed_ids = [memory_id for memory_id in memory_ids if memory_id in streamed]
+            if tags and streamed_ids:
+                # Streamed sentences were stored before the turn's entities were known
+                self.world_collection.update(
+                    ids=streamed_ids,
+                    metadatas=[metadatas[memory_ids.index(memory_id)] for memory_id in streamed_ids]
+                )
+
+            if fresh:
+                self.world_collection.add(
+                    documents=[documents[i] for i in fresh],
+                    embeddings=[embeddings[i] for i in fresh],
+                    metadatas=[metadatas[i] for i in fresh],
+                    ids=[memory_ids[i] for i in fresh]
+                )
+            for i in fresh:
+                self.memory_log.append(self._log_entry(memory_ids[i], documents[i], metadatas[i], entities))
+
+            if self.storage_mode == STORAGE_METADATA:
+                return
+
+            # Same vectors are reused down the hierarchy, one add per entity collection
+            for npc_key, npc in npcs.items():
+                if npc_key not in self.npc_collections:
+                    self.npc_collections[npc_key] = self._get_or_create_collection(f"{self.collection_prefix}_npc_{npc_key}")
+                self.npc_collections[npc_key].add(
+                    documents=documents,
+                    embeddings=embeddings,
+                    metadatas=[{**metadata, "npc": npc, "memory_id": memory_id} for memory_id, metadata in zip(memory_ids, metadatas)],
+                    ids=[f"{memory_id}_npc_{npc_key}" for memory_id in memory_ids]
+                )
+
+            for loc_key, location in locations.items():
+                if loc_key not in self.location_collections:
+                    self.location_collections[loc_key] = self._get_or_create_collection(f"{self.collection_prefix}_loc_{loc_key}")
+                self.location_collections[loc_key].add(
+                    documents=documents,
+                    embeddings=embeddings,
+                    metadatas=[{**metadata, "location": location, "memory_id": memory_id} for memory_id, metadata in zip(memory_ids, metadatas)],
+                    ids=[f"{memory_id}_loc_{loc_key}" for memory_id in memory_ids]
+                )
+
+    def _entity_tags(self, npc_keys, location_keys) -> Dict[str, bool]:
+        """Metadata flags marking a world memory as belonging to NPCs / locations"""
+        tags = {f"npc_{key}": True for key in npc_keys}
+        tags.update({f"loc_{key}": True for key in location_keys})
+        return tags
+
+    def _group_by_key(self, names: List[str]) -> Dict[str, str]:
+        """Map normalized collection key -> first original name, so spelling variants share one write"""
+        grouped = {}
+        for name in names:
+            grouped.setdefault(self._normalize_name(name), name)
+        return grouped
+
+    def retrieve_memories(self, query: str, top_k: int = 5, hierarchical: bool = True) -> List[Dict]:
+        """Query world memory plus the collections of every NPC/location the query mentions.
+
+        Collections are queried concurrently with one shared query vector for
+        up to candidate_pool neighbours each, hits are merged by memory id
+        (closest match wins) and the whole pool is scored in one NumPy pass with
+        alpha*semantic + beta*recency + gamma*importance, where recency decays
+        with turns since the memory was stored. Memories reached through a
+        mentioned entity get entity_boost on top.
+        """
+        n_results = max(top_k, self.candidate_pool)
+        query_embedding = self.embedding_engine.encode([query])
+
+        with self._lock:
+            current_turn = self.current_turn
+            # (collection, where filter, reached via a named entity)
+            targets = [(self.world_collection, None, False)]
+            if hierarchical:
+                npc_keys, location_keys = self._mentioned_entities(query)
+                if self.storage_mode == STORAGE_METADATA:
+                    conditions = [{tag: True} for tag in self._entity_tags(npc_keys, location_keys)]
+                    if conditions:
+                        where = conditions[0] if len(conditions) == 1 else {"$or": conditions}
+                        targets.append((self.world_collection, where, True))
+                else:
+                    targets += [(self.npc_collections[key], None, True) for key in npc_keys if key in self.npc_collections]
+                    targets += [(self.location_collections[key], None, True) for key in location_keys if key in self.location_collections]
+
+            if len(targets) == 1:
+                results = [self._query(self.world_collection, query_embedding, n_results)]
+            else:
+                futures = [
+                    self._query_executor.submit(self._query, collection, query_embedding, n_results, where)
+                    for collection, where, _ in targets
+                ]
+                results = [future.result() for future in futures]
+
+        candidates = {}  # memory_id -> [document, metadata, distance, via_entity]
+        for (_, _, via_entity), result in zip(targets, results):
+            if not result['ids'] or not result['ids'][0]:
+                continue
+            distances = result['distances'][0] if result.get('distances') else None
+            for i, raw_id in enumerate(result['ids'][0]):
+                metadata = result['metadatas'][0][i]
+                memory_id = metadata.get('memory_id') or self._base_memory_id(raw_id)
+                distance = distances[i] if distances else 0.5
+                candidate = candidates.get(memory_id)
+                if candidate is None:
+                    candidates[memory_id] = [result['documents'][0][i], metadata, distance, via_entity]
+                else:
+                    candidate[3] = candidate[3] or via_entity
+                    if distance < candidate[2]:
+                        candidate[2] = distance
+
+        if not candidates:
+            return []
+
+        with tracer.span("memory.rerank", candidates=len(candidates)):
+            pool = list(candidates.items())
+            count = len(pool)
+            scores = rerank_scores(
+                np.fromiter((c[2] for _, c in pool), dtype=np.float64, count=count),
+                np.fromiter((c[1].get('turn', 0) for _, c in pool), dtype=np.float64, count=count),
+                np.fromiter((c[1].get('importance', 0.5) for _, c in pool), dtype=np.float64, count=count),
+                np.fromiter((c[3] for _, c in pool), dtype=np.float64, count=count),
+                current_turn, self.alpha, self.beta, self.gamma, self.entity_boost, self.recency_half_life,
+                self.recency_floor
+            )
+            best = top_k_indices(scores, top_k)
+
+        memories = []
+        for index in best:
+            memory_id, (doc, metadata, _, _) = pool[index]
+            memories.append({
+                'memory_id': memory_id,
+                'text': doc,
+                'score': float(scores[index]),
+                'metadata': metadata
+            })
+        return memories
+
+    def _query(self, collection, query_embedding, n_results: int, where: Optional[Dict] = None):
+        with tracer.span("chroma.query", collection=collection.name, filtered=where is not None):
+            if where is None:
+                return collection.query(query_embeddings=query_embedding, n_results=n_results)
+            return collection.query(query_embeddings=query_embedding, n_results=n_results, where=where)
+
+    def _mentioned_entities(self, query: str):
+        """Keys of known NPCs and locations whose normalized name appears in the query"""
+        padded = f"_{self._normalize_name(query)}_"
+        npc_keys = [key for key in self.known_npcs if f"_{key}_" in padded]
+        location_keys = [key for key in self.known_locations if f"_{key}_" in padded]
+        return npc_keys, location_keys
+
+    def _base_memory_id(self, raw_id: str) -> str:
+        """Strip the _npc_<key> / _loc_<key> suffix of a hierarchical copy"""
+        for marker in ("_npc_", "_loc_"):
+            if marker in raw_id:
+                return raw_id.rsplit(marker, 1)[0]
+        return raw_id
+
+    def _hierarchy_copies(self, memories: List[Dict]) -> List:
+        """(collection, ids) pairs for the NPC/location copies of the given log entries"""
+        copies = {}
+        for mem in memories:
+            memory_id = mem.get('memory_id')
+            for npc in mem.get('npcs', []):
+                key = self._normalize_name(npc)
+                if key in self.npc_collections:
+                    copies.setdefault(("npc", key), set()).add(f"{memory_id}_npc_{key}")
+            for location in mem.get('locations', []):
+                key = self._normalize_name(location)
+                if key in self.location_collections:
+                    copies.setdefault(("loc", key), set()).add(f"{memory_id}_loc_{key}")
+        return [
+            (self.npc_collections[key] if kind == "npc" else self.location_collections[key], list(ids))
+            for (kind, key), ids in copies.items()
+        ]
+
+    def get_stats(self) -> Dict:
+        return {
+            'total_memories': self.world_collection.count(),
+            'npc_collections': len(self.npc_collections),
+            'location_collections': len(self.location_collections),
+            'tracked_npcs': len(self.known_npcs),
+            'tracked_locations': len(self.known_locations),
+            'storage_mode': self.storage_mode
+        }
+
+    def migrate_to_single_collection(self, batch_size: int = 1000) -> int:
+        """Fold the per-entity collections into npc_/loc_ tags on world memories and drop them.
+
+        Returns the number of world memories that were re-tagged. Copies whose
+        world entry no longer exists (already summarized) are discarded.
+        """
+        with self._lock:
+            tags = {}  # memory_id -> {tag: True}
+            sources = [("npc", self.npc_collections, self.known_npcs), ("loc", self.location_collections, self.known_locations)]
+            for kind, collections, known in sources:
+                for key, collection in collections.items():
+                    known.setdefault(key, key)
+                    result = collection.get(include=["metadatas"])
+                    for raw_id, metadata in zip(result["ids"], result["metadatas"]):
+                        memory_id = (metadata or {}).get("memory_id") or self._base_memory_id(raw_id)
+                        tags.setdefault(memory_id, {})[f"{kind}_{key}"] = True
+
+            memory_ids = list(tags)
+            migrated = 0
+            for start in range(0, len(memory_ids), batch_size):
+                existing = self.world_collection.get(ids=memory_ids[start:start + batch_size], include=["metadatas"])
+                if not existing["ids"]:
+                    continue
+                self.world_collection.update(
+                    ids=existing["ids"],
+                    metadatas=[{**metadata, **tags[memory_id]} for memory_id, metadata in zip(existing["ids"], existing["metadatas"])]
+                )
+                migrated += len(existing["ids"])
+
+            for _, collections, _ in sources:
+                for collection in collections.values():
+                    self.client.delete_collection(collection.name)
+            self.npc_collections = {}
+            self.location_collections = {}
+            self.storage_mode = STORAGE_METADATA
+
+        print(f"✓ Migrated {migrated} memories to single-collection storage")
+        return migrated
+
+    def get_recent_memories(self, n: int = 5) -> List[Dict]:
+        with self._lock:
+            results = self.world_collection.get(
+                limit=n,
+                include=['documents', 'metadatas']
+            )
+        if not results['documents']:
+            return []
+        memories = []
+        for i, doc in enumerate(results['documents']):
+            memories.append({
+                'text': doc,
+                'importance': results['metadatas'][i].get('importance', 0.5)
+            })
+        return memories
+
+    def export_state(self) -> Dict:
+        """Everything needed to reattach to this session's persisted collections"""
+        with self._lock:
+            return {
+                "memory_log": list(self.memory_log),
+                "last_summary_turn": self.last_summary_turn,
+                "current_turn": self.current_turn,
+                "storage_mode": self.storage_mode,
+                "known_npcs": dict(self.known_npcs),
+                "known_locations": dict(self.known_locations),
+                "npc_collections": list(self.npc_collections),
+                "location_collections": list(self.location_collections)
+            }
+
+    def load_state(self, state: Dict):
+        """Restore session bookkeeping and reopen the persisted entity collections.
+
+        A session saved in collections mode is migrated when this manager was
+        created in metadata mode; the reverse has no migration and raises ValueError.
+        """
+        requested_mode = self.storage_mode
+        saved_mode = state.get("storage_mode", requested_mode)
+        if saved_mode == STORAGE_METADATA and requested_mode == STORAGE_COLLECTIONS:
+            raise ValueError(
+                f"Session was saved with storage mode '{STORAGE_METADATA}' and cannot be reopened in "
+                f"'{STORAGE_COLLECTIONS}' mode; start it with storage_mode='{STORAGE_METADATA}'"
+            )
+        with self._lock:
+            self.memory_log = list(state.get("memory_log", []))
+            self.last_summary_turn = state.get("last_summary_turn", 0)
+            # Sessions saved before turn tracking: the newest logged memory marks the current turn
+            self.current_turn = state.get(
+                "current_turn", max((mem.get("turn", 0) for mem in self.memory_log), default=0)
+            )
+            self.storage_mode = saved_mode
+            self.known_npcs = dict(state.get("known_npcs", {}))
+            self.known_locations = dict(state.get("known_locations", {}))
+            self.npc_collections = {
+                key: self._get_or_create_collection(f"{self.collection_prefix}_npc_{key}")
+                for key in state.get("npc_collections", [])
+            }
+            self.location_collections = {
+                key: self._get_or_create_collection(f"{self.collection_prefix}_loc_{key}")
+                for key in state.get("location_collections", [])
+            }
+        if saved_mode != requested_mode:
+            print(f"Session was saved with '{saved_mode}' storage; migrating to '{requested_mode}'...")
+            self.migrate_to_single_collection()
+
+    def export_memory_log_json(self, filename: str):
+        with open(filename, 'w') as f:
+            json.dump(self.memory_log, f, indent=2)
+    def summarize_events(self, events: List[str]) -> str:
+        # Use dungeon_master's summarize_events if set, else fallback
+        if self.dungeon_master:
+            return self.dungeon_master.summarize_events(events)
+        return "Summary: " + " ".join(events)[:500]
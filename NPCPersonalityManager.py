@@ -1,256 +1,338 @@
-"""
-NPC Personality Manager - Bonus Feature
-Manages NPC personalities and evolution based on interactions
-"""
-
-from typing import Dict, List
-import json
-
-
-class NPCPersonalityManager:
-    """Manages NPC personalities and their evolution over time"""
-    
-    def __init__(self):
-        self.npcs = {}  # npc_name -> personality_vector
-        
-        # Default personality traits
-        self.default_traits = {
-            "friendly": 0.5,
-            "greedy": 0.5,
-            "fearful": 0.5,
-            "wise": 0.5,
-            "aggressive": 0.5,
-            "honest": 0.5,
-            "loyal": 0.5
-        }
-        
-        print("✓ NPC Personality Manager initialized")
-    
-    def initialize_npc(self, npc_name: str, custom_traits: Dict[str, float] = None):
-        """Initialize a new NPC with personality traits"""
-        npc_key = npc_name.lower().replace(" ", "_")
-        
-        if npc_key in self.npcs:
-            return  # Already exists
-        
-        # Start with defaults and override with custom traits
-        personality = self.default_traits.copy()
-        if custom_traits:
-            personality.update(custom_traits)
-        
-        self.npcs[npc_key] = {
-            "name": npc_name,
-            "personality": personality,
-            "interaction_count": 0,
-            "relationship_score": 0.5,  # Neutral starting point
-            "memory": []
-        }
-        
-        print(f"✓ Initialized NPC: {npc_name}")
-    
-    def analyze_sentiment(self, player_input: str, dm_response: str) -> Dict[str, float]:
-        """Simple sentiment analysis to determine interaction impact"""
-        # Keywords for different sentiments
-        positive_keywords = ["thank", "help", "gift", "friend", "save", "protect"]
-        negative_keywords = ["attack", "steal", "threaten", "betray", "lie", "harm"]
-        
-        player_lower = player_input.lower()
-        dm_lower = dm_response.lower()
-        
-        sentiment = {
-            "friendliness_delta": 0.0,
-            "trust_delta": 0.0,
-            "fear_delta": 0.0
-        }
-        
-        # Analyze player input
-        for keyword in positive_keywords:
-            if keyword in player_lower:
-                sentiment["friendliness_delta"] += 0.05
-                sentiment["trust_delta"] += 0.03
-        
-        for keyword in negative_keywords:
-            if keyword in player_lower:
-                sentiment["friendliness_delta"] -= 0.08
-                sentiment["trust_delta"] -= 0.05
-                sentiment["fear_delta"] += 0.06
-        
-        return sentiment
-    
-    def update_npc_personality(
-        self, 
-        npc_name: str, 
-        player_input: str, 
-        dm_response: str
-    ):
-        """Update NPC personality based on interaction"""
-        npc_key = npc_name.lower().replace(" ", "_")
-        
-        # Initialize if doesn't exist
-        if npc_key not in self.npcs:
-            self.initialize_npc(npc_name)
-        
-        npc = self.npcs[npc_key]
-        
-        # Analyze sentiment of interaction
-        sentiment = self.analyze_sentiment(player_input, dm_response)
-        
-        # Update personality traits
-        personality = npc["personality"]
-        
-        # Friendly trait
-        personality["friendly"] = self._clamp(
-            personality["friendly"] + sentiment["friendliness_delta"],
-            0.0, 1.0
-        )
-        
-        # Honest/Trust related (inverse of fearful)
-        personality["honest"] = self._clamp(
-            personality["honest"] + sentiment["trust_delta"],
-            0.0, 1.0
-        )
-        
-        # Fearful trait
-        personality["fearful"] = self._clamp(
-            personality["fearful"] + sentiment["fear_delta"],
-            0.0, 1.0
-        )
-        
-        # Loyal trait (increases with positive interactions)
-        if sentiment["friendliness_delta"] > 0:
-            personality["loyal"] = self._clamp(
-                personality["loyal"] + 0.02,
-                0.0, 1.0
-            )
-        
-        # Update relationship score
-        relationship_change = (
-            sentiment["friendliness_delta"] + 
-            sentiment["trust_delta"] - 
-            sentiment["fear_delta"] * 0.5
-        )
-        npc["relationship_score"] = self._clamp(
-            npc["relationship_score"] + relationship_change,
-            0.0, 1.0
-        )
-        
-        # Increment interaction count
-        npc["interaction_count"] += 1
-        
-        # Store interaction memory
-        npc["memory"].append({
-            "player_action": player_input,
-            "npc_response_context": dm_response[:100],  # Store snippet
-            "sentiment": sentiment,
-            "turn": npc["interaction_count"]
-        })
-        
-        # Keep only last 10 interactions
-        if len(npc["memory"]) > 10:
-            npc["memory"] = npc["memory"][-10:]
-    
-    def _clamp(self, value: float, min_val: float, max_val: float) -> float:
-        """Clamp value between min and max"""
-        return max(min_val, min(max_val, value))
-    
-    def get_npc_personality(self, npc_name: str) -> Dict:
-        """Get current personality state of an NPC"""
-        npc_key = npc_name.lower().replace(" ", "_")
-        
-        if npc_key not in self.npcs:
-            return None
-        
-        return self.npcs[npc_key].copy()
-    
-    def get_personality_description(self, npc_name: str) -> str:
-        """Get human-readable personality description"""
-        npc = self.get_npc_personality(npc_name)
-        
-        if not npc:
-            return f"{npc_name} is unknown."
-        
-        personality = npc["personality"]
-        relationship = npc["relationship_score"]
-        
-        # Generate description based on traits
-        traits = []
-        
-        if personality["friendly"] > 0.7:
-            traits.append("very friendly")
-        elif personality["friendly"] < 0.3:
-            traits.append("cold and distant")
-        
-        if personality["wise"] > 0.7:
-            traits.append("wise")
-        
-        if personality["fearful"] > 0.7:
-            traits.append("fearful")
-        elif personality["fearful"] < 0.3:
-            traits.append("brave")
-        
-        if personality["honest"] > 0.7:
-            traits.append("trustworthy")
-        elif personality["honest"] < 0.3:
-            traits.append("deceptive")
-        
-        if personality["greedy"] > 0.7:
-            traits.append("greedy")
-        
-        if personality["loyal"] > 0.7:
-            traits.append("loyal")
-        
-        # Relationship status
-        if relationship > 0.8:
-            rel_status = "considers you a close ally"
-        elif relationship > 0.6:
-            rel_status = "is friendly toward you"
-        elif relationship > 0.4:
-            rel_status = "is neutral toward you"
-        elif relationship > 0.2:
-            rel_status = "is wary of you"
-        else:
-            rel_status = "is hostile toward you"
-        
-        trait_str = ", ".join(traits) if traits else "average"
-        
-        return f"{npc['name']} is {trait_str} and {rel_status}. (Interactions: {npc['interaction_count']})"
-    
-    def get_all_npcs(self) -> List[str]:
-        """Get list of all tracked NPCs"""
-        return [npc["name"] for npc in self.npcs.values()]
-    
-    def export_npc_data(self) -> str:
-        """Export NPC data as JSON"""
-        return json.dumps(self.npcs, indent=2)
-    def export_personality_log(self) -> str:
-        return json.dumps(self.npcs, indent=2)
-
-    def get_recent_npc_interactions(self, npc_name: str, count: int=3) -> List[Dict]:
-        npc = self.get_npc_personality(npc_name)
-        if npc and npc.get("memory"):
-            return npc["memory"][-count:]
-        return []
-
-    
-    def get_npc_context_for_dm(self, npc_name: str) -> str:
-        """Get personality context string for DM to use"""
-        npc = self.get_npc_personality(npc_name)
-        
-        if not npc:
-            return ""
-        
-        personality = npc["personality"]
-        relationship = npc["relationship_score"]
-        
-        context = f"\n--- NPC Personality Context for {npc['name']} ---\n"
-        context += f"Relationship Score: {relationship:.2f}\n"
-        context += f"Traits: "
-        context += ", ".join([f"{k}={v:.2f}" for k, v in personality.items()])
-        context += f"\nInteractions: {npc['interaction_count']}\n"
-        
-        if npc["memory"]:
-            context += "\nRecent interactions:\n"
-            for mem in npc["memory"][-3:]:
-                context += f"- Turn {mem['turn']}: {mem['player_action'][:50]}...\n"
-        
+"""
+NPC Personality Manager - Bonus Feature
+Manages NPC personalities and evolution based on interactions
+"""
+
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Optional
+import json
+
+import numpy as np
+
+from KeywordMatcher import KeywordHits, keyword_matcher
+
+
+TRAITS = ("friendly", "greedy", "fearful", "wise", "aggressive", "honest", "loyal")
+TRAIT_INDEX = {trait: column for column, trait in enumerate(TRAITS)}
+
+
+def npc_key_for(npc_name: str) -> str:
+    return npc_name.lower().replace(" ", "_")
+
+
+class NPCView(Mapping):
+    """Read-only npc_key -> NPC mapping over a manager's matrix store.
+
+    Rows are rendered when looked up; writes raise TypeError instead of landing
+    on a throwaway copy. Change NPCs through update_npcs or apply_deltas.
+    """
+
+    def __init__(self, manager: "NPCPersonalityManager"):
+        self._manager = manager
+
+    def __getitem__(self, npc_key: str) -> Mapping:
+        npc = self._manager._row_dict(self._manager.index[npc_key])
+        npc["personality"] = MappingProxyType(npc["personality"])
+        npc["memory"] = tuple(npc["memory"])
+        return MappingProxyType(npc)
+
+    def __iter__(self):
+        return iter(self._manager.index)
+
+    def __len__(self) -> int:
+        return len(self._manager.index)
+
+
+class NPCPersonalityManager:
+    """Manages NPC personalities and their evolution over time
+
+    Traits live in one NPC x trait float matrix (row per NPC, column per trait)
+    with a key -> row index, so a turn touching several NPCs is one clipped add.
+    """
+    
+    def __init__(self, initial_capacity: int = 64):
+        # Default personality traits
+        self.default_traits = {trait: 0.5 for trait in TRAITS}
+        
+        self.index: Dict[str, int] = {}  # npc_key -> row
+        self.traits = np.empty((initial_capacity, len(TRAITS)))
+        self.relationship = np.empty(initial_capacity)
+        self.interaction_counts = np.zeros(initial_capacity, dtype=np.int64)
+        self.names: List[str] = []
+        self.memories: Dict[int, List[Dict]] = {}  # row -> last 10 interactions, once it has any
+        
+        print("✓ NPC Personality Manager initialized")
+    
+    def _grow(self, needed: int):
+        capacity = len(self.relationship)
+        if needed <= capacity:
+            return
+        # Rows past len(self) are scratch; initialize_npc overwrites them
+        capacity = max(needed, capacity * 2)
+        self.traits = np.resize(self.traits, (capacity, len(TRAITS)))
+        self.relationship = np.resize(self.relationship, capacity)
+        self.interaction_counts = np.resize(self.interaction_counts, capacity)
+    
+    def initialize_npc(self, npc_name: str, custom_traits: Dict[str, float] = None, verbose: bool = True) -> int:
+        """Initialize a new NPC with personality traits; returns its row"""
+        npc_key = npc_key_for(npc_name)
+        
+        if npc_key in self.index:
+            return self.index[npc_key]  # Already exists
+        
+        row = len(self.names)
+        self._grow(row + 1)
+        
+        # Start with defaults and override with custom traits
+        self.traits[row] = [self.default_traits[trait] for trait in TRAITS]
+        for trait, value in (custom_traits or {}).items():
+            if trait in TRAIT_INDEX:
+                self.traits[row, TRAIT_INDEX[trait]] = value
+        self.relationship[row] = 0.5  # Neutral starting point
+        self.interaction_counts[row] = 0
+        self.names.append(npc_name)
+        self.index[npc_key] = row
+        
+        if verbose:
+            print(f"✓ Initialized NPC: {npc_name}")
+        return row
+    
+    def analyze_sentiment(
+        self,
+        player_input: str,
+        dm_response: str,
+        hits: Optional[KeywordHits] = None
+    ) -> Dict[str, float]:
+        """Simple sentiment analysis to determine interaction impact
+
+        hits may be the turn's keyword scan of the combined text, which starts with player_input.
+        """
+        if hits is None:
+            hits = keyword_matcher.scan(player_input)
+        
+        sentiment = {
+            "friendliness_delta": 0.0,
+            "trust_delta": 0.0,
+            "fear_delta": 0.0
+        }
+        
+        # Analyze player input
+        for _ in hits.found("sentiment_positive", 0, len(player_input)):
+            sentiment["friendliness_delta"] += 0.05
+            sentiment["trust_delta"] += 0.03
+        
+        for _ in hits.found("sentiment_negative", 0, len(player_input)):
+            sentiment["friendliness_delta"] -= 0.08
+            sentiment["trust_delta"] -= 0.05
+            sentiment["fear_delta"] += 0.06
+        
+        return sentiment
+    
+    def update_npc_personality(
+        self, 
+        npc_name: str, 
+        player_input: str, 
+        dm_response: str,
+        sentiment: Optional[Dict[str, float]] = None
+    ):
+        """Update NPC personality based on interaction (pass sentiment to reuse one analysis across NPCs)"""
+        self.update_npcs([npc_name], player_input, dm_response, sentiment=sentiment)
+    
+    def update_npcs(
+        self,
+        npc_names: Iterable[str],
+        player_input: str,
+        dm_response: str,
+        sentiment: Optional[Dict[str, float]] = None
+    ):
+        """Apply one interaction to every NPC in the turn as a single clipped matrix update"""
+        rows = []
+        for npc_name in npc_names:
+            row = self.index.get(npc_key_for(npc_name))
+            if row is None:
+                row = self.initialize_npc(npc_name)  # Initialize if doesn't exist
+            if row not in rows:
+                rows.append(row)
+        if not rows:
+            return
+        
+        # Analyze sentiment of interaction
+        if sentiment is None:
+            sentiment = self.analyze_sentiment(player_input, dm_response)
+        
+        trait_delta = np.zeros(len(TRAITS))
+        trait_delta[TRAIT_INDEX["friendly"]] = sentiment["friendliness_delta"]
+        trait_delta[TRAIT_INDEX["honest"]] = sentiment["trust_delta"]  # Honest/Trust related
+        trait_delta[TRAIT_INDEX["fearful"]] = sentiment["fear_delta"]
+        if sentiment["friendliness_delta"] > 0:
+            trait_delta[TRAIT_INDEX["loyal"]] = 0.02  # Grows with positive interactions
+        relationship_change = (
+            sentiment["friendliness_delta"] + 
+            sentiment["trust_delta"] - 
+            sentiment["fear_delta"] * 0.5
+        )
+        self.apply_deltas(rows, trait_delta, relationship_change)
+        
+        for row in rows:
+            # Store interaction memory, keeping only the last 10
+            memory = self.memories.setdefault(row, [])
+            memory.append({
+                "player_action": player_input,
+                "npc_response_context": dm_response[:100],  # Store snippet
+                "sentiment": sentiment,
+                "turn": int(self.interaction_counts[row])
+            })
+            if len(memory) > 10:
+                del memory[:-10]
+    
+    def apply_deltas(self, rows: List[int], trait_deltas, relationship_deltas=0.0):
+        """Clipped add of trait deltas (one row per NPC, or one row for all) and count one interaction each"""
+        rows = np.asarray(rows, dtype=np.intp)
+        # Raw ufuncs with out= rather than np.clip: its dispatch overhead dominates the 1-3 NPC turns
+        traits = self.traits[rows]
+        traits += trait_deltas
+        self.traits[rows] = np.minimum(np.maximum(traits, 0.0, out=traits), 1.0, out=traits)
+        relationship = self.relationship[rows]
+        relationship += relationship_deltas
+        self.relationship[rows] = np.minimum(np.maximum(relationship, 0.0, out=relationship), 1.0, out=relationship)
+        self.interaction_counts[rows] += 1
+    
+    def _row_dict(self, row: int) -> Dict:
+        return {
+            "name": self.names[row],
+            "personality": dict(zip(TRAITS, self.traits[row].tolist())),
+            "interaction_count": int(self.interaction_counts[row]),
+            "relationship_score": float(self.relationship[row]),
+            "memory": list(self.memories.get(row, []))
+        }
+    
+    @property
+    def npcs(self) -> "NPCView":
+        """Read-only npc_key -> per-NPC view in the layout used before the matrix store"""
+        return NPCView(self)
+    
+    def _snapshot(self) -> Dict[str, Dict]:
+        return {npc_key: self._row_dict(row) for npc_key, row in self.index.items()}
+    
+    def get_npc_personality(self, npc_name: str) -> Dict:
+        """Get current personality state of an NPC"""
+        row = self.index.get(npc_key_for(npc_name))
+        
+        if row is None:
+            return None
+        
+        return self._row_dict(row)
+    
+    def get_personality_description(self, npc_name: str) -> str:
+        """Get human-readable personality description"""
+        npc = self.get_npc_personality(npc_name)
+        
+        if not npc:
+            return f"{npc_name} is unknown."
+        
+        personality = npc["personality"]
+        relationship = npc["relationship_score"]
+        
+        # Generate description based on traits
+        traits = []
+        
+        if personality["friendly"] > 0.7:
+            traits.append("very friendly")
+        elif personality["friendly"] < 0.3:
+            traits.append("cold and distant")
+        
+        if personality["wise"] > 0.7:
+            traits.append("wise")
+        
+        if personality["fearful"] > 0.7:
+            traits.append("fearful")
+        elif personality["fearful"] < 0.3:
+            traits.append("brave")
+        
+        if personality["honest"] > 0.7:
+            traits.append("trustworthy")
+        elif personality["honest"] < 0.3:
+            traits.append("deceptive")
+        
+        if personality["greedy"] > 0.7:
+            traits.append("greedy")
+        
+        if personality["loyal"] > 0.7:
+            traits.append("loyal")
+        
+        # Relationship status
+        if relationship > 0.8:
+            rel_status = "considers you a close ally"
+        elif relationship > 0.6:
+            rel_status = "is friendly toward you"
+        elif relationship > 0.4:
+            rel_status = "is neutral toward you"
+        elif relationship > 0.2:
+            rel_status = "is wary of you"
+        else:
+            rel_status = "is hostile toward you"
+        
+        trait_str = ", ".join(traits) if traits else "average"
+        
+        return f"{npc['name']} is {trait_str} and {rel_status}. (Interactions: {npc['interaction_count']})"
+    
+    def get_all_npcs(self) -> List[str]:
+        """Get list of all tracked NPCs"""
+        return list(self.names)
+    
+    def export_npc_data(self) -> str:
+        """Export NPC data as JSON"""
+        return json.dumps(self._snapshot(), indent=2)
+    def export_state(self) -> Dict:
+        """JSON-serializable snapshot for session persistence"""
+        return json.loads(json.dumps(self._snapshot()))
+
+    def load_state(self, state: Dict):
+        self.index = {}
+        self.names = []
+        self.memories = {}
+        self._grow(len(state))
+        for npc_key, npc in state.items():
+            row = len(self.names)
+            personality = npc.get("personality", {})
+            self.traits[row] = [personality.get(trait, self.default_traits[trait]) for trait in TRAITS]
+            self.relationship[row] = npc.get("relationship_score", 0.5)
+            self.interaction_counts[row] = npc.get("interaction_count", 0)
+            self.names.append(npc.get("name", npc_key))
+            if npc.get("memory"):
+                self.memories[row] = json.loads(json.dumps(npc["memory"]))
+            self.index[npc_key] = row
+
+    def export_personality_log(self) -> str:
+        return json.dumps(self._snapshot(), indent=2)
+
+    def get_recent_npc_interactions(self, npc_name: str, count: int=3) -> List[Dict]:
+        npc = self.get_npc_personality(npc_name)
+        if npc and npc.get("memory"):
+            return npc["memory"][-count:]
+        return []
+
+    
+    def get_npc_context_for_dm(self, npc_name: str) -> str:
+        """Get personality context string for DM to use"""
+        npc = self.get_npc_personality(npc_name)
+        
+        if not npc:
+            return ""
+        
+        personality = npc["personality"]
+        relationship = npc["relationship_score"]
+        
+        context = f"\n--- NPC Personality Context for {npc['name']} ---\n"
+        context += f"Relationship Score: {relationship:.2f}\n"
+        context += f"Traits: "
+        context += ", ".join([f"{k}={v:.2f}" for k, v in personality.items()])
+        context += f"\nInteractions: {npc['interaction_count']}\n"
+        
+        if npc["memory"]:
+            context += "\nRecent interactions:\n"
+            for mem in npc["memory"][-3:]:
+                context += f"- Turn {mem['turn']}: {mem['player_action'][:50]}...\n"
+        
         return context
\ No newline at end of file
@@ -0,0 +1,195 @@
+"""
+Perf Tracer - Lightweight span tracing for the turn pipeline
+Spans are context managers around agent calls, Chroma queries, spaCy parses
+and LLM requests. Durations feed rolling per-span histograms and a bounded
+event log that can be exported as Chrome trace or OpenTelemetry JSON.
+When disabled, span() returns a shared no-op object and records nothing.
+"""
+
+from collections import deque
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+import json
+import os
+import statistics
+import threading
+import time
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attributes):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+# (trace_id, span_id) of the span currently open in this context
+_current_span: ContextVar[Optional[tuple]] = ContextVar("perf_current_span", default=None)
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "attributes", "trace_id", "span_id", "parent_id", "start_ns", "_token")
+
+    def __init__(self, tracer: "PerfTracer", name: str, attributes: Dict):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        parent = _current_span.get()
+        self.span_id = self.tracer._new_id()
+        if parent is None:
+            self.trace_id, self.parent_id = self.tracer._new_id(), None
+        else:
+            self.trace_id, self.parent_id = parent
+        self._token = _current_span.set((self.trace_id, self.span_id))
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end_ns = time.perf_counter_ns()
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        self.tracer._record(self, end_ns)
+        return False
+
+
+class PerfTracer:
+    """Process-wide tracer; enable with DM_TRACE=1, the `perf on` console command or enable()"""
+
+    def __init__(self, enabled: bool = False, max_events: int = 20000, histogram_window: int = 500):
+        self.enabled = enabled
+        self.histogram_window = histogram_window
+        self.events = deque(maxlen=max_events)
+        self.histograms: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+        self._next_id = 0
+        # Converts perf_counter_ns readings to Unix epoch nanoseconds for export
+        self._epoch_offset_ns = time.time_ns() - time.perf_counter_ns()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def span(self, name: str, **attributes):
+        if not self.enabled:
+            return _NOOP_SPAN
+        return _Span(self, name, attributes)
+
+    def _new_id(self) -> int:
+        with self._lock:
+            self._next_id += 1
+            return self._next_id
+
+    def _record(self, span: _Span, end_ns: int):
+        duration_ns = end_ns - span.start_ns
+        event = (span.name, span.start_ns, duration_ns, threading.get_ident(),
+                 span.trace_id, span.span_id, span.parent_id, span.attributes)
+        with self._lock:
+            self.events.append(event)
+            histogram = self.histograms.get(span.name)
+            if histogram is None:
+                histogram = self.histograms[span.name] = deque(maxlen=self.histogram_window)
+            histogram.append(duration_ns / 1e6)
+
+    def reset(self):
+        with self._lock:
+            self.events.clear()
+            self.histograms.clear()
+
+    def summary(self) -> Dict[str, Dict]:
+        """Per span name: count, mean, p50, p95 and max in milliseconds over the rolling window"""
+        with self._lock:
+            windows = {name: sorted(samples) for name, samples in self.histograms.items()}
+        summary = {}
+        for name, samples in windows.items():
+            if not samples:
+                continue
+            summary[name] = {
+                "count": len(samples),
+                "mean_ms": statistics.fmean(samples),
+                "p50_ms": samples[len(samples) // 2],
+                "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+                "max_ms": samples[-1]
+            }
+        return summary
+
+    def format_summary(self) -> str:
+        summary = self.summary()
+        if not summary:
+            return "No spans recorded" + ("" if self.enabled else " (tracing is off; use 'perf on')")
+        lines = [f"{'span':<24} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}"]
+        for name, stats in sorted(summary.items(), key=lambda item: -item[1]["p50_ms"] * item[1]["count"]):
+            lines.append(f"{name:<24} {stats['count']:>6} {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} {stats['max_ms']:>9.2f}")
+        return "\n".join(lines)
+
+    def _snapshot(self) -> List[tuple]:
+        with self._lock:
+            return list(self.events)
+
+    def chrome_trace(self) -> Dict:
+        """Chrome trace event format (open in chrome://tracing or Perfetto)"""
+        pid = os.getpid()
+        return {
+            "traceEvents": [
+                {
+                    "name": name,
+                    "ph": "X",
+                    "ts": (start_ns + self._epoch_offset_ns) / 1000,
+                    "dur": duration_ns / 1000,
+                    "pid": pid,
+                    "tid": thread_id,
+                    "args": {key: str(value) for key, value in attributes.items()}
+                }
+                for name, start_ns, duration_ns, thread_id, _, _, _, attributes in self._snapshot()
+            ],
+            "displayTimeUnit": "ms"
+        }
+
+    def otel_json(self, service_name: str = "ai-dungeon-master") -> Dict:
+        """OTLP/JSON ExportTraceServiceRequest with one resource and one scope"""
+        spans = []
+        for name, start_ns, duration_ns, thread_id, trace_id, span_id, parent_id, attributes in self._snapshot():
+            span = {
+                "traceId": f"{trace_id:032x}",
+                "spanId": f"{span_id:016x}",
+                "name": name,
+                "kind": 1,
+                "startTimeUnixNano": str(start_ns + self._epoch_offset_ns),
+                "endTimeUnixNano": str(start_ns + duration_ns + self._epoch_offset_ns),
+                "attributes": [
+                    {"key": key, "value": {"stringValue": str(value)}}
+                    for key, value in {**attributes, "thread.id": thread_id}.items()
+                ]
+            }
+            if parent_id is not None:
+                span["parentSpanId"] = f"{parent_id:016x}"
+            spans.append(span)
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]},
+                "scopeSpans": [{"scope": {"name": "PerfTracer"}, "spans": spans}]
+            }]
+        }
+
+    def export(self, path: str, format: str = "chrome"):
+        data = self.otel_json() if format == "otel" else self.chrome_trace()
+        with open(path, "w") as f:
+            json.dump(data, f)
+
+
+tracer = PerfTracer(enabled=os.getenv("DM_TRACE") == "1")
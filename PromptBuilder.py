@@ -0,0 +1,163 @@
+"""
+Prompt Builder - Token-budgeted prompt assembly for the Dungeon Master
+Fits recent history and validated memories into a fixed token budget, dropping
+or compressing the least valuable items first. The system prompt is always the
+first message and never changes, so provider-side prefix caching keeps working.
+"""
+
+from typing import Dict, List, Optional, Tuple
+import re
+
+try:
+    import tiktoken
+except ImportError:  # Optional: fall back to a character-based estimate
+    tiktoken = None
+
+
+MESSAGE_OVERHEAD_TOKENS = 4  # Role markers and separators per chat message
+SUMMARY_HEADER = "\n\nStory so far:\n"
+HISTORY_HEADER = "\n\nRecent conversation:\n"
+MEMORY_HEADER = "\n\nRelevant memories from previous events:\n"
+
+
+class TokenCounter:
+    """Counts tokens with tiktoken when installed, otherwise ~4 characters per token"""
+
+    def __init__(self, encoding_name: str = "cl100k_base"):
+        self.encoding = None
+        if tiktoken is not None:
+            try:
+                self.encoding = tiktoken.get_encoding(encoding_name)
+            except Exception:
+                self.encoding = None  # Encoding files unavailable offline
+        self.name = "tiktoken" if self.encoding is not None else "heuristic"
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self.encoding is not None:
+            return len(self.encoding.encode(text))
+        return max(1, (len(text) + 3) // 4)
+
+
+def first_sentence(text: str) -> str:
+    match = re.match(r'\s*(.+?[.!?])(\s|$)', text, re.DOTALL)
+    return match.group(1) if match else text
+
+
+class PromptBuilder:
+    """Assembles DM response prompts that fit within budget_tokens"""
+
+    def __init__(self, budget_tokens: int = 2000, max_history_turns: Optional[int] = 5, counter: Optional[TokenCounter] = None):
+        self.budget_tokens = budget_tokens
+        self.max_history_turns = max_history_turns  # None: keep every turn passed in and let the budget decide
+        self.counter = counter or TokenCounter()
+        self.history_decay = 0.15  # Priority lost per turn of age; the newest turn has priority 1.0
+
+    def build(
+        self,
+        system_prompt: str,
+        player_input: str,
+        memories: List[Dict],
+        history: List[Dict],
+        summary: str = ""
+    ) -> Tuple[List[Dict], Dict]:
+        """Return the chat messages and a report of what was kept, compressed and dropped
+
+        The rolling summary of older turns is always included and counted as fixed cost.
+        """
+        history = list(history)
+        if self.max_history_turns is not None:
+            history = history[-self.max_history_turns:]
+        fixed_tokens = (
+            self.counter.count(system_prompt)
+            + self.counter.count(self._render_user_prompt(player_input, [], [], summary))
+            + self.counter.count(HISTORY_HEADER)
+            + self.counter.count(MEMORY_HEADER)
+            + 2 * MESSAGE_OVERHEAD_TOKENS
+        )
+        remaining = self.budget_tokens - fixed_tokens
+
+        # (priority, kind, index) for every candidate; the highest priority claims budget first
+        candidates = [(mem.get('score', 0.0), "memory", i) for i, mem in enumerate(memories)]
+        candidates += [(1.0 - self.history_decay * (len(history) - 1 - i), "history", i) for i in range(len(history))]
+        candidates.sort(key=lambda c: c[0], reverse=True)
+
+        chosen_memories: Dict[int, str] = {}
+        chosen_history: Dict[int, Tuple[str, str]] = {}
+        compressed = 0
+        for _, kind, i in candidates:
+            if kind == "memory":
+                options = [memories[i]['text'], self._shorten(memories[i]['text'])]
+                render = self._render_memory
+            else:
+                turn = history[i]
+                options = [turn['dm'], first_sentence(turn['dm'])]
+                render = lambda text, turn=turn: self._render_turn(turn['player'], text)
+
+            for option_index, option in enumerate(dict.fromkeys(options)):
+                cost = self.counter.count(render(option))
+                if cost <= remaining:
+                    remaining -= cost
+                    if kind == "memory":
+                        chosen_memories[i] = option
+                    else:
+                        chosen_history[i] = (history[i]['player'], option)
+                    compressed += option_index > 0
+                    break
+
+        kept_history = [chosen_history[i] for i in sorted(chosen_history)]
+        kept_memories = [chosen_memories[i] for i in sorted(chosen_memories)]
+        user_prompt = self._render_user_prompt(player_input, kept_history, kept_memories, summary)
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+
+        report = {
+            "tokens": self.counter.count(system_prompt) + self.counter.count(user_prompt) + 2 * MESSAGE_OVERHEAD_TOKENS,
+            "budget": self.budget_tokens,
+            "tokenizer": self.counter.name,
+            "history_kept": len(kept_history),
+            "history_total": len(history),
+            "memories_kept": len(kept_memories),
+            "memories_total": len(memories),
+            "compressed": compressed
+        }
+        return messages, report
+
+    def _shorten(self, text: str, words: int = 25) -> str:
+        parts = text.split()
+        return text if len(parts) <= words else " ".join(parts[:words]) + "..."
+
+    @staticmethod
+    def _render_turn(player: str, dm: str) -> str:
+        return f"Player: {player}\nDM: {dm}\n\n"
+
+    @staticmethod
+    def _render_memory(text: str) -> str:
+        return f"- {text}\n"
+
+    def _render_user_prompt(
+        self,
+        player_input: str,
+        history: List[Tuple[str, str]],
+        memories: List[str],
+        summary: str = ""
+    ) -> str:
+        # Same layout as the original unbudgeted prompt, with the rolling summary in front
+        summary_str = f"{SUMMARY_HEADER}{summary}" if summary else ""
+
+        history_str = ""
+        if history:
+            history_str = HISTORY_HEADER + "".join(self._render_turn(p, d) for p, d in history)
+
+        context_str = ""
+        if memories:
+            context_str = MEMORY_HEADER + "".join(self._render_memory(m) for m in memories)
+
+        return f"""{summary_str}{history_str}{context_str}
+
+Current player action: {player_input}
+
+Respond as the Dungeon Master, continuing the story based on this action. Integrate relevant memories naturally and keep the narrative engaging."""
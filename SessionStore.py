@@ -0,0 +1,40 @@
+"""
+Session Store - On-disk session state next to the persistent ChromaDB store
+Memories and their embeddings live in Chroma; this keeps the rest of a session
+(turn counter, memory log, NPC and quest state, history) as one JSON file per session
+"""
+
+from typing import Dict, List, Optional
+import json
+import os
+import re
+
+
+class SessionStore:
+    """Saves and restores per-session state as JSON under <persist_directory>/sessions"""
+
+    def __init__(self, persist_directory: str):
+        self.directory = os.path.join(persist_directory, "sessions")
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, session_id: str) -> str:
+        safe_id = re.sub(r'[^A-Za-z0-9_-]+', '_', session_id)
+        return os.path.join(self.directory, f"{safe_id}.json")
+
+    def save(self, session_id: str, state: Dict):
+        """Write atomically so a crash mid-save never leaves a truncated session"""
+        path = self._path(session_id)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+
+    def load(self, session_id: str) -> Optional[Dict]:
+        path = self._path(session_id)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def list_sessions(self) -> List[str]:
+        return sorted(name[:-5] for name in os.listdir(self.directory) if name.endswith(".json"))
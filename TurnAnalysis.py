@@ -0,0 +1,178 @@
+"""
+Turn Analysis - One NLP pass per turn
+Parses a turn's text once and shares entities, sentences, importance scores and
+keyword hits with the memory, NPC and quest subsystems
+"""
+
+from typing import Dict, List, Optional, Set, Tuple
+import re
+import threading
+
+from KeywordMatcher import KEYWORD_TABLES, KeywordHits, keyword_matcher
+from PerfTracer import tracer
+
+
+SENTENCE_BOUNDARY = re.compile(r'[.!?]+')
+
+# Entity extraction only needs NER; skip everything else the pipeline ships with
+UNUSED_PIPES = ["parser", "lemmatizer", "tagger", "attribute_ruler"]
+
+HIGH_IMPORTANCE_KEYWORDS = KEYWORD_TABLES["importance_high"]
+MEDIUM_IMPORTANCE_KEYWORDS = KEYWORD_TABLES["importance_medium"]
+
+
+def load_nlp(model_name: str = "en_core_web_sm"):
+    """Load a spaCy pipeline with only the components NER depends on"""
+    import spacy  # Deferred so the text helpers here import without spaCy installed
+
+    return spacy.load(model_name, exclude=UNUSED_PIPES)
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split narrative text into storable sentences (fragments of 10 chars or less are dropped)"""
+    sentences = SENTENCE_BOUNDARY.split(text)
+    return [s.strip() for s in sentences if len(s.strip()) > 10]
+
+
+def sentence_spans(text: str, offset: int = 0) -> List[Tuple[str, int, int]]:
+    """split_sentences plus each sentence's (start, end) in text, shifted by offset"""
+    spans = []
+    pos = 0
+    for match in list(SENTENCE_BOUNDARY.finditer(text)) + [None]:
+        end = match.start() if match else len(text)
+        sentence = text[pos:end].strip()
+        if len(sentence) > 10:
+            spans.append((sentence, offset + pos, offset + end))
+        pos = match.end() if match else end
+    return spans
+
+
+class SentenceStream:
+    """Incremental splitter for streamed text.
+
+    Yields exactly the sentences split_sentences would produce for the full
+    text: a sentence is released only once the punctuation run ending it is
+    followed by another character, so a run split across chunks stays whole.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        self._buffer += text
+        completed = []
+        pos = 0
+        for match in SENTENCE_BOUNDARY.finditer(self._buffer):
+            if match.end() == len(self._buffer):
+                break
+            completed.append(self._buffer[pos:match.start()])
+            pos = match.end()
+        self._buffer = self._buffer[pos:]
+        return [s.strip() for s in completed if len(s.strip()) > 10]
+
+    def flush(self) -> List[str]:
+        rest, self._buffer = self._buffer, ""
+        return split_sentences(rest)
+
+
+def calculate_importance(
+    text: str,
+    hits: Optional[KeywordHits] = None,
+    start: int = 0,
+    end: Optional[int] = None
+) -> float:
+    """0.5 plus 0.1 per distinct high and 0.05 per distinct medium keyword.
+
+    Pass a turn's hits and the text's span in them to skip rescanning.
+    """
+    if hits is None:
+        hits, start, end = keyword_matcher.scan(text), 0, None
+    return importance_score(hits.found("importance_high", start, end), hits.found("importance_medium", start, end))
+
+
+def importance_score(high: Set[str], medium: Set[str]) -> float:
+    return min(0.5 + 0.1 * len(high) + 0.05 * len(medium), 1.0)
+
+
+def span_importances(hits: KeywordHits, spans: List[Tuple[int, int]]) -> List[float]:
+    """calculate_importance for many sentences of one scan, in two walks over the hits"""
+    return [
+        importance_score(high, medium)
+        for high, medium in zip(hits.found_in_spans("importance_high", spans), hits.found_in_spans("importance_medium", spans))
+    ]
+
+
+class TurnAnalysis:
+    """Everything derived from one turn's text, computed once"""
+
+    def __init__(
+        self,
+        player_input: str,
+        dm_response: str,
+        turn_number: int,
+        doc,
+        entities: Dict[str, List[str]],
+        response_entities: Dict[str, List[str]],
+        sentences: List[str],
+        importances: List[float],
+        keyword_hits: Optional[KeywordHits] = None
+    ):
+        self.player_input = player_input
+        self.dm_response = dm_response
+        self.turn_number = turn_number
+        self.doc = doc
+        self.entities = entities                    # From player input + DM response
+        self.response_entities = response_entities  # Only those mentioned by the DM
+        self.sentences = sentences
+        self.importances = importances
+
+        self.combined_text = f"{player_input} {dm_response}"
+        self.combined_lower = self.combined_text.lower()
+        self.response_lower = dm_response.lower()
+        self.response_start = len(player_input) + 1  # Offset of dm_response in combined_text
+        # Keyword hits over combined_text, shared by importance, sentiment and quest detection
+        self.keyword_hits = keyword_hits if keyword_hits is not None else keyword_matcher.scan(self.combined_text)
+
+
+class TurnAnalyzer:
+    """Runs the spaCy pipeline once per turn and packages the results"""
+
+    def __init__(self, nlp=None):
+        self.nlp = nlp if nlp is not None else load_nlp()
+        self._lock = threading.Lock()  # One analyzer may be shared by many sessions
+
+    def parse(self, text: str):
+        with tracer.span("spacy.parse", chars=len(text)), self._lock:
+            return self.nlp(text)
+
+    def extract_entities(self, doc, start_char: int = 0) -> Dict[str, List[str]]:
+        """Collect PERSON and place entities from a parsed doc, optionally only after start_char"""
+        entities = {"npcs": [], "locations": []}
+        for ent in doc.ents:
+            if ent.start_char < start_char:
+                continue
+            if ent.label_ == "PERSON":
+                entities["npcs"].append(ent.text)
+            elif ent.label_ in ["GPE", "LOC", "FAC"]:
+                entities["locations"].append(ent.text)
+        entities["npcs"] = list(set(entities["npcs"]))
+        entities["locations"] = list(set(entities["locations"]))
+        return entities
+
+    def analyze(self, player_input: str, dm_response: str, turn_number: int) -> TurnAnalysis:
+        combined_text = f"{player_input} {dm_response}"
+        doc = self.parse(combined_text)
+        keyword_hits = keyword_matcher.scan(combined_text)
+
+        spans = sentence_spans(dm_response, offset=len(player_input) + 1)
+        return TurnAnalysis(
+            player_input=player_input,
+            dm_response=dm_response,
+            turn_number=turn_number,
+            doc=doc,
+            entities=self.extract_entities(doc),
+            response_entities=self.extract_entities(doc, start_char=len(player_input) + 1),
+            sentences=[sentence for sentence, _, _ in spans],
+            importances=span_importances(keyword_hits, [(start, end) for _, start, end in spans]),
+            keyword_hits=keyword_hits
+        )
@@ -0,0 +1,93 @@
+"""
+Ingest micro-benchmark for MemoryManager
+Measures per-turn ingest latency against sentence and entity count,
+comparing the old per-sentence add loop with the batched write-once pipeline
+"""
+
+import statistics
+import time
+from typing import Dict, List
+
+from MemoryAgent import MemoryManager
+
+
+SENTENCE_COUNTS = [5, 10, 20, 40]
+ENTITY_COUNTS = [(0, 0), (3, 2), (6, 4)]  # (npcs, locations)
+REPEATS = 5
+
+
+def make_sentences(n: int, seed: int) -> List[str]:
+    return [
+        f"The traveler number {seed}-{i} notices a carved rune glowing on the mossy stone wall"
+        for i in range(n)
+    ]
+
+
+def make_entities(n_npcs: int, n_locations: int) -> Dict[str, List[str]]:
+    return {
+        "npcs": [f"Npc Number {i}" for i in range(n_npcs)],
+        "locations": [f"Place Number {i}" for i in range(n_locations)]
+    }
+
+
+def legacy_ingest(manager: MemoryManager, sentences: List[str], entities: Dict[str, List[str]], turn_number: int):
+    """The pre-batching loop: one embed + add round trip per sentence per collection"""
+    timestamp = time.time()
+    for sentence in sentences:
+        memory_id = f"mem_{turn_number}_{hash(sentence) % 10000}"
+        metadata = {
+            "importance": manager._calculate_importance(sentence),
+            "timestamp": timestamp,
+            "turn": turn_number,
+            "type": "interaction"
+        }
+        manager.world_collection.add(documents=[sentence], metadatas=[metadata], ids=[memory_id])
+        for npc in entities["npcs"]:
+            npc_key = manager._normalize_name(npc)
+            if npc_key not in manager.npc_collections:
+                manager.npc_collections[npc_key] = manager._get_or_create_collection(f"{manager.collection_prefix}_npc_{npc_key}")
+            manager.npc_collections[npc_key].add(
+                documents=[sentence], metadatas=[{**metadata, "npc": npc}], ids=[f"{memory_id}_npc_{npc_key}"]
+            )
+        for location in entities["locations"]:
+            loc_key = manager._normalize_name(location)
+            if loc_key not in manager.location_collections:
+                manager.location_collections[loc_key] = manager._get_or_create_collection(f"{manager.collection_prefix}_loc_{loc_key}")
+            manager.location_collections[loc_key].add(
+                documents=[sentence], metadatas=[{**metadata, "location": location}], ids=[f"{memory_id}_loc_{loc_key}"]
+            )
+
+
+def main():
+    print("AI Dungeon Master - Memory Ingest Benchmark\n")
+    manager = MemoryManager(collection_prefix="bench_ingest")
+
+    # Warm up the embedding model and collections so the first row isn't a cold start
+    warm_entities = make_entities(6, 4)
+    manager._ingest_sentences(make_sentences(5, -1), warm_entities, turn_number=0)
+    legacy_ingest(manager, make_sentences(5, -2), warm_entities, turn_number=0)
+
+    turn = 1
+    print(f"{'sentences':>9} {'npcs':>5} {'locs':>5} {'legacy ms':>10} {'batched ms':>11} {'speedup':>8}")
+    for n_sentences in SENTENCE_COUNTS:
+        for n_npcs, n_locations in ENTITY_COUNTS:
+            entities = make_entities(n_npcs, n_locations)
+            legacy_times, batched_times = [], []
+            for _ in range(REPEATS):
+                start = time.perf_counter()
+                legacy_ingest(manager, make_sentences(n_sentences, turn), entities, turn)
+                legacy_times.append((time.perf_counter() - start) * 1000)
+                turn += 1
+
+                start = time.perf_counter()
+                manager._ingest_sentences(make_sentences(n_sentences, turn), entities, turn)
+                batched_times.append((time.perf_counter() - start) * 1000)
+                turn += 1
+
+            legacy_ms = statistics.median(legacy_times)
+            batched_ms = statistics.median(batched_times)
+            print(f"{n_sentences:>9} {n_npcs:>5} {n_locations:>5} {legacy_ms:>10.1f} {batched_ms:>11.1f} {legacy_ms / batched_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Keyword matching benchmark
+Compares the old per-consumer `keyword in text_lower` loops (sentiment, per-sentence
+importance, context type, quest start, and the completion check that ran once per
+active quest) with one KeywordMatcher scan of the turn plus span queries, for DM
+responses of increasing length
+"""
+
+import random
+import statistics
+import time
+
+from KeywordMatcher import KEYWORD_TABLES, keyword_matcher
+from TurnAnalysis import sentence_spans, span_importances, split_sentences
+
+
+REPEATS = 50
+RESPONSE_WORDS = [150, 1000, 5000]
+ACTIVE_QUESTS = 20
+PLAYER_INPUT = "I thank Aldric and ask what happened to the quest"
+VOCABULARY = (
+    "the a you and of to in as with from its their your ancient tower forest path shadows "
+    "whisper stone cold wind light door hall village elder road river silver old dark quiet "
+    "night torch map blade walls lantern smoke ash bridge gate market crowd banner chapel "
+    "bell echoes moss roots ruins glimmer distant mountains slowly carefully beneath above"
+).split() + ["quest", "find", "key", "defeated", "help", "found", "oath"]
+
+
+def make_response(words: int, rng: random.Random) -> str:
+    sentences, current = [], []
+    for _ in range(words):
+        current.append(rng.choice(VOCABULARY))
+        if len(current) >= rng.randint(8, 16):
+            sentences.append(" ".join(current).capitalize())
+            current = []
+    if current:
+        sentences.append(" ".join(current).capitalize())
+    return ". ".join(sentences) + "."
+
+
+def loops(player_input: str, dm_response: str):
+    """What the four consumers did before: one substring loop per table, per text"""
+    input_lower = player_input.lower()
+    sentiment = sum(kw in input_lower for kw in KEYWORD_TABLES["sentiment_positive"] + KEYWORD_TABLES["sentiment_negative"])
+    context = any(kw in input_lower for kw in KEYWORD_TABLES["context_lore"] + KEYWORD_TABLES["context_action"])
+    importances = []
+    for sentence in split_sentences(dm_response):
+        sentence_lower = sentence.lower()
+        importances.append(
+            sum(kw in sentence_lower for kw in KEYWORD_TABLES["importance_high"])
+            + sum(kw in sentence_lower for kw in KEYWORD_TABLES["importance_medium"])
+        )
+    response_lower = dm_response.lower()
+    quest = any(kw in response_lower for kw in KEYWORD_TABLES["quest_start"]) and [
+        any(kw in sentence.lower() for kw in KEYWORD_TABLES["quest_start"]) for sentence in dm_response.split('.')
+    ]
+    combined_lower = f"{player_input} {dm_response}".lower()
+    progress = [any(kw in combined_lower for kw in KEYWORD_TABLES["quest_progress"]) for _ in range(ACTIVE_QUESTS)]
+    return sentiment, context, importances, quest, progress
+
+
+def single_scan(player_input: str, dm_response: str):
+    """One scan of the combined turn text, every consumer answered from the hits"""
+    combined = f"{player_input} {dm_response}"
+    hits = keyword_matcher.scan(combined)
+    offset, end = len(player_input) + 1, len(player_input)
+    sentiment = len(hits.found("sentiment_positive", 0, end)) + len(hits.found("sentiment_negative", 0, end))
+    context = hits.has("context_lore", 0, end) or hits.has("context_action", 0, end)
+    importances = span_importances(hits, [(start, stop) for _, start, stop in sentence_spans(dm_response, offset)])
+    quest = hits.has("quest_start", offset)
+    progress = hits.has("quest_progress")
+    return sentiment, context, importances, quest, progress
+
+
+def median_ms(func, *args) -> float:
+    samples = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    print("AI Dungeon Master - Keyword Matching Benchmark\n")
+    rng = random.Random(42)
+    print(f"{'response words':>14} {'loops ms':>10} {'single scan ms':>15} {'speedup':>8}")
+    for words in RESPONSE_WORDS:
+        response = make_response(words, rng)
+        old = median_ms(loops, PLAYER_INPUT, response)
+        new = median_ms(single_scan, PLAYER_INPUT, response)
+        print(f"{words:>14} {old:>10.3f} {new:>15.3f} {old / new:>7.1f}x")
+    print(f"\n(median of {REPEATS} runs per turn, {ACTIVE_QUESTS} active quests)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Lore validation benchmark
+Plays a scripted 100-turn session against a local fake LLM twice: once with every
+validation going to the LLM, once with the tiered Lore Talker (local pass first).
+Reports per-turn latency, how often the LLM call was skipped and verdict tokens per call
+"""
+
+import statistics
+import time
+from typing import Dict, List
+
+from FakeLLMServer import FakeLLMServer
+from MainSystem import DungeonMasterOrchestrator
+
+
+TURNS = 100
+LLM_LATENCY = 0.2
+
+SCRIPT = [
+    "I meet a wizard named Aldric who gives me a quest to find the Heart of Emberfall",
+    "I pick up the silver key from the rubble",
+    "I continue walking",
+    "I ask Aldric about the curse on the forest",
+    "I walk toward the northern corridor",
+    "I follow the chanting into the catacombs",
+    "I continue walking",
+    "What did the wizard tell me about the Heart of Emberfall?",
+    "I light my lantern and look around the hall",
+    "I ask the merchant about the Whispering Woods"
+]
+
+
+def percentile(samples: List[float], pct: int) -> float:
+    return statistics.quantiles(samples, n=100, method="inclusive")[pct - 1]
+
+
+def run_session(base_url: str, fast_path: bool) -> Dict:
+    orchestrator = DungeonMasterOrchestrator("fake-key", enable_bonus_features=False, llm_base_url=base_url)
+    orchestrator.initialize_agents()
+    orchestrator.debug_mode = False
+    orchestrator.lore_talker.fast_path = fast_path
+
+    latencies = []
+    for i in range(TURNS):
+        start = time.perf_counter()
+        orchestrator.process_turn(SCRIPT[i % len(SCRIPT)])
+        latencies.append(time.perf_counter() - start)
+
+    stats = orchestrator.lore_talker.get_stats()
+    orchestrator.memory_manager.flush()
+    orchestrator.memory_manager.client.reset()
+    return {"latencies": latencies, "stats": stats}
+
+
+def main():
+    print("AI Dungeon Master - Lore Validation Benchmark\n")
+    with FakeLLMServer(latency=LLM_LATENCY, response_words=120) as server:
+        results = {
+            "llm-only": run_session(server.base_url, fast_path=False),
+            "tiered": run_session(server.base_url, fast_path=True)
+        }
+
+    print(f"\n{'validator':<10} {'p50 (s)':>8} {'p95 (s)':>8} {'total (s)':>10} {'LLM calls':>10} {'skipped':>8} {'out tok/call':>13}")
+    for name, result in results.items():
+        latencies, stats = result["latencies"], result["stats"]
+        print(f"{name:<10} {percentile(latencies, 50):>8.3f} {percentile(latencies, 95):>8.3f} "
+              f"{sum(latencies):>10.1f} {stats['llm']:>10} {stats['skip_rate']:>8.0%} {stats['avg_completion_tokens']:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
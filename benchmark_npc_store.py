@@ -0,0 +1,104 @@
+"""
+NPC store benchmark: NumPy trait matrix vs the previous dict-per-NPC layout
+Tracks 10k NPCs and reports memory use of the store plus update throughput for
+turns that touch a few NPCs and for crowd turns that touch many at once
+"""
+
+from contextlib import redirect_stdout
+import io
+import random
+import time
+import tracemalloc
+
+from NPCPersonalityManager import NPCPersonalityManager, TRAITS
+
+
+NPC_COUNT = 10000
+TURNS = 2000
+SENTIMENT = {"friendliness_delta": 0.05, "trust_delta": 0.03, "fear_delta": 0.0}
+
+
+class DictNPCStore:
+    """The previous layout: a nested dict of traits per NPC, updated one _clamp at a time"""
+
+    def __init__(self):
+        self.npcs = {}
+
+    def initialize_npc(self, npc_name: str):
+        self.npcs[npc_name.lower().replace(" ", "_")] = {
+            "name": npc_name,
+            "personality": {trait: 0.5 for trait in TRAITS},
+            "interaction_count": 0,
+            "relationship_score": 0.5,
+            "memory": []
+        }
+
+    def update_npcs(self, npc_names, player_input, dm_response, sentiment):
+        for npc_name in npc_names:
+            npc = self.npcs[npc_name.lower().replace(" ", "_")]
+            personality = npc["personality"]
+            personality["friendly"] = self._clamp(personality["friendly"] + sentiment["friendliness_delta"])
+            personality["honest"] = self._clamp(personality["honest"] + sentiment["trust_delta"])
+            personality["fearful"] = self._clamp(personality["fearful"] + sentiment["fear_delta"])
+            if sentiment["friendliness_delta"] > 0:
+                personality["loyal"] = self._clamp(personality["loyal"] + 0.02)
+            npc["relationship_score"] = self._clamp(
+                npc["relationship_score"] + sentiment["friendliness_delta"]
+                + sentiment["trust_delta"] - sentiment["fear_delta"] * 0.5
+            )
+            npc["interaction_count"] += 1
+            npc["memory"].append({
+                "player_action": player_input,
+                "npc_response_context": dm_response[:100],
+                "sentiment": sentiment,
+                "turn": npc["interaction_count"]
+            })
+            if len(npc["memory"]) > 10:
+                npc["memory"] = npc["memory"][-10:]
+
+    @staticmethod
+    def _clamp(value: float) -> float:
+        return max(0.0, min(1.0, value))
+
+
+def build(store_class, names):
+    tracemalloc.start()
+    with redirect_stdout(io.StringIO()):
+        store = store_class()
+        for name in names:
+            if isinstance(store, NPCPersonalityManager):
+                store.initialize_npc(name, verbose=False)
+            else:
+                store.initialize_npc(name)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return store, current / 1e6
+
+
+def throughput(store, names, per_turn: int, rng: random.Random) -> float:
+    """NPC updates per second over TURNS turns that each touch per_turn NPCs"""
+    batches = [rng.sample(names, per_turn) for _ in range(TURNS)]
+    start = time.perf_counter()
+    for batch in batches:
+        store.update_npcs(batch, "I thank them and offer help", "The villagers cheer.", sentiment=SENTIMENT)
+    return TURNS * per_turn / (time.perf_counter() - start)
+
+
+def main():
+    print("AI Dungeon Master - NPC Store Benchmark\n")
+    names = [f"Villager {i}" for i in range(NPC_COUNT)]
+    results = {}
+    for label, store_class in [("dict", DictNPCStore), ("matrix", NPCPersonalityManager)]:
+        store, store_mb = build(store_class, names)
+        rng = random.Random(42)
+        results[label] = (store_mb, throughput(store, names, 3, rng), throughput(store, names, 200, rng))
+
+    print(f"{NPC_COUNT} NPCs, {TURNS} turns per scenario\n")
+    print(f"{'store':<8} {'memory MB':>10} {'3 NPCs/turn':>14} {'200 NPCs/turn':>15}")
+    for label, (store_mb, few, crowd) in results.items():
+        print(f"{label:<8} {store_mb:>10.2f} {few:>14,.0f} {crowd:>15,.0f}")
+    print("\n(memory measured after initialization; throughput in NPC updates per second)")
+
+
+if __name__ == "__main__":
+    main()
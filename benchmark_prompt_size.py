@@ -0,0 +1,67 @@
+"""
+Prompt size benchmark for the rolling conversation history
+Plays a 500-turn session against a local fake LLM and records the DM prompt
+size per turn, comparing the old raw last-5-turns history with the bounded
+verbatim window plus rolling summary
+"""
+
+from typing import Dict, List
+
+from ConversationHistory import ConversationHistory
+from DungeonMaster import DungeonMaster
+from FakeLLMServer import FakeLLMServer
+from LLMGateway import LLMGateway
+
+
+TURNS = 500
+CHECKPOINTS = [10, 50, 100, 250, 500]
+MEMORIES = [
+    {"text": "Aldric the wizard asked you to find the Heart of Emberfall.", "score": 0.8},
+    {"text": "A silver key was found among the rubble near the hall.", "score": 0.7},
+    {"text": "The forest is cursed by an ancient evil.", "score": 0.6}
+]
+ACTIONS = [
+    "I ask Aldric about the Heart of Emberfall",
+    "I search the rubble for the silver key",
+    "I follow the chanting toward the catacombs",
+    "I light my lantern and walk north"
+]
+
+
+def run(base_url: str, rolling: bool) -> Dict:
+    gateway = LLMGateway("fake-key", base_url=base_url, requests_per_second=1000, burst=1000)
+    dungeon_master = DungeonMaster("fake-key", gateway=gateway, prompt_budget_tokens=100000)
+    history = ConversationHistory(summarize=dungeon_master.summarize_events) if rolling else []
+
+    tokens: List[int] = []
+    for turn in range(1, TURNS + 1):
+        player_input = ACTIONS[turn % len(ACTIONS)]
+        if rolling:
+            response = dungeon_master.generate_response(
+                player_input, MEMORIES, history.recent(), history_summary=history.summary
+            )
+        else:
+            response = dungeon_master.generate_response(player_input, MEMORIES, history[-5:])
+        tokens.append(dungeon_master.last_prompt_report["tokens"])
+        history.append({"turn": turn, "player": player_input, "dm": response})
+        if rolling:
+            history.wait()
+
+    gateway.close()
+    return {"tokens": tokens, "resident_turns": len(history)}
+
+
+def main():
+    print("AI Dungeon Master - Prompt Size Benchmark\n")
+    with FakeLLMServer(latency=0.0, response_words=250) as server:
+        results = {"raw last-5": run(server.base_url, rolling=False), "rolling": run(server.base_url, rolling=True)}
+
+    print(f"\n{'history':<11}" + "".join(f"{'turn ' + str(c):>10}" for c in CHECKPOINTS) + f"{'resident turns':>16}")
+    for name, result in results.items():
+        print(f"{name:<11}" + "".join(f"{result['tokens'][c - 1]:>10}" for c in CHECKPOINTS)
+              + f"{result['resident_turns']:>16}")
+    print("\n(prompt tokens per turn)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Quest log benchmark
+1. Grows the log to thousands of active quests and measures per-turn progress
+   detection: the previous scan over every quest (re-splitting each description)
+   against the inverted index from content words to active quest ids
+2. Replays a long session whose narration keeps restating a few quests and
+   reports how many quests detection creates, merges and archives
+3. Times the `quests` command (get_quest_summary) on a long history: the
+   first render against the cached summary returned until a quest changes
+"""
+
+from contextlib import redirect_stdout
+import io
+import random
+import statistics
+import time
+
+from DynamicQuestLog import DynamicQuestLog, QuestStatus
+
+
+QUEST_COUNTS = [100, 1000, 10000]
+TURNS = 200
+VERBS = ["find", "retrieve", "rescue", "protect", "deliver", "investigate", "discover"]
+SYLLABLES = ["al", "dr", "ic", "mi", "ra", "sel", "ene", "tom", "as", "gor", "ven", "hold", "ash", "bel", "kar", "un"]
+NOUNS = ["key", "amulet", "relic", "crown", "bell", "caravan", "map", "blade", "idol", "lantern"]
+
+
+def name(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(3)).capitalize()
+
+
+def quest_description(rng: random.Random) -> str:
+    """Mostly distinct quests: every description names its own giver, item and place"""
+    return f"{name(rng)} asks you to {rng.choice(VERBS)} the {rng.choice(NOUNS)} of {name(rng)} near {name(rng)}"
+
+
+def turn_text(rng: random.Random) -> str:
+    return (f"I return from {name(rng)}. You found the {rng.choice(NOUNS)} of {name(rng)} and "
+            f"{name(rng)} thanks you warmly as the sun sets over {name(rng)}.")
+
+
+def scan_all_quests(quest_log: DynamicQuestLog, text: str, turn: int):
+    """The previous auto_detect_progress: word overlap against every active quest"""
+    text_lower = text.lower()
+    for quest in quest_log.quests.values():
+        if quest.status != QuestStatus.ACTIVE:
+            continue
+        common_words = set(quest.description.lower().split()) & set(text_lower.split())
+        if len(common_words) > 3:
+            quest.add_note(f"Progress detected: {text[:100]}...", turn)
+
+
+def build(quest_count: int) -> DynamicQuestLog:
+    rng = random.Random(quest_count)
+    with redirect_stdout(io.StringIO()):
+        quest_log = DynamicQuestLog()
+    for turn in range(quest_count):
+        quest_log.add_quest(f"Quest {turn}", quest_description(rng), turn)
+    return quest_log
+
+
+def per_turn_ms(detect, quest_log: DynamicQuestLog) -> float:
+    rng = random.Random(7)
+    texts = [turn_text(rng) for _ in range(TURNS)]
+    samples = []
+    for turn, text in enumerate(texts):
+        start = time.perf_counter()
+        detect(quest_log, text, turn)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+GROWTH_TURNS = 1000
+STORYLINES = [
+    ("Aldric", "find", "the Heart of Emberfall", "the ruined chapel"),
+    ("Mira", "deliver", "the sealed letter", "Ravenhold"),
+    ("Brother Tomas", "investigate", "the chanting", "the catacombs"),
+    ("the elder", "rescue", "the miller's daughter", "the Whispering Woods"),
+    ("Selene", "retrieve", "the silver key", "the old castle")
+]
+RESTATEMENTS = [
+    "{npc} asks you to {verb} {thing} in {place}.",
+    "{npc} reminds you that you must {verb} {thing} before nightfall.",
+    "You recall your task: {verb} {thing} somewhere in {place}.",
+    "A rumour says {thing} may be found near {place}, and {npc} still hopes you will {verb} it."
+]
+
+
+def replay_growth() -> dict:
+    """Narration that cycles through five storylines; one storyline wraps up every 50 turns"""
+    rng = random.Random(3)
+    with redirect_stdout(io.StringIO()):
+        quest_log = DynamicQuestLog()
+        merged = 0
+        for turn in range(1, GROWTH_TURNS + 1):
+            npc, verb, thing, place = rng.choice(STORYLINES)
+            text = rng.choice(RESTATEMENTS).format(npc=npc, verb=verb, thing=thing, place=place)
+            if turn % 50 == 0:
+                text += f" {npc} thanks you: {thing} is safe at last, quest complete."
+            quest_log.process_turn("I keep going", text, turn)
+            merged += len(quest_log.last_merged)
+    return {
+        "created": quest_log.quest_counter,
+        "merged": merged,
+        "hot": len(quest_log.quests),
+        "archived": len(quest_log.archived_quests)
+    }
+
+
+def summary_timings(finished: int, active: int = 20, repeats: int = 1000) -> dict:
+    rng = random.Random(11)
+    quest_log = build(0)
+    for turn in range(finished + active):
+        quest_id = quest_log.add_quest(f"Quest {turn}", quest_description(rng), turn)
+        if turn < finished:
+            quest_log.complete_quest(quest_id, turn)
+
+    start = time.perf_counter()
+    quest_log.get_quest_summary()
+    render_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    for _ in range(repeats):
+        quest_log.get_quest_summary()
+    cached_us = (time.perf_counter() - start) / repeats * 1e6
+    return {"render_ms": render_ms, "cached_us": cached_us}
+
+
+def main():
+    print("AI Dungeon Master - Quest Log Benchmark\n")
+    print(f"{'active quests':>13} {'scan all ms':>12} {'indexed ms':>11}")
+    for quest_count in QUEST_COUNTS:
+        scan = per_turn_ms(scan_all_quests, build(quest_count))
+        indexed = per_turn_ms(lambda log, text, turn: log.auto_detect_progress(text, turn), build(quest_count))
+        print(f"{quest_count:>13} {scan:>12.3f} {indexed:>11.3f}")
+    print(f"\n(median progress-detection time per turn over {TURNS} turns)")
+
+    growth = replay_growth()
+    print(f"\nQuest growth over {GROWTH_TURNS} turns restating {len(STORYLINES)} storylines")
+    print(f"  created {growth['created']}, merged {growth['merged']} restatements, "
+          f"{growth['hot']} in the hot dict, {growth['archived']} archived")
+
+    print(f"\n{'finished quests':>15} {'render ms':>10} {'cached µs':>10}")
+    for finished in QUEST_COUNTS:
+        timings = summary_timings(finished)
+        print(f"{finished:>15} {timings['render_ms']:>10.3f} {timings['cached_us']:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Re-ranking benchmark
+1. Times the NumPy re-rank of a 200-candidate pool against the old per-memory Python loop
+2. Replays a long session (facts early, filler after) and compares recall@k of the
+   old retrieval settings (2*top_k candidates, no recency decay), the 200-candidate
+   pool without decay, and a sweep of (recency_half_life, recency_floor) settings
+   on that pool; the MemoryManager defaults are the 200/0.7 column
+"""
+
+import random
+import statistics
+import time
+
+import numpy as np
+
+from MemoryAgent import MemoryManager, rerank_scores, top_k_indices
+
+
+POOL = 200
+TOP_K = 5
+REPEATS = 2000
+FACTS = [
+    ("Aldric the wizard gave me a quest to find the Heart of Emberfall",
+     "What quest did the wizard give me?"),
+    ("Mira the blacksmith forged a silver blade for me in Ravenhold",
+     "Who forged my silver blade?"),
+    ("Brother Tomas warned me that the catacombs are cursed by an ancient evil",
+     "What did Brother Tomas warn me about?"),
+    ("The Goblin King stole the crown from the old castle",
+     "Who stole the crown from the old castle?"),
+    ("Selene hid the map fragment beneath the altar of the chapel",
+     "Where did Selene hide the map fragment?")
+]
+DECAY_SETTINGS = [(50, 0.0), (100, 0.9), (200, 0.5), (200, 0.7)]
+FILLER = [
+    "You continue walking along the dusty road as the wind picks up",
+    "You look around and see nothing but trees and distant hills",
+    "You check your supplies and count the remaining rations",
+    "You rest for a moment beside a quiet stream",
+    "You keep moving forward while the sun sinks behind the hills",
+    "A traveller nods to you and asks about the road ahead",
+    "The tavern is loud tonight and the bard sings of old quests",
+    "A merchant offers you a cheap blade and a worn map"
+]
+
+
+def loop_rerank(candidates, current_time, alpha=0.6, beta=0.3, gamma=0.1, entity_boost=0.05):
+    """The previous scoring: one Python iteration and a full sort per candidate pool"""
+    memories = []
+    for memory_id, (doc, metadata, distance, via_entity) in candidates.items():
+        recency = max(0, 1 - ((current_time - metadata['timestamp']) / (86400 * 30)))
+        score = alpha * (1 - distance) + beta * recency + gamma * metadata.get('importance', 0.5)
+        if via_entity:
+            score += entity_boost
+        memories.append((score, memory_id))
+    memories.sort(reverse=True)
+    return memories[:TOP_K]
+
+
+def vector_rerank(candidates, current_turn, recency_half_life=200, recency_floor=0.7):
+    pool = list(candidates.items())
+    count = len(pool)
+    scores = rerank_scores(
+        np.fromiter((c[2] for _, c in pool), dtype=np.float64, count=count),
+        np.fromiter((c[1].get('turn', 0) for _, c in pool), dtype=np.float64, count=count),
+        np.fromiter((c[1].get('importance', 0.5) for _, c in pool), dtype=np.float64, count=count),
+        np.fromiter((c[3] for _, c in pool), dtype=np.float64, count=count),
+        current_turn, 0.6, 0.3, 0.1, 0.05, recency_half_life, recency_floor
+    )
+    return top_k_indices(scores, TOP_K)
+
+
+def time_rerank():
+    rng = random.Random(7)
+    now = time.time()
+    candidates = {
+        f"mem_{i}": [f"memory {i}", {"timestamp": now - rng.random() * 3600, "turn": rng.randint(1, 300),
+                                     "importance": rng.random()}, rng.random(), rng.random() < 0.2]
+        for i in range(POOL)
+    }
+    results = {}
+    for name, rerank in [("python loop", lambda: loop_rerank(candidates, now)),
+                         ("numpy", lambda: vector_rerank(candidates, 300))]:
+        samples = []
+        for _ in range(REPEATS):
+            start = time.perf_counter()
+            rerank()
+            samples.append((time.perf_counter() - start) * 1e6)
+        results[name] = statistics.median(samples)
+    return results
+
+
+def long_session(manager: MemoryManager, filler_turns: int):
+    """Facts land in the first turns, then many turns of filler narration"""
+    rng = random.Random(42)
+    turn = 1
+    for fact, _ in FACTS:
+        manager._ingest_sentences([fact], {"npcs": [], "locations": []}, turn)
+        turn += 1
+    for _ in range(filler_turns):
+        manager._ingest_sentences(rng.sample(FILLER, 3), {"npcs": [], "locations": []}, turn)
+        turn += 1
+
+
+def recall(manager: MemoryManager, candidate_pool: int, recency_half_life, recency_floor: float = 0.0):
+    manager.candidate_pool = candidate_pool
+    manager.recency_half_life = recency_half_life
+    manager.recency_floor = recency_floor
+    hits = 0
+    for fact, query in FACTS:
+        memories = manager.retrieve_memories(query, top_k=TOP_K, hierarchical=False)
+        hits += any(mem['text'] == fact for mem in memories)
+    return hits / len(FACTS)
+
+
+def main():
+    print("AI Dungeon Master - Re-ranking Benchmark\n")
+    timings = time_rerank()
+    print(f"Re-rank of {POOL} candidates (median over {REPEATS} runs)")
+    for name, micros in timings.items():
+        print(f"  {name:<12} {micros:8.1f} µs")
+
+    print(f"\nLong-session recall@{TOP_K}")
+    decay_headers = "".join(f"{f'{half_life}/{floor}':>10}" for half_life, floor in DECAY_SETTINGS)
+    print(f"{'filler turns':>12} {'old (2k pool)':>14} {'200 no decay':>13}{decay_headers}")
+    for filler_turns in [30, 100, 300]:
+        manager = MemoryManager(collection_prefix=f"bench_rerank_{filler_turns}")
+        long_session(manager, filler_turns)
+        old = recall(manager, candidate_pool=TOP_K * 2, recency_half_life=None)
+        no_decay = recall(manager, candidate_pool=POOL, recency_half_life=None)
+        decayed = "".join(
+            f"{recall(manager, candidate_pool=POOL, recency_half_life=half_life, recency_floor=floor):>10.2f}"
+            for half_life, floor in DECAY_SETTINGS
+        )
+        print(f"{filler_turns:>12} {old:>14.2f} {no_decay:>13.2f}{decayed}")
+        manager.client.reset()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Load test for the multi-session Dungeon Server
+Drives 1..16 concurrent sessions through the HTTP API against a local fake LLM
+and reports throughput in turns/sec and per-turn latency as the session count grows
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import json
+import statistics
+import time
+import urllib.request
+
+from DungeonServer import DungeonServer, SessionManager
+from FakeLLMServer import FakeLLMServer
+
+
+SESSION_COUNTS = [1, 2, 4, 8, 16]
+TURNS_PER_SESSION = 10
+LLM_LATENCY = 0.2
+
+ACTIONS = [
+    "I ask Aldric about the Heart of Emberfall",
+    "I search the rubble for the silver key",
+    "I follow the chanting toward the catacombs",
+    "I light my lantern and walk north"
+]
+
+
+def post(url: str, body: dict) -> dict:
+    request = urllib.request.Request(url, data=json.dumps(body).encode(), headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=120) as response:
+        return json.loads(response.read())
+
+
+def play_session(base_url: str, session_id: str):
+    latencies = []
+    for i in range(TURNS_PER_SESSION):
+        start = time.perf_counter()
+        post(f"{base_url}/sessions/{session_id}/turns", {"input": ACTIONS[i % len(ACTIONS)]})
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    print("AI Dungeon Master - Multi-Session Server Load Test\n")
+    with FakeLLMServer(latency=LLM_LATENCY, response_words=120) as llm:
+        server = DungeonServer(SessionManager("fake-key", llm_base_url=llm.base_url), port=0)
+        base_url = server.start()
+
+        rows = []
+        for round_number, n_sessions in enumerate(SESSION_COUNTS):
+            session_ids = [
+                post(f"{base_url}/sessions", {"session_id": f"load_{round_number}_{i}", "opening": False})["session_id"]
+                for i in range(n_sessions)
+            ]
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=n_sessions) as pool:
+                results = list(pool.map(lambda sid: play_session(base_url, sid), session_ids))
+            elapsed = time.perf_counter() - start
+
+            latencies = [latency for session in results for latency in session]
+            rows.append((n_sessions, len(latencies) / elapsed, statistics.median(latencies), max(latencies)))
+
+        server.stop()
+
+    print(f"\n{'sessions':>8} {'turns/sec':>10} {'p50 s':>7} {'max s':>7}")
+    for n_sessions, throughput, p50, worst in rows:
+        print(f"{n_sessions:>8} {throughput:>10.2f} {p50:>7.2f} {worst:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
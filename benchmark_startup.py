@@ -0,0 +1,84 @@
+"""
+Startup benchmark for the Memory Manager embedding backend
+Compares resident memory and cold-start time of the old two-model layout
+(SentenceTransformer + ChromaDB default ONNX embedder) against the shared EmbeddingEngine
+"""
+
+import json
+import resource
+import subprocess
+import sys
+import time
+
+
+MODES = ["before", "after"]
+
+
+def _max_rss_mb() -> float:
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_before() -> dict:
+    """Old layout: an unused SentenceTransformer plus Chroma's default embedder"""
+    start = time.perf_counter()
+    import chromadb
+    from chromadb.config import Settings
+    from chromadb.utils import embedding_functions
+    from sentence_transformers import SentenceTransformer
+
+    client = chromadb.Client(Settings(anonymized_telemetry=False, allow_reset=True))
+    SentenceTransformer('all-MiniLM-L6-v2')
+    collection = client.create_collection(
+        name="world_memory",
+        metadata={"hnsw:space": "cosine"},
+        embedding_function=embedding_functions.DefaultEmbeddingFunction()
+    )
+    collection.add(documents=["The adventure begins at the forest edge."], ids=["warmup"])
+    return {"cold_start_s": time.perf_counter() - start, "max_rss_mb": _max_rss_mb()}
+
+
+def run_after() -> dict:
+    """New layout: one shared EmbeddingEngine used by every collection"""
+    start = time.perf_counter()
+    import chromadb
+    from chromadb.config import Settings
+    from EmbeddingEngine import get_embedding_engine
+
+    client = chromadb.Client(Settings(anonymized_telemetry=False, allow_reset=True))
+    engine = get_embedding_engine()
+    collection = client.create_collection(
+        name="world_memory",
+        metadata={"hnsw:space": "cosine"},
+        embedding_function=engine
+    )
+    collection.add(documents=["The adventure begins at the forest edge."], ids=["warmup"])
+    return {"cold_start_s": time.perf_counter() - start, "max_rss_mb": _max_rss_mb()}
+
+
+def measure(mode: str) -> dict:
+    """Run one mode in a fresh interpreter so model caches and RSS don't leak between runs"""
+    output = subprocess.check_output([sys.executable, __file__, "--mode", mode])
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def main():
+    if len(sys.argv) == 3 and sys.argv[1] == "--mode":
+        result = run_before() if sys.argv[2] == "before" else run_after()
+        print(json.dumps(result))
+        return
+
+    print("AI Dungeon Master - Embedding Startup Benchmark\n")
+    results = {mode: measure(mode) for mode in MODES}
+
+    print(f"{'mode':<8} {'cold start (s)':>15} {'max RSS (MB)':>14}")
+    for mode in MODES:
+        print(f"{mode:<8} {results[mode]['cold_start_s']:>15.2f} {results[mode]['max_rss_mb']:>14.1f}")
+
+    saved_mb = results["before"]["max_rss_mb"] - results["after"]["max_rss_mb"]
+    saved_s = results["before"]["cold_start_s"] - results["after"]["cold_start_s"]
+    print(f"\nShared engine saves {saved_mb:.1f} MB resident and {saved_s:.2f} s at startup")
+
+
+if __name__ == "__main__":
+    main()
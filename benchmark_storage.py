@@ -0,0 +1,84 @@
+"""
+Storage layout benchmark: per-entity collections vs one collection with metadata filters
+Fills a MemoryManager with 1k / 10k / 100k memories spread over many NPCs and locations,
+then reports resident memory growth, collection count and entity-query latency.
+Each (mode, size) runs in a fresh interpreter so RSS numbers don't bleed into each other.
+"""
+
+import json
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+
+SIZES = [1000, 10000, 100000]
+MODES = ["collections", "metadata"]
+SENTENCES_PER_TURN = 10
+MEMORIES_PER_ENTITY = 50
+QUERIES = 50
+
+
+def _max_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run(mode: str, size: int) -> dict:
+    from MemoryAgent import MemoryManager
+
+    rng = random.Random(size)
+    manager = MemoryManager(collection_prefix=f"bench_{mode}", storage_mode=mode)
+    baseline_mb = _max_rss_mb()
+
+    n_entities = max(size // MEMORIES_PER_ENTITY, 1)
+    npcs = [f"Npc {i}" for i in range(n_entities)]
+    locations = [f"Place {i}" for i in range(n_entities)]
+
+    start = time.perf_counter()
+    for turn in range(size // SENTENCES_PER_TURN):
+        sentences = [
+            f"Turn {turn} event {i}: the traveler trades a {rng.choice(['lantern', 'rope', 'dagger', 'map'])} for bread"
+            for i in range(SENTENCES_PER_TURN)
+        ]
+        entities = {"npcs": [rng.choice(npcs)], "locations": [rng.choice(locations)]}
+        manager._ingest_sentences(sentences, entities, turn)
+    ingest_s = time.perf_counter() - start
+
+    latencies = []
+    for _ in range(QUERIES):
+        query = f"What did {rng.choice(npcs)} trade at {rng.choice(locations)}?"
+        start = time.perf_counter()
+        manager.retrieve_memories(query, top_k=5)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "mode": mode,
+        "size": size,
+        "collections": len(manager.client.list_collections()),
+        "rss_growth_mb": _max_rss_mb() - baseline_mb,
+        "ingest_s": ingest_s,
+        "query_p50_ms": statistics.median(latencies),
+        "query_max_ms": max(latencies)
+    }
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == "--run":
+        print(json.dumps(run(sys.argv[2], int(sys.argv[3]))))
+        return
+
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    print("AI Dungeon Master - Memory Storage Layout Benchmark\n")
+    print(f"{'mode':<12} {'memories':>9} {'collections':>12} {'RSS +MB':>9} {'ingest s':>9} {'p50 ms':>8} {'max ms':>8}")
+    for size in sizes:
+        for mode in MODES:
+            output = subprocess.check_output([sys.executable, __file__, "--run", mode, str(size)])
+            r = json.loads(output.decode().strip().splitlines()[-1])
+            print(f"{r['mode']:<12} {r['size']:>9} {r['collections']:>12} {r['rss_growth_mb']:>9.1f} "
+                  f"{r['ingest_s']:>9.1f} {r['query_p50_ms']:>8.1f} {r['query_max_ms']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
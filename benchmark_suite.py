@@ -0,0 +1,179 @@
+"""
+End-to-end benchmark suite
+Drives DungeonMasterOrchestrator.process_turn through scripted, replayable
+sessions (30, 300 and 3000 turns by default) against the local fake LLM, and
+reports per-stage timings, memory growth and throughput as JSON.
+
+    python benchmark_suite.py --turns 30 300 --latency 0.05 --output results.json
+"""
+
+from contextlib import redirect_stdout
+import argparse
+import functools
+import json
+import os
+import random
+import resource
+import statistics
+import threading
+import time
+from typing import Dict, List
+
+from FakeLLMServer import FakeLLMServer
+from MainSystem import DungeonMasterOrchestrator
+
+
+NPCS = ["Aldric", "Mira", "Goblin King", "Brother Tomas", "Selene"]
+PLACES = ["Emberfall", "the Whispering Woods", "the catacombs", "the old castle", "Ravenhold"]
+ITEMS = ["silver key", "Heart of Emberfall", "cursed amulet", "map fragment", "healing potion"]
+TEMPLATES = [
+    "I ask {npc} about the {item}",
+    "I travel to {place}",
+    "I search {place} for the {item}",
+    "I attack the bandits near {place}",
+    "I thank {npc} and offer help with the quest",
+    "I continue walking",
+    "What did {npc} tell me about the {item}?",
+    "I hide from the guards in {place}",
+    "I give the {item} to {npc}",
+    "I look around"
+]
+
+
+def scripted_actions(turns: int, seed: int = 42) -> List[str]:
+    """Deterministic player inputs; the same seed always replays the same session"""
+    rng = random.Random(seed)
+    return [
+        rng.choice(TEMPLATES).format(npc=rng.choice(NPCS), place=rng.choice(PLACES), item=rng.choice(ITEMS))
+        for _ in range(turns)
+    ]
+
+
+class StageTimer:
+    """Collects durations of wrapped instance methods, grouped by pipeline stage"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def wrap(self, obj, method_name: str, stage: str):
+        method = getattr(obj, method_name)
+
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                with self._lock:
+                    self.samples.setdefault(stage, []).append(elapsed)
+
+        setattr(obj, method_name, timed)
+
+    def report(self) -> Dict:
+        report = {}
+        for stage, samples in sorted(self.samples.items()):
+            ordered = sorted(samples)
+            report[stage] = {
+                "calls": len(samples),
+                "total_s": round(sum(samples), 4),
+                "mean_ms": round(statistics.fmean(samples) * 1000, 3),
+                "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+                "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+                "max_ms": round(ordered[-1] * 1000, 3)
+            }
+        return report
+
+
+def instrument(orchestrator: DungeonMasterOrchestrator, timer: StageTimer):
+    timer.wrap(orchestrator.memory_manager, "retrieve_memories", "retrieve")
+    timer.wrap(orchestrator.lore_talker, "validate_context", "validate")
+    timer.wrap(orchestrator.dungeon_master, "generate_response", "generate")
+    timer.wrap(orchestrator.memory_manager, "analyze_turn", "analyze")  # One spaCy + keyword pass per turn
+    timer.wrap(orchestrator.memory_manager, "extract_and_store", "ingest")
+    timer.wrap(orchestrator.memory_manager, "_compact_memories", "summarize")
+    timer.wrap(orchestrator.conversation_history, "_fold", "summarize")
+    if orchestrator.npc_manager is not None:
+        timer.wrap(orchestrator.npc_manager, "update_npcs", "npc")
+    if orchestrator.quest_log is not None:
+        timer.wrap(orchestrator.quest_log, "process_turn", "quest")
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_session(base_url: str, turns: int, seed: int) -> Dict:
+    actions = scripted_actions(turns, seed)
+    checkpoints = sorted({turns // 10 * i for i in range(1, 11)} | {1, turns})
+    timer = StageTimer()
+
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        orchestrator = DungeonMasterOrchestrator("fake-key", llm_base_url=base_url)
+        orchestrator.initialize_agents()
+        orchestrator.debug_mode = False
+        instrument(orchestrator, timer)
+
+        growth = []
+        turn_latencies = []
+        start = time.perf_counter()
+        for i, action in enumerate(actions, start=1):
+            turn_start = time.perf_counter()
+            orchestrator.process_turn(action)
+            turn_latencies.append(time.perf_counter() - turn_start)
+            if i in checkpoints:
+                stats = orchestrator.memory_manager.get_stats()
+                growth.append({
+                    "turn": i,
+                    "memories": stats["total_memories"],
+                    "memory_log": len(orchestrator.memory_manager.memory_log),
+                    "npcs": len(orchestrator.npc_manager.get_all_npcs()) if orchestrator.npc_manager is not None else 0,
+                    "quests": len(orchestrator.quest_log.quests) if orchestrator.quest_log is not None else 0,
+                    "peak_rss_mb": round(peak_rss_mb(), 1)
+                })
+        orchestrator.memory_manager.wait_for_summary()
+        orchestrator.conversation_history.wait()
+        elapsed = time.perf_counter() - start
+
+        orchestrator.memory_manager.flush()
+        orchestrator.memory_manager.client.reset()
+
+    ordered = sorted(turn_latencies)
+    return {
+        "turns": turns,
+        "seed": seed,
+        "elapsed_s": round(elapsed, 3),
+        "turns_per_second": round(turns / elapsed, 3),
+        "turn_p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+        "turn_p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+        "stages": timer.report(),
+        "memory_growth": growth
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scripted end-to-end benchmark with a local fake LLM")
+    parser.add_argument("--turns", type=int, nargs="+", default=[30, 300, 3000], help="session lengths to run")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per fake LLM completion")
+    parser.add_argument("--response-words", type=int, default=150, help="approximate words per fake completion")
+    parser.add_argument("--seed", type=int, default=42, help="script seed (same seed replays the same session)")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    with FakeLLMServer(latency=args.latency, response_words=args.response_words) as server:
+        report = {
+            "config": {"latency": args.latency, "response_words": args.response_words, "seed": args.seed},
+            "sessions": [run_session(server.base_url, turns, args.seed) for turns in args.turns]
+        }
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Turn latency benchmark for the serial and asynchronous turn pipelines
+Runs a scripted session against a local fake LLM server and reports
+p50/p95 time-to-response per turn for each pipeline, plus the speculative
+validation acceptance rate
+"""
+
+import asyncio
+import statistics
+import time
+from typing import List
+
+from FakeLLMServer import FakeLLMServer
+from MainSystem import DungeonMasterOrchestrator
+
+
+TURNS = 20
+LLM_LATENCY = 0.25     # Seconds per fake completion
+PLAYER_THINK_TIME = 1.0  # Seconds between turns in the async run, as a real player would type
+
+SCRIPT = [
+    "I meet a wizard named Aldric who gives me a quest to find the Heart of Emberfall",
+    "I pick up the silver key from the rubble",
+    "I ask Aldric about the curse on the forest",
+    "I walk toward the northern corridor",
+    "I follow the chanting into the catacombs"
+]
+
+
+def percentile(samples: List[float], pct: int) -> float:
+    return statistics.quantiles(samples, n=100, method="inclusive")[pct - 1]
+
+
+def make_orchestrator(base_url: str, async_pipeline: bool, speculative: bool = False) -> DungeonMasterOrchestrator:
+    orchestrator = DungeonMasterOrchestrator(
+        "fake-key",
+        async_pipeline=async_pipeline,
+        llm_base_url=base_url,
+        speculative_validation=speculative
+    )
+    orchestrator.initialize_agents()
+    orchestrator.debug_mode = False
+    # Send every validation to the LLM so all pipelines pay the same validation cost
+    orchestrator.lore_talker.fast_path = False
+    return orchestrator
+
+
+def run_serial(base_url: str) -> List[float]:
+    orchestrator = make_orchestrator(base_url, async_pipeline=False)
+    latencies = []
+    for i in range(TURNS):
+        start = time.perf_counter()
+        orchestrator.process_turn(SCRIPT[i % len(SCRIPT)])
+        latencies.append(time.perf_counter() - start)
+    orchestrator.memory_manager.client.reset()
+    return latencies
+
+
+def run_speculative(base_url: str) -> List[float]:
+    orchestrator = make_orchestrator(base_url, async_pipeline=False, speculative=True)
+    latencies = []
+    for i in range(TURNS):
+        start = time.perf_counter()
+        orchestrator.process_turn(SCRIPT[i % len(SCRIPT)])
+        latencies.append(time.perf_counter() - start)
+    spec = orchestrator.speculation_stats
+    print(f"\nSpeculation: {spec['accepted']}/{spec['turns']} drafts accepted, "
+          f"{spec['saved_seconds'] / spec['turns']:.3f}s saved per turn on average")
+    orchestrator.memory_manager.client.reset()
+    return latencies
+
+
+async def run_async(base_url: str) -> List[float]:
+    orchestrator = make_orchestrator(base_url, async_pipeline=True)
+    latencies = []
+    for i in range(TURNS):
+        start = time.perf_counter()
+        await orchestrator.process_turn_async(SCRIPT[i % len(SCRIPT)])
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(PLAYER_THINK_TIME)
+    await orchestrator.wait_for_commits()
+    orchestrator.memory_manager.client.reset()
+    return latencies
+
+
+def main():
+    print("AI Dungeon Master - Turn Latency Benchmark\n")
+    with FakeLLMServer(latency=LLM_LATENCY, response_words=150) as server:
+        results = {
+            "serial": run_serial(server.base_url),
+            "speculative": run_speculative(server.base_url),
+            "async": asyncio.run(run_async(server.base_url))
+        }
+
+    print(f"\n{'pipeline':<11} {'p50 (s)':>8} {'p95 (s)':>8}")
+    for name, latencies in results.items():
+        print(f"{name:<11} {percentile(latencies, 50):>8.3f} {percentile(latencies, 95):>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
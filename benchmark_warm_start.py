@@ -0,0 +1,81 @@
+"""
+Warm-start benchmark for persistent sessions
+Builds a 10k-memory session on disk, then times a fresh process reattaching to it:
+client + model startup, session state restore and the first retrieval
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+
+MEMORIES = 10000
+SENTENCES_PER_TURN = 10
+SESSION_ID = "bench"
+
+
+def build(persist_directory: str):
+    from MemoryAgent import MemoryManager
+    from SessionStore import SessionStore
+
+    manager = MemoryManager(persist_directory=persist_directory, session_id=SESSION_ID)
+    for turn in range(MEMORIES // SENTENCES_PER_TURN):
+        sentences = [f"On turn {turn} the party finds clue number {i} near the ruined watchtower" for i in range(SENTENCES_PER_TURN)]
+        entities = {"npcs": [f"Npc {turn % 40}"], "locations": [f"Place {turn % 25}"]}
+        manager._ingest_sentences(sentences, entities, turn)
+    SessionStore(persist_directory).save(SESSION_ID, {"turn_count": MEMORIES // SENTENCES_PER_TURN, "memory": manager.export_state()})
+
+
+def warm_start(persist_directory: str) -> dict:
+    timings = {}
+    start = time.perf_counter()
+    from MemoryAgent import MemoryManager
+    from SessionStore import SessionStore
+
+    manager = MemoryManager(persist_directory=persist_directory, session_id=SESSION_ID)
+    timings["open_s"] = time.perf_counter() - start
+
+    step = time.perf_counter()
+    manager.load_state(SessionStore(persist_directory).load(SESSION_ID)["memory"])
+    timings["restore_state_s"] = time.perf_counter() - step
+
+    step = time.perf_counter()
+    memories = manager.retrieve_memories("What clue did the party find near the watchtower?", top_k=5)
+    timings["first_query_s"] = time.perf_counter() - step
+
+    timings["total_s"] = time.perf_counter() - start
+    timings["memories"] = manager.world_collection.count()
+    timings["retrieved"] = len(memories)
+    return timings
+
+
+def main():
+    if len(sys.argv) == 3 and sys.argv[1] in ("--build", "--warm"):
+        if sys.argv[1] == "--build":
+            build(sys.argv[2])
+        else:
+            print(json.dumps(warm_start(sys.argv[2])))
+        return
+
+    print("AI Dungeon Master - Persistent Session Warm-Start Benchmark\n")
+    with tempfile.TemporaryDirectory() as persist_directory:
+        start = time.perf_counter()
+        subprocess.check_call([sys.executable, __file__, "--build", persist_directory], stdout=subprocess.DEVNULL)
+        print(f"Built {MEMORIES} memories in {time.perf_counter() - start:.1f}s "
+              f"({sum(os.path.getsize(os.path.join(d, f)) for d, _, fs in os.walk(persist_directory) for f in fs) / 1e6:.1f} MB on disk)")
+
+        output = subprocess.check_output([sys.executable, __file__, "--warm", persist_directory])
+        timings = json.loads(output.decode().strip().splitlines()[-1])
+
+    print(f"\nWarm start of a {timings['memories']}-memory session:")
+    print(f"  open client + models : {timings['open_s']:.2f}s")
+    print(f"  restore session state: {timings['restore_state_s']:.2f}s")
+    print(f"  first retrieval      : {timings['first_query_s']:.2f}s")
+    print(f"  total                : {timings['total_s']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Test script for the bonus features (NPC evolution + quest log)
+Plays turns through DungeonMasterOrchestrator against the local fake LLM and
+checks that NPCs and quests are populated, survive a session save and resume,
+and that the console commands work before anything has been tracked
+"""
+
+from contextlib import redirect_stdout
+import io
+import tempfile
+
+from FakeLLMServer import FakeLLMServer
+from MainSystem import DungeonMasterOrchestrator
+
+
+TURNS = ["I greet Aldric and ask about the Heart of Emberfall", "I thank Aldric and offer my help", "I look around"]
+
+
+class BonusFeatureTester:
+    """Automated checks for NPC and quest tracking in the turn pipeline"""
+
+    def __init__(self, server: FakeLLMServer, persist_directory: str):
+        self.server = server
+        self.persist_directory = persist_directory
+        self.results = {}
+
+    def make_orchestrator(self) -> DungeonMasterOrchestrator:
+        with redirect_stdout(io.StringIO()):
+            orchestrator = DungeonMasterOrchestrator(
+                "fake-key",
+                llm_base_url=self.server.base_url,
+                persist_directory=self.persist_directory,
+                session_id="bonus-test"
+            )
+            orchestrator.initialize_agents()
+        orchestrator.debug_mode = False
+        return orchestrator
+
+    def record(self, name: str, passed: bool, detail: str = ""):
+        self.results[name] = passed
+        print(f"{'✅' if passed else '❌'} {name}{': ' + detail if detail else ''}")
+
+    def test_commands_before_first_turn(self, orchestrator: DungeonMasterOrchestrator):
+        with redirect_stdout(io.StringIO()):
+            handled = orchestrator._handle_command("npcs") and orchestrator._handle_command("quests")
+        self.record("npcs/quests commands with nothing tracked", handled and orchestrator.turn_count == 0)
+
+    def test_turns_populate(self, orchestrator: DungeonMasterOrchestrator):
+        with redirect_stdout(io.StringIO()):
+            for player_input in TURNS:
+                orchestrator.process_turn(player_input)
+            orchestrator.memory_manager.wait_for_summary()
+        npcs = orchestrator.npc_manager.get_all_npcs()
+        quests = orchestrator.quest_log.quests
+        self.record("turns populate NPCs", any("aldric" in npc.lower() for npc in npcs), f"{npcs}")
+        self.record("turns populate quests", len(quests) > 0, f"{len(quests)} quests")
+
+    def test_npcs_view_is_read_only(self, orchestrator: DungeonMasterOrchestrator):
+        npc_key = next(iter(orchestrator.npc_manager.npcs))
+        try:
+            orchestrator.npc_manager.npcs[npc_key]["personality"]["friendly"] = 1.0
+            self.record("npcs view rejects writes", False, "write accepted")
+        except TypeError:
+            self.record("npcs view rejects writes", True)
+
+    def test_resume_restores(self, orchestrator: DungeonMasterOrchestrator):
+        npcs = orchestrator.npc_manager.get_all_npcs()
+        quest_ids = set(orchestrator.quest_log.quests)
+        resumed = self.make_orchestrator()
+        self.record("resume restores NPCs and quests",
+                    resumed.resumed_session
+                    and resumed.npc_manager.get_all_npcs() == npcs
+                    and set(resumed.quest_log.quests) == quest_ids)
+
+    def run_all_tests(self):
+        print("\n" + "="*60)
+        print("🧪 BONUS FEATURES TEST SUITE")
+        print("="*60 + "\n")
+
+        orchestrator = self.make_orchestrator()
+        tests = [
+            self.test_commands_before_first_turn,
+            self.test_turns_populate,
+            self.test_npcs_view_is_read_only,
+            self.test_resume_restores
+        ]
+        for test in tests:
+            try:
+                test(orchestrator)
+            except Exception as e:
+                self.record(test.__name__, False, f"unexpected {type(e).__name__}: {e}")
+
+        passed = sum(self.results.values())
+        print(f"\nTotal: {passed}/{len(self.results)} tests passed")
+        if passed == len(self.results):
+            print("\n🎉 ALL TESTS PASSED!")
+        print("="*60 + "\n")
+        return passed == len(self.results)
+
+
+def main():
+    with FakeLLMServer(latency=0.0, response_words=200) as server, tempfile.TemporaryDirectory() as directory:
+        BonusFeatureTester(server, directory).run_all_tests()
+
+
+if __name__ == "__main__":
+    main()
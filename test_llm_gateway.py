@@ -0,0 +1,224 @@
+"""
+Test script for the LLM gateway
+Runs the gateway against a local fake OpenAI-compatible server that injects
+429s and slow responses, and checks retries, deadlines, concurrency and rate limits
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import time
+
+from FakeLLMServer import FakeLLMServer
+from LLMCache import CompletionCache
+from LLMGateway import LLMDeadlineExceeded, LLMError, LLMGateway, LLMUnavailable, turn_deadline
+
+
+MODEL = "llama-3.1-8b-instant"
+MESSAGES = [{"role": "user", "content": "Describe the tavern"}]
+
+
+class GatewayTester:
+    """Automated checks for LLMGateway behaviour"""
+
+    def __init__(self, server: FakeLLMServer):
+        self.server = server
+        self.results = {}
+
+    def make_gateway(self, **kwargs) -> LLMGateway:
+        options = {"backoff_base": 0.05, "backoff_max": 0.2, "request_timeout": 5.0}
+        options.update(kwargs)
+        return LLMGateway("fake-key", base_url=self.server.base_url, **options)
+
+    def complete(self, gateway: LLMGateway, temperature: float = 0.7) -> str:
+        return gateway.complete(MODEL, MESSAGES, temperature=temperature, max_tokens=50)
+
+    def record(self, name: str, passed: bool, detail: str = ""):
+        self.results[name] = passed
+        print(f"{'✅' if passed else '❌'} {name}{': ' + detail if detail else ''}")
+
+    def test_basic_completion(self):
+        gateway = self.make_gateway()
+        text = self.complete(gateway)
+        self.record("basic completion", bool(text) and gateway.get_stats()["requests"] == 1)
+
+    def test_retries_429(self):
+        gateway = self.make_gateway(max_retries=3)
+        self.server.inject_errors(2, status=429)
+        text = self.complete(gateway)
+        stats = gateway.get_stats()
+        self.record("retries 429s", bool(text) and stats["retries"] == 2 and stats["rate_limited"] == 2,
+                    f"{stats['retries']} retries")
+
+    def test_honors_retry_after(self):
+        gateway = self.make_gateway(max_retries=1)
+        self.server.inject_errors(1, status=429, retry_after=0.5)
+        start = time.perf_counter()
+        self.complete(gateway)
+        elapsed = time.perf_counter() - start
+        self.record("honors Retry-After", elapsed >= 0.5, f"{elapsed:.2f}s")
+
+    def test_retries_server_errors(self):
+        gateway = self.make_gateway(max_retries=2)
+        self.server.inject_errors(1, status=503)
+        text = self.complete(gateway)
+        self.record("retries 5xx", bool(text) and gateway.get_stats()["retries"] == 1)
+
+    def test_gives_up(self):
+        gateway = self.make_gateway(max_retries=2)
+        self.server.inject_errors(3, status=429)
+        try:
+            self.complete(gateway)
+            self.record("gives up after max retries", False, "no error raised")
+        except LLMUnavailable:
+            self.record("gives up after max retries", gateway.get_stats()["failures"] == 1)
+
+    def test_does_not_retry_client_errors(self):
+        gateway = self.make_gateway(max_retries=3)
+        self.server.inject_errors(1, status=400)
+        try:
+            self.complete(gateway)
+            self.record("no retry on 400", False, "no error raised")
+        except LLMUnavailable:
+            self.record("no retry on 400", gateway.get_stats()["retries"] == 0)
+
+    def test_slow_response_times_out(self):
+        gateway = self.make_gateway(max_retries=1, request_timeout=0.3)
+        self.server.inject_delay(1, 1.0)
+        text = self.complete(gateway)
+        stats = gateway.get_stats()
+        self.record("retries a timed-out request", bool(text) and stats["timeouts"] == 1, f"{stats['timeouts']} timeouts")
+
+    def test_turn_deadline(self):
+        gateway = self.make_gateway(max_retries=5)
+        self.server.inject_delay(1, 2.0)
+        start = time.perf_counter()
+        try:
+            with turn_deadline(0.5):
+                self.complete(gateway)
+            self.record("turn deadline", False, "no error raised")
+        except LLMDeadlineExceeded:
+            elapsed = time.perf_counter() - start
+            self.record("turn deadline", elapsed < 1.0, f"gave up after {elapsed:.2f}s")
+
+    def test_deadline_reaches_threads(self):
+        gateway = self.make_gateway(max_retries=0)
+        self.server.inject_delay(1, 2.0)
+
+        async def run():
+            with turn_deadline(0.3):
+                await asyncio.to_thread(self.complete, gateway)
+
+        try:
+            asyncio.run(run())
+            self.record("deadline propagates to to_thread", False, "no error raised")
+        except LLMDeadlineExceeded:
+            self.record("deadline propagates to to_thread", True)
+
+    def wait_until_idle(self):
+        """Let stalled requests abandoned by earlier tests finish on the server side"""
+        while self.server.active_requests:
+            time.sleep(0.05)
+
+    def test_concurrency_limit(self):
+        gateway = self.make_gateway(max_concurrency_per_model=2)
+        self.wait_until_idle()
+        self.server.peak_concurrency = 0
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda _: self.complete(gateway), range(8)))
+        self.record("per-model concurrency limit", self.server.peak_concurrency <= 2,
+                    f"peak {self.server.peak_concurrency}")
+
+    def test_rate_limit(self):
+        gateway = self.make_gateway(requests_per_second=10, burst=1, max_concurrency_per_model=8)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            list(pool.map(lambda _: self.complete(gateway), range(6)))
+        elapsed = time.perf_counter() - start
+        self.record("token bucket rate limit", elapsed >= 0.5, f"6 requests in {elapsed:.2f}s")
+
+    def test_cache(self):
+        gateway = self.make_gateway(cache=CompletionCache())
+        before = self.server.request_count
+        first = self.complete(gateway, temperature=0.2)
+        second = self.complete(gateway, temperature=0.2)
+        self.record("cache answers repeats", first == second and self.server.request_count - before == 1)
+
+    def test_uncacheable_skips_cache(self):
+        gateway = self.make_gateway(cache=CompletionCache())
+        before = self.server.request_count
+        for _ in range(2):
+            gateway.complete(MODEL, MESSAGES, temperature=0.2, max_tokens=50, cacheable=False)
+        self.record("uncacheable requests skip the cache",
+                    self.server.request_count - before == 2 and gateway.cache.get_stats()["entries"] == 0)
+
+    def test_streaming(self):
+        gateway = self.make_gateway(max_retries=2)
+        self.server.inject_errors(1, status=429)
+        text = "".join(gateway.stream(MODEL, MESSAGES, temperature=0.7, max_tokens=50))
+        self.record("streaming retries before the first chunk", bool(text) and gateway.get_stats()["retries"] == 1)
+
+    def test_abandoned_stream_releases_slot(self):
+        gateway = self.make_gateway(max_concurrency_per_model=1)
+        stream = gateway.stream(MODEL, MESSAGES, temperature=0.7, max_tokens=50)
+        next(stream)
+        stream.close()
+        try:
+            with turn_deadline(1.0):
+                self.complete(gateway)
+            self.record("closing a stream early frees its model slot", True)
+        except LLMDeadlineExceeded:
+            self.record("closing a stream early frees its model slot", False, "slot still held")
+
+    def test_stream_errors_wrapped(self):
+        gateway = self.make_gateway(request_timeout=0.3)
+        self.server.inject_stream_stall(1, after_words=3, seconds=1.0)
+        try:
+            "".join(gateway.stream(MODEL, MESSAGES, temperature=0.7, max_tokens=50))
+            self.record("mid-stream errors raised as LLMError", False, "no error raised")
+        except LLMError:
+            self.record("mid-stream errors raised as LLMError", gateway.get_stats()["timeouts"] == 1)
+
+    def run_all_tests(self):
+        print("\n" + "="*60)
+        print("🧪 LLM GATEWAY TEST SUITE")
+        print("="*60 + "\n")
+
+        tests = [
+            self.test_basic_completion,
+            self.test_retries_429,
+            self.test_honors_retry_after,
+            self.test_retries_server_errors,
+            self.test_gives_up,
+            self.test_does_not_retry_client_errors,
+            self.test_slow_response_times_out,
+            self.test_turn_deadline,
+            self.test_deadline_reaches_threads,
+            self.test_concurrency_limit,
+            self.test_rate_limit,
+            self.test_cache,
+            self.test_uncacheable_skips_cache,
+            self.test_streaming,
+            self.test_abandoned_stream_releases_slot,
+            self.test_stream_errors_wrapped
+        ]
+        for test in tests:
+            try:
+                test()
+            except Exception as e:
+                self.record(test.__name__, False, f"unexpected {type(e).__name__}: {e}")
+
+        passed = sum(self.results.values())
+        print(f"\nTotal: {passed}/{len(self.results)} tests passed")
+        if passed == len(self.results):
+            print("\n🎉 ALL TESTS PASSED!")
+        print("="*60 + "\n")
+        return passed == len(self.results)
+
+
+def main():
+    with FakeLLMServer(latency=0.05, response_words=30) as server:
+        GatewayTester(server).run_all_tests()
+
+
+if __name__ == "__main__":
+    main()
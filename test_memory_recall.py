@@ -1,220 +1,220 @@
-"""
-Test script for evaluating memory recall (short-term and long-term)
-This script runs automated tests to verify the system's memory capabilities
-"""
-
-import os
-import sys
-from MainSystem import DungeonMasterOrchestrator
-
-class MemoryTester:
-    """Automated testing for memory recall"""
-
-    def __init__(self, groq_api_key: str):
-        self.orchestrator = DungeonMasterOrchestrator(groq_api_key)
-        self.orchestrator.initialize_agents()
-        self.test_results = {
-            "short_term": [],
-            "long_term": [],
-            "consistency": []
-        }
-
-    def test_short_term_recall(self):
-        print("\n" + "="*60)
-        print("TEST 1: SHORT-TERM RECALL (Last 5 turns)")
-        print("="*60 + "\n")
-
-        events = [
-            "I pick up a silver key from the ground",
-            "I examine the key closely",
-            "I put the key in my pocket",
-            "I walk towards the old castle",
-            "I approach the castle gate"
-        ]
-
-        for event in events:
-            print(f"Player: {event}")
-            response = self.orchestrator.process_turn(event)
-            print(f"DM: {response[:100]}...\n")
-
-        print("\n--- Testing Recall ---")
-        test_query = "What key did I pick up?"
-        print(f"Player: {test_query}")
-
-        memories = self.orchestrator.memory_manager.retrieve_memories(test_query, top_k=5)
-
-        print(f"\nRetrieved Memories:")
-        for mem in memories:
-            print(f"  • {mem['text']} [score: {mem['score']:.3f}]")
-
-        found_key = any("silver" in mem['text'].lower() and "key" in mem['text'].lower() for mem in memories)
-
-        if found_key:
-            print("\n✅ SHORT-TERM RECALL: PASSED")
-            self.test_results["short_term"].append(True)
-        else:
-            print("\n❌ SHORT-TERM RECALL: FAILED")
-            self.test_results["short_term"].append(False)
-
-    def test_long_term_recall(self):
-        print("\n" + "="*60)
-        print("TEST 2: LONG-TERM RECALL (30+ turns)")
-        print("="*60 + "\n")
-
-        early_event = "I meet a wizard named Aldric who gives me a quest to find the Heart of Emberfall"
-        print(f"Turn 1 - Player: {early_event}")
-        response = self.orchestrator.process_turn(early_event)
-        print(f"DM: {response[:100]}...\n")
-
-        filler_actions = [
-            "I continue walking",
-            "I look around",
-            "I check my supplies",
-            "I rest for a moment",
-            "I keep moving forward"
-        ]
-
-        print(f"Executing 29 filler turns...")
-        for i in range(29):
-            action = filler_actions[i % len(filler_actions)]
-            self.orchestrator.process_turn(action)
-            if (i + 1) % 10 == 0:
-                print(f"  Completed {i + 1}/29 turns...")
-
-        print(f"\nTotal turns so far: {self.orchestrator.turn_count}")
-
-        print("\n--- Testing Long-Term Recall ---")
-        test_query = "What quest did the wizard give me?"
-        print(f"Turn {self.orchestrator.turn_count + 1} - Player: {test_query}")
-
-        memories = self.orchestrator.memory_manager.retrieve_memories(test_query, top_k=10)
-
-        print(f"\nRetrieved Memories:")
-        for mem in memories:
-            print(f"  • {mem['text']} [score: {mem['score']:.3f}]")
-
-        # Adjusted for summarization - check partial mention or summary strings
-        found_quest = any(
-            ("aldric" in mem['text'].lower() or "wizard" in mem['text'].lower() or "quest" in mem['text'].lower())
-            for mem in memories
-        )
-
-        if found_quest:
-            print("\n✅ LONG-TERM RECALL: PASSED")
-            self.test_results["long_term"].append(True)
-        else:
-            print("\n❌ LONG-TERM RECALL: FAILED")
-            self.test_results["long_term"].append(False)
-
-    def test_consistency(self):
-        print("\n" + "="*60)
-        print("TEST 3: NARRATIVE CONSISTENCY")
-        print("="*60 + "\n")
-
-        fact_event = "I learn that the forest is cursed by an ancient evil"
-        print(f"Player: {fact_event}")
-        response1 = self.orchestrator.process_turn(fact_event)
-        print(f"DM: {response1[:100]}...\n")
-
-        for _ in range(5):
-            self.orchestrator.process_turn("I explore the area")
-
-        query = "Tell me about the forest curse"
-        print(f"Player: {query}")
-
-        memories = self.orchestrator.memory_manager.retrieve_memories(query, top_k=5)
-
-        found_curse = any("curse" in mem['text'].lower() for mem in memories)
-
-        if found_curse:
-            print("\n✅ CONSISTENCY: PASSED")
-            self.test_results["consistency"].append(True)
-        else:
-            print("\n❌ CONSISTENCY: FAILED")
-            self.test_results["consistency"].append(False)
-
-    def test_npc_memory(self):
-        if not self.orchestrator.enable_bonus_features:
-            print("\n⊘ NPC Memory test skipped (bonus features disabled)")
-            return
-
-        print("\n" + "="*60)
-        print("BONUS TEST: NPC PERSONALITY EVOLUTION")
-        print("="*60 + "\n")
-
-        print("Player: I greet the Goblin King warmly")
-        response1 = self.orchestrator.process_turn("I greet the Goblin King warmly")
-        print(f"DM: {response1[:100]}...\n")
-
-        if "goblin" in self.orchestrator.npc_manager.get_all_npcs().__str__().lower():
-            print("✅ NPC detected and tracked")
-
-        for _ in range(3):
-            self.orchestrator.process_turn("I give a gift to the Goblin King")
-
-        npcs = self.orchestrator.npc_manager.get_all_npcs()
-        if npcs:
-            for npc in npcs:
-                if "goblin" in npc.lower():
-                    desc = self.orchestrator.npc_manager.get_personality_description(npc)
-                    print(f"\nNPC Status: {desc}")
-                    print("✅ NPC MEMORY: PASSED")
-                    return
-
-        print("⚠️  NPC MEMORY: PARTIAL (NPC tracked but personality not updated)")
-
-    def run_all_tests(self):
-        print("\n" + "="*60)
-        print("🧪 AI DUNGEON MASTER - AUTOMATED TESTING SUITE")
-        print("="*60)
-
-        try:
-            self.test_short_term_recall()
-            self.test_long_term_recall()
-            self.test_consistency()
-            self.test_npc_memory()
-
-            print("\n" + "="*60)
-            print("📊 TEST SUMMARY")
-            print("="*60)
-
-            short_term_pass = sum(self.test_results["short_term"])
-            long_term_pass = sum(self.test_results["long_term"])
-            consistency_pass = sum(self.test_results["consistency"])
-
-            total_tests = len(self.test_results["short_term"]) + len(self.test_results["long_term"]) + len(self.test_results["consistency"])
-            total_passed = short_term_pass + long_term_pass + consistency_pass
-
-            print(f"\nShort-Term Recall: {short_term_pass}/{len(self.test_results['short_term'])} passed")
-            print(f"Long-Term Recall: {long_term_pass}/{len(self.test_results['long_term'])} passed")
-            print(f"Consistency: {consistency_pass}/{len(self.test_results['consistency'])} passed")
-            print(f"\nTotal: {total_passed}/{total_tests} tests passed")
-
-            if total_passed == total_tests:
-                print("\n🎉 ALL TESTS PASSED!")
-            else:
-                print(f"\n⚠️  {total_tests - total_passed} test(s) failed")
-
-            print("="*60 + "\n")
-
-        except Exception as e:
-            print(f"\n❌ Testing failed with error: {e}")
-            import traceback
-            traceback.print_exc()
-
-
-def main():
-    print("AI Dungeon Master - Memory Recall Testing\n")
-
-    groq_api_key = os.getenv("GROQ_API_KEY")
-
-    if not groq_api_key:
-        print("Please enter your Groq API key:")
-        groq_api_key = input().strip()
-
-    tester = MemoryTester(groq_api_key)
-    tester.run_all_tests()
-
-
-if __name__ == "__main__":
-    main()
+"""
+Test script for evaluating memory recall (short-term and long-term)
+This script runs automated tests to verify the system's memory capabilities
+"""
+
+import os
+import sys
+from MainSystem import DungeonMasterOrchestrator
+
+class MemoryTester:
+    """Automated testing for memory recall"""
+
+    def __init__(self, groq_api_key: str):
+        self.orchestrator = DungeonMasterOrchestrator(groq_api_key)
+        self.orchestrator.initialize_agents()
+        self.test_results = {
+            "short_term": [],
+            "long_term": [],
+            "consistency": []
+        }
+
+    def test_short_term_recall(self):
+        print("\n" + "="*60)
+        print("TEST 1: SHORT-TERM RECALL (Last 5 turns)")
+        print("="*60 + "\n")
+
+        events = [
+            "I pick up a silver key from the ground",
+            "I examine the key closely",
+            "I put the key in my pocket",
+            "I walk towards the old castle",
+            "I approach the castle gate"
+        ]
+
+        for event in events:
+            print(f"Player: {event}")
+            response = self.orchestrator.process_turn(event)
+            print(f"DM: {response[:100]}...\n")
+
+        print("\n--- Testing Recall ---")
+        test_query = "What key did I pick up?"
+        print(f"Player: {test_query}")
+
+        memories = self.orchestrator.memory_manager.retrieve_memories(test_query, top_k=5)
+
+        print(f"\nRetrieved Memories:")
+        for mem in memories:
+            print(f"  • {mem['text']} [score: {mem['score']:.3f}]")
+
+        found_key = any("silver" in mem['text'].lower() and "key" in mem['text'].lower() for mem in memories)
+
+        if found_key:
+            print("\n✅ SHORT-TERM RECALL: PASSED")
+            self.test_results["short_term"].append(True)
+        else:
+            print("\n❌ SHORT-TERM RECALL: FAILED")
+            self.test_results["short_term"].append(False)
+
+    def test_long_term_recall(self):
+        print("\n" + "="*60)
+        print("TEST 2: LONG-TERM RECALL (30+ turns)")
+        print("="*60 + "\n")
+
+        early_event = "I meet a wizard named Aldric who gives me a quest to find the Heart of Emberfall"
+        print(f"Turn 1 - Player: {early_event}")
+        response = self.orchestrator.process_turn(early_event)
+        print(f"DM: {response[:100]}...\n")
+
+        filler_actions = [
+            "I continue walking",
+            "I look around",
+            "I check my supplies",
+            "I rest for a moment",
+            "I keep moving forward"
+        ]
+
+        print(f"Executing 29 filler turns...")
+        for i in range(29):
+            action = filler_actions[i % len(filler_actions)]
+            self.orchestrator.process_turn(action)
+            if (i + 1) % 10 == 0:
+                print(f"  Completed {i + 1}/29 turns...")
+
+        print(f"\nTotal turns so far: {self.orchestrator.turn_count}")
+
+        print("\n--- Testing Long-Term Recall ---")
+        test_query = "What quest did the wizard give me?"
+        print(f"Turn {self.orchestrator.turn_count + 1} - Player: {test_query}")
+
+        memories = self.orchestrator.memory_manager.retrieve_memories(test_query, top_k=10)
+
+        print(f"\nRetrieved Memories:")
+        for mem in memories:
+            print(f"  • {mem['text']} [score: {mem['score']:.3f}]")
+
+        # Adjusted for summarization - check partial mention or summary strings
+        found_quest = any(
+            ("aldric" in mem['text'].lower() or "wizard" in mem['text'].lower() or "quest" in mem['text'].lower())
+            for mem in memories
+        )
+
+        if found_quest:
+            print("\n✅ LONG-TERM RECALL: PASSED")
+            self.test_results["long_term"].append(True)
+        else:
+            print("\n❌ LONG-TERM RECALL: FAILED")
+            self.test_results["long_term"].append(False)
+
+    def test_consistency(self):
+        print("\n" + "="*60)
+        print("TEST 3: NARRATIVE CONSISTENCY")
+        print("="*60 + "\n")
+
+        fact_event = "I learn that the forest is cursed by an ancient evil"
+        print(f"Player: {fact_event}")
+        response1 = self.orchestrator.process_turn(fact_event)
+        print(f"DM: {response1[:100]}...\n")
+
+        for _ in range(5):
+            self.orchestrator.process_turn("I explore the area")
+
+        query = "Tell me about the forest curse"
+        print(f"Player: {query}")
+
+        memories = self.orchestrator.memory_manager.retrieve_memories(query, top_k=5)
+
+        found_curse = any("curse" in mem['text'].lower() for mem in memories)
+
+        if found_curse:
+            print("\n✅ CONSISTENCY: PASSED")
+            self.test_results["consistency"].append(True)
+        else:
+            print("\n❌ CONSISTENCY: FAILED")
+            self.test_results["consistency"].append(False)
+
+    def test_npc_memory(self):
+        if not self.orchestrator.enable_bonus_features:
+            print("\n⊘ NPC Memory test skipped (bonus features disabled)")
+            return
+
+        print("\n" + "="*60)
+        print("BONUS TEST: NPC PERSONALITY EVOLUTION")
+        print("="*60 + "\n")
+
+        print("Player: I greet the Goblin King warmly")
+        response1 = self.orchestrator.process_turn("I greet the Goblin King warmly")
+        print(f"DM: {response1[:100]}...\n")
+
+        if "goblin" in self.orchestrator.npc_manager.get_all_npcs().__str__().lower():
+            print("✅ NPC detected and tracked")
+
+        for _ in range(3):
+            self.orchestrator.process_turn("I give a gift to the Goblin King")
+
+        npcs = self.orchestrator.npc_manager.get_all_npcs()
+        if npcs:
+            for npc in npcs:
+                if "goblin" in npc.lower():
+                    desc = self.orchestrator.npc_manager.get_personality_description(npc)
+                    print(f"\nNPC Status: {desc}")
+                    print("✅ NPC MEMORY: PASSED")
+                    return
+
+        print("⚠️  NPC MEMORY: PARTIAL (NPC tracked but personality not updated)")
+
+    def run_all_tests(self):
+        print("\n" + "="*60)
+        print("🧪 AI DUNGEON MASTER - AUTOMATED TESTING SUITE")
+        print("="*60)
+
+        try:
+            self.test_short_term_recall()
+            self.test_long_term_recall()
+            self.test_consistency()
+            self.test_npc_memory()
+
+            print("\n" + "="*60)
+            print("📊 TEST SUMMARY")
+            print("="*60)
+
+            short_term_pass = sum(self.test_results["short_term"])
+            long_term_pass = sum(self.test_results["long_term"])
+            consistency_pass = sum(self.test_results["consistency"])
+
+            total_tests = len(self.test_results["short_term"]) + len(self.test_results["long_term"]) + len(self.test_results["consistency"])
+            total_passed = short_term_pass + long_term_pass + consistency_pass
+
+            print(f"\nShort-Term Recall: {short_term_pass}/{len(self.test_results['short_term'])} passed")
+            print(f"Long-Term Recall: {long_term_pass}/{len(self.test_results['long_term'])} passed")
+            print(f"Consistency: {consistency_pass}/{len(self.test_results['consistency'])} passed")
+            print(f"\nTotal: {total_passed}/{total_tests} tests passed")
+
+            if total_passed == total_tests:
+                print("\n🎉 ALL TESTS PASSED!")
+            else:
+                print(f"\n⚠️  {total_tests - total_passed} test(s) failed")
+
+            print("="*60 + "\n")
+
+        except Exception as e:
+            print(f"\n❌ Testing failed with error: {e}")
+            import traceback
+            traceback.print_exc()
+
+
+def main():
+    print("AI Dungeon Master - Memory Recall Testing\n")
+
+    groq_api_key = os.getenv("GROQ_API_KEY")
+
+    if not groq_api_key:
+        print("Please enter your Groq API key:")
+        groq_api_key = input().strip()
+
+    tester = MemoryTester(groq_api_key)
+    tester.run_all_tests()
+
+
+if __name__ == "__main__":
+    main()